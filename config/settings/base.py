@@ -89,6 +89,29 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# MEDIA_ROOT와 같은 파일시스템의 작업 폴더. 업로드 임시파일과 변환 결과를 복사 없이 rename으로 옮기기 위함.
+MEDIA_WORK_DIR = Path(os.getenv('MEDIA_WORK_DIR') or MEDIA_ROOT / '.work')
+FILE_UPLOAD_TEMP_DIR = str(MEDIA_WORK_DIR)
+
+# gunicorn 워커와 백그라운드 워커가 같은 캐시(홈 1면 스냅샷 등)를 보도록 공유 볼륨의 파일 캐시를 쓴다.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR') or str(MEDIA_WORK_DIR / 'cache'),
+        'TIMEOUT': 300,
+    }
+}
+FRONT_PAGE_CACHE_SECONDS = int(os.getenv('FRONT_PAGE_CACHE_SECONDS', '300'))
+# 태그 자동완성 트라이의 공유 버전을 워커마다 최대 몇 초에 한 번 캐시에서 확인할지.
+TAG_TRIE_VERSION_CHECK_SECONDS = float(os.getenv('TAG_TRIE_VERSION_CHECK_SECONDS', '5'))
+
+# 테스트는 메모리 캐시와 임시 MEDIA_ROOT 로 돌려 체크아웃의 media/ 와 이전 실행의 캐시를 건드리지 않는다.
+TEST_RUNNER = 'config.test_runner.IsolatedMediaTestRunner'
+
+# 검색을 각 gunicorn 워커의 메모리 색인(mmap 스냅샷 + 변경 기록)으로 처리할지 여부. rebuild_search_snapshot 으로 스냅샷을 만든다.
+SEARCH_IN_PROCESS_INDEX = os.getenv('SEARCH_IN_PROCESS_INDEX', 'False').lower() in ('1', 'true', 'yes', 'on')
+SEARCH_SNAPSHOT_PATH = os.getenv('SEARCH_SNAPSHOT_PATH', '')
+SEARCH_CHANGELOG_POLL_SECONDS = float(os.getenv('SEARCH_CHANGELOG_POLL_SECONDS', '2'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -105,6 +128,34 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER or 'no-repl
 SIGNUP_REQUEST_NOTIFY_EMAIL = os.getenv('SIGNUP_REQUEST_NOTIFY_EMAIL', 'hkh7208@poscodx.com')
 SITE_BASE_URL = os.getenv('SITE_BASE_URL', '')
 
+# 기사 저장 후 분기 신문 재생성을 모아서 처리하는 대기 시간(초)
+NEWSPAPER_JOB_DEBOUNCE_SECONDS = int(os.getenv('NEWSPAPER_JOB_DEBOUNCE_SECONDS', '30'))
+NEWSPAPER_JOB_MAX_WAIT_SECONDS = int(os.getenv('NEWSPAPER_JOB_MAX_WAIT_SECONDS', '300'))
+NEWSPAPER_JOB_MAX_ATTEMPTS = int(os.getenv('NEWSPAPER_JOB_MAX_ATTEMPTS', '3'))
+
+# 동영상 변환은 요청 밖 스레드에서 실행하고, 모든 gunicorn 워커를 통틀어 동시 FFmpeg 수를 제한한다.
+FFMPEG_MAX_CONCURRENCY = int(os.getenv('FFMPEG_MAX_CONCURRENCY', '1'))
+FFMPEG_LOCK_DIR = os.getenv('FFMPEG_LOCK_DIR', '')
+VIDEO_TRANSCODE_THREADS = int(os.getenv('VIDEO_TRANSCODE_THREADS', '1'))
+
+# 업로드 이미지의 크기별(240/480/960/1280) 파생본 형식. avif 는 Pillow 가 지원할 때만 생성한다.
+IMAGE_RENDITION_FORMATS = tuple(
+    image_format.strip().lower()
+    for image_format in os.getenv('IMAGE_RENDITION_FORMATS', 'webp,jpeg').split(',')
+    if image_format.strip()
+)
+IMAGE_RENDITION_THREADS = int(os.getenv('IMAGE_RENDITION_THREADS', '1'))
+# 업로드 요청 안에서 여러 장의 사진을 동시에 최적화하는 스레드 수 (워커 프로세스마다 하나의 풀을 함께 쓴다)
+IMAGE_OPTIMIZE_THREADS = int(os.getenv('IMAGE_OPTIMIZE_THREADS', '2'))
+
+# 이어 올리기가 되는 분할 업로드: 조각 크기(nginx /uploads/ 의 client_max_body_size 보다 작게)와 미완료 업로드 보관 시간
+UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', str(8 * 1024 * 1024)))
+UPLOAD_SESSION_MAX_AGE_HOURS = int(os.getenv('UPLOAD_SESSION_MAX_AGE_HOURS', '24'))
+# 업로드 대기 파일이 이 시간(분) 넘게 처리 중이면 워커 재시작 등으로 작업이 끊긴 것으로 보고 다시 처리한다.
+STAGED_PROCESSING_TIMEOUT_MINUTES = int(os.getenv('STAGED_PROCESSING_TIMEOUT_MINUTES', '30'))
+# 미리 올린 사진을 백그라운드에서 최적화하는 스레드 수 (요청 안의 IMAGE_OPTIMIZE_THREADS 풀과 따로 둔다)
+STAGED_IMAGE_THREADS = int(os.getenv('STAGED_IMAGE_THREADS', '1'))
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 
@@ -144,5 +195,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'posts.newspaper_jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,32 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedMediaTestRunner(DiscoverRunner):
+    """Run the suite with an in-memory cache and a throwaway MEDIA_ROOT/MEDIA_WORK_DIR.
+
+    The default cache is a file cache under MEDIA_WORK_DIR, so tests would otherwise write into
+    the checkout's ``media/`` and read front-page/tag-trie versions left by an earlier run.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._media_root = tempfile.mkdtemp(prefix='family-news-tests-')
+        work_dir = Path(self._media_root) / '.work'
+        work_dir.mkdir()
+        self._media_settings = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            MEDIA_ROOT=self._media_root,
+            MEDIA_WORK_DIR=work_dir,
+            FILE_UPLOAD_TEMP_DIR=str(work_dir),
+        )
+        self._media_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._media_settings.disable()
+        shutil.rmtree(self._media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
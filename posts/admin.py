@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
-from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo, QuarterlyNewspaper, Tag
+from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo, ImageRendition, NewspaperRegenerationJob, QuarterlyNewspaper, StagedMedia, Tag, UploadSession
 
 
 class FamilyMemberProfileInline(admin.StackedInline):
@@ -26,12 +26,20 @@ class FamilyUserAdmin(UserAdmin):
 
 @admin.register(FamilyPost)
 class FamilyPostAdmin(admin.ModelAdmin):
-	list_display = ('title', 'author', 'is_hero', 'created_at')
+	list_display = ('title', 'author', 'is_hero', 'comment_count', 'image_count', 'video_count', 'created_at')
 	list_filter = ('is_hero', 'created_at')
 	search_fields = ('title', 'content', 'author__username')
 	filter_horizontal = ('tags',)
 	inlines = []
 
+	def save_model(self, request, obj, form, change):
+		if not change:
+			super().save_model(request, obj, form, change)
+			return
+		# 카운터는 신호가 F() 로 바꾸므로, 폼에서 바뀐 필드만 저장한다.
+		concrete_fields = {field.name for field in obj._meta.concrete_fields}
+		obj.save(update_fields=[name for name in form.changed_data if name in concrete_fields])
+
 
 class FamilyPostImageInline(admin.TabularInline):
 	model = FamilyPostImage
@@ -43,8 +51,8 @@ class FamilyPostImageInline(admin.TabularInline):
 class FamilyPostVideoInline(admin.TabularInline):
 	model = FamilyPostVideo
 	extra = 1
-	fields = ('video', 'created_at')
-	readonly_fields = ('created_at',)
+	fields = ('video', 'status', 'created_at')
+	readonly_fields = ('status', 'created_at')
 
 
 class FamilyPostCommentInline(admin.TabularInline):
@@ -59,8 +67,9 @@ FamilyPostAdmin.inlines = [FamilyPostImageInline, FamilyPostVideoInline, FamilyP
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-	list_display = ('name',)
+	list_display = ('name', 'post_count')
 	search_fields = ('name',)
+	readonly_fields = ('post_count',)
 
 
 @admin.register(FamilyPostImage)
@@ -72,8 +81,8 @@ class FamilyPostImageAdmin(admin.ModelAdmin):
 
 @admin.register(FamilyPostVideo)
 class FamilyPostVideoAdmin(admin.ModelAdmin):
-	list_display = ('post', 'created_at')
-	list_filter = ('created_at',)
+	list_display = ('post', 'status', 'created_at')
+	list_filter = ('status', 'created_at')
 	search_fields = ('post__title',)
 
 
@@ -98,6 +107,34 @@ class QuarterlyNewspaperAdmin(admin.ModelAdmin):
 	search_fields = ('title',)
 
 
+@admin.register(NewspaperRegenerationJob)
+class NewspaperRegenerationJobAdmin(admin.ModelAdmin):
+	list_display = ('year', 'quarter', 'status', 'run_after', 'request_count', 'attempts', 'last_duration_ms', 'finished_at')
+	list_filter = ('status', 'year')
+	readonly_fields = ('pending_since', 'requested_at', 'started_at', 'finished_at', 'last_duration_ms', 'last_error')
+
+
+@admin.register(ImageRendition)
+class ImageRenditionAdmin(admin.ModelAdmin):
+	list_display = ('source_name', 'format', 'width', 'created_at')
+	list_filter = ('format', 'width')
+	search_fields = ('source_name',)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+	list_display = ('file_name', 'user', 'status', 'received_bytes', 'total_size', 'updated_at')
+	list_filter = ('status',)
+	readonly_fields = ('received_bytes', 'sha256', 'created_at', 'updated_at')
+
+
+@admin.register(StagedMedia)
+class StagedMediaAdmin(admin.ModelAdmin):
+	list_display = ('original_name', 'user', 'kind', 'status', 'error', 'updated_at')
+	list_filter = ('kind', 'status')
+	readonly_fields = ('file_name', 'poster_name', 'created_at', 'updated_at')
+
+
 try:
 	admin.site.unregister(User)
 except admin.sites.NotRegistered:
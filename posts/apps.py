@@ -1,4 +1,8 @@
+import logging
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PostsConfig(AppConfig):
@@ -7,3 +11,10 @@ class PostsConfig(AppConfig):
 
     def ready(self):
         import posts.signals  # noqa: F401
+
+        work_dir = getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+        if work_dir:
+            try:
+                os.makedirs(work_dir, exist_ok=True)
+            except OSError:
+                logging.getLogger('posts.upload').warning('Could not create upload temp dir: %s', work_dir)
@@ -0,0 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from django.db import transaction
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(pool_name, max_workers=1):
+    """Return the per-process thread pool called ``pool_name``, creating it lazily after fork."""
+    with _executors_lock:
+        executor = _executors.get(pool_name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix=pool_name)
+            _executors[pool_name] = executor
+        return executor
+
+
+def submit_after_commit(pool_name, func, *args, max_workers=1):
+    transaction.on_commit(lambda: get_executor(pool_name, max_workers).submit(func, *args))
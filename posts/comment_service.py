@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+from .models import FamilyPostComment
+
+
+COMMENTS_PAGE_SIZE = 20
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_comment_cursor(comment):
+    micros = (comment.created_at - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{comment.pk}'
+
+
+def decode_comment_cursor(value):
+    try:
+        micros, comment_id = (int(part) for part in (value or '').split('.'))
+        created_at = _EPOCH + timedelta(microseconds=micros)
+    except (ValueError, OverflowError, OSError):
+        # 범위를 벗어난 시각도 읽을 수 없는 커서로 보고 첫 페이지를 보여준다.
+        return None
+    return created_at, comment_id
+
+
+def load_comment_page(post, before=None, page_size=COMMENTS_PAGE_SIZE):
+    """Return one page of ``post``'s comments, newest first, read by keyset on (created_at, id).
+
+    ``before`` is a cursor from a previous page's ``next_cursor``; an unreadable cursor falls
+    back to the first page.
+    """
+    comments = FamilyPostComment.objects.filter(post=post).select_related('author')
+    cursor = decode_comment_cursor(before) if before else None
+    if cursor:
+        created_at, comment_id = cursor
+        comments = comments.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=comment_id))
+
+    rows = list(comments.order_by('-created_at', '-pk')[:page_size + 1])
+    page = rows[:page_size]
+    return {
+        'comments': page,
+        'next_cursor': encode_comment_cursor(page[-1]) if len(rows) > page_size else None,
+    }
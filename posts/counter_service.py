@@ -0,0 +1,42 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo
+
+
+# FamilyPost 카운터 컬럼 -> 세는 대상 모델
+POST_COUNTERS = {
+    'comment_count': FamilyPostComment,
+    'image_count': FamilyPostImage,
+    'video_count': FamilyPostVideo,
+}
+
+
+def increment_post_counter(post_id, field):
+    FamilyPost.objects.filter(pk=post_id).update(**{field: F(field) + 1})
+
+
+def decrement_post_counter(post_id, field):
+    # MariaDB 의 UNSIGNED 컬럼은 0 - 1 을 계산하는 순간 오류가 나므로 0 인 행은 건드리지 않는다.
+    FamilyPost.objects.filter(pk=post_id, **{f'{field}__gt': 0}).update(**{field: F(field) - 1})
+
+
+def recount_post_counters(post_ids=None):
+    """Recompute every counter column from the child tables in one UPDATE; returns the row count."""
+    counts = {
+        field: Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+        for field, model in POST_COUNTERS.items()
+    }
+    posts = FamilyPost.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return posts.update(**counts)
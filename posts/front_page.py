@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .image_service import load_renditions
+from .models import FamilyPost
+from .profiles import ProfileResolver
+
+
+FRONT_PAGE_STORY_COUNT = 9
+FRONT_PAGE_VERSION_KEY = 'posts:front-page:version'
+
+
+def _snapshot_key(version):
+    return f'posts:front-page:{version}'
+
+
+def _story(post, profiles):
+    # 캐시에는 템플릿이 읽는 값만 담는다. 모델 객체를 넣으면 작성자 비밀번호 해시까지 캐시 파일에 남는다.
+    return {
+        'pk': post.pk,
+        'title': post.title,
+        'content': post.content,
+        'created_at': post.created_at,
+        'comment_count': post.comment_count,
+        'main_image': post.main_image.name or '',
+        'author': {'username': post.author.username},
+        'author_emoji': profiles.emoji(post.author),
+    }
+
+
+def _build_front_page():
+    posts = list(
+        FamilyPost.objects.select_related('author__family_profile')
+        .order_by('-pk')[:FRONT_PAGE_STORY_COUNT + 1]
+    )
+    profiles = ProfileResolver().prime(post.author for post in posts)
+    stories = [_story(post, profiles) for post in posts]
+    return {
+        'hero_post': stories[0] if stories else None,
+        'story_posts': stories[1:],
+        'image_renditions': load_renditions(story['main_image'] for story in stories),
+    }
+
+
+def _with_image_file(story):
+    # 템플릿의 responsive_image 가 .name/.url 을 읽으므로 저장된 이름을 파일 객체로 되돌린다.
+    field = FamilyPost._meta.get_field('main_image')
+    return {**story, 'main_image': field.attr_class(None, field, story['main_image'])}
+
+
+def load_front_page():
+    """Return the cached hero/story snapshot for the home page, building it with one query on a miss.
+
+    Stories are plain dicts holding only what ``index.html`` reads, not ``FamilyPost`` rows.
+    """
+    version = cache.get_or_set(FRONT_PAGE_VERSION_KEY, 1, timeout=None)
+    snapshot = cache.get(_snapshot_key(version))
+    if snapshot is None:
+        snapshot = _build_front_page()
+        cache.set(_snapshot_key(version), snapshot, getattr(settings, 'FRONT_PAGE_CACHE_SECONDS', 300))
+    hero_post = snapshot['hero_post']
+    return {
+        'hero_post': _with_image_file(hero_post) if hero_post else None,
+        'story_posts': [_with_image_file(story) for story in snapshot['story_posts']],
+        'image_renditions': snapshot['image_renditions'],
+    }
+
+
+def _bump_front_page_version():
+    try:
+        cache.incr(FRONT_PAGE_VERSION_KEY)
+    except ValueError:
+        cache.set(FRONT_PAGE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_front_page():
+    # 커밋 전에 지우면 다른 워커가 이전 데이터로 스냅샷을 다시 채울 수 있으므로 커밋 후에 버전을 올린다.
+    # 버전이 바뀌면 만들던 중인 예전 스냅샷은 예전 키에 저장되어 다시 읽히지 않는다.
+    transaction.on_commit(_bump_front_page_version)
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import F, IntegerField, Q, Value
+
+from .models import FamilyPost, FamilyPostImage
+
+
+GALLERY_PAGE_SIZE = 24
+
+# 대표 사진과 추가 사진은 서로 다른 테이블의 id 를 쓰므로, 같은 시각일 때는 종류로 한 번 더 정렬한다.
+KIND_MAIN_IMAGE = 0
+KIND_EXTRA_IMAGE = 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(created_at, kind, item_id):
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{kind}.{item_id}'
+
+
+def decode_cursor(value):
+    try:
+        micros, kind, item_id = (int(part) for part in (value or '').split('.'))
+        created_at = _EPOCH + timedelta(microseconds=micros)
+    except (ValueError, OverflowError, OSError):
+        # 범위를 벗어난 시각도 읽을 수 없는 커서로 보고 첫 페이지를 보여준다.
+        return None
+    if kind not in (KIND_MAIN_IMAGE, KIND_EXTRA_IMAGE):
+        return None
+    return created_at, kind, item_id
+
+
+def _keyset_filter(kind, cursor, newer):
+    """Rows of one branch strictly after ``cursor`` in (created_at, kind, id) order."""
+    created_at, cursor_kind, item_id = cursor
+    if newer:
+        if kind > cursor_kind:
+            return Q(g_created__gte=created_at)
+        if kind == cursor_kind:
+            return Q(g_created__gt=created_at) | Q(g_created=created_at, g_id__gt=item_id)
+        return Q(g_created__gt=created_at)
+
+    if kind < cursor_kind:
+        return Q(g_created__lte=created_at)
+    if kind == cursor_kind:
+        return Q(g_created__lt=created_at) | Q(g_created=created_at, g_id__lt=item_id)
+    return Q(g_created__lt=created_at)
+
+
+def _branch(queryset, kind, post_field, image_field, cursor, newer, ordering, limit):
+    branch = (
+        queryset.exclude(**{image_field: ''})
+        .annotate(
+            g_created=F('created_at'),
+            g_kind=Value(kind, output_field=IntegerField()),
+            g_id=F('pk'),
+            g_post=F(post_field),
+            g_image=F(image_field),
+        )
+    )
+    if cursor:
+        branch = branch.filter(_keyset_filter(kind, cursor, newer))
+    branch = branch.values_list('g_created', 'g_kind', 'g_id', 'g_post', 'g_image')
+    if connection.features.supports_slicing_ordering_in_compound:
+        # 각 갈래도 인덱스 순서로 limit 만큼만 읽게 해서 페이지 비용을 일정하게 유지한다.
+        branch = branch.order_by(*ordering)[:limit]
+    else:
+        branch = branch.order_by()
+    return branch
+
+
+def load_gallery_page(before=None, after=None, page_size=GALLERY_PAGE_SIZE):
+    """Return one gallery page, newest first, read with a single ``UNION ALL`` keyset query.
+
+    ``before`` continues to older photos, ``after`` goes back to newer ones. Both are cursors
+    produced by :func:`encode_cursor`; an unreadable cursor falls back to the first page.
+    """
+    before_cursor = decode_cursor(before) if before else None
+    after_cursor = decode_cursor(after) if after and not before_cursor else None
+    newer = after_cursor is not None
+    cursor = after_cursor or before_cursor
+    ordering = ('g_created', 'g_kind', 'g_id') if newer else ('-g_created', '-g_kind', '-g_id')
+    limit = page_size + 1
+
+    main_images = _branch(FamilyPost.objects.all(), KIND_MAIN_IMAGE, 'pk', 'main_image', cursor, newer, ordering, limit)
+    extra_images = _branch(FamilyPostImage.objects.all(), KIND_EXTRA_IMAGE, 'post_id', 'image', cursor, newer, ordering, limit)
+    rows = list(main_images.union(extra_images, all=True).order_by(*ordering)[:limit])
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if newer:
+        rows.reverse()
+
+    posts = FamilyPost.objects.select_related('author__family_profile').in_bulk({row[3] for row in rows})
+    items = []
+    for created_at, kind, item_id, post_id, image_name in rows:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        if kind == KIND_MAIN_IMAGE:
+            image = post.main_image
+        else:
+            image = FamilyPostImage(pk=item_id, post=post, image=image_name, created_at=created_at).image
+        items.append({
+            'post': post,
+            'image': image,
+            'created_at': created_at,
+            'cursor': encode_cursor(created_at, kind, item_id),
+        })
+
+    if not items:
+        return {'items': [], 'previous_cursor': None, 'next_cursor': None}
+
+    if newer:
+        previous_cursor = items[0]['cursor'] if has_more else None
+        next_cursor = items[-1]['cursor']
+    else:
+        previous_cursor = items[0]['cursor'] if cursor else None
+        next_cursor = items[-1]['cursor'] if has_more else None
+    return {'items': items, 'previous_cursor': previous_cursor, 'next_cursor': next_cursor}
@@ -0,0 +1,148 @@
+"""Bounded-memory decode, downscale and orient pipeline for uploaded photos.
+
+JPEG sources are decoded with ``draft`` at the smallest DCT scale that still covers twice the
+target size, other formats are shrunk with ``reduce`` before the LANCZOS pass, and the EXIF
+orientation plus the user's rotation are applied afterwards as a single transpose of the
+already small image. A 48MP photo therefore never exists as a full-resolution RGB buffer.
+"""
+from functools import lru_cache
+from io import BytesIO
+import time
+
+from PIL import Image
+
+
+EXIF_ORIENTATION_TAG = 0x0112
+# 최종 LANCZOS 축소 전에 목표 크기의 이 배수까지만 미리 줄여서 화질을 지킨다 (Image.thumbnail 과 같은 값).
+REDUCING_GAP = 2
+
+# ImageOps.exif_transpose 와 같은 순서
+_ORIENTATION_STEPS = {
+    2: (Image.Transpose.FLIP_LEFT_RIGHT,),
+    3: (Image.Transpose.ROTATE_180,),
+    4: (Image.Transpose.FLIP_TOP_BOTTOM,),
+    5: (Image.Transpose.TRANSPOSE,),
+    6: (Image.Transpose.ROTATE_270,),
+    7: (Image.Transpose.TRANSVERSE,),
+    8: (Image.Transpose.ROTATE_90,),
+}
+# 화면에서 고른 회전은 시계 방향이고 Pillow 의 ROTATE_* 는 반시계 방향이다.
+_ROTATION_STEPS = {
+    90: (Image.Transpose.ROTATE_270,),
+    180: (Image.Transpose.ROTATE_180,),
+    270: (Image.Transpose.ROTATE_90,),
+}
+_AXIS_SWAPPING = {
+    Image.Transpose.ROTATE_90,
+    Image.Transpose.ROTATE_270,
+    Image.Transpose.TRANSPOSE,
+    Image.Transpose.TRANSVERSE,
+}
+
+
+@lru_cache(maxsize=None)
+def combined_transpose(orientation, rotation_degrees):
+    """Return the one ``Image.Transpose`` equal to EXIF ``orientation`` followed by a clockwise
+    ``rotation_degrees`` (a multiple of 90), or ``None`` when the two cancel out.
+
+    Every combination of flips and quarter turns is itself a single flip or quarter turn, so
+    the answer is found by comparing against a small probe image.
+    """
+    probe = Image.frombytes('L', (3, 2), bytes(range(6)))
+    expected = probe
+    for step in _ORIENTATION_STEPS.get(orientation, ()) + _ROTATION_STEPS.get(rotation_degrees % 360, ()):
+        expected = expected.transpose(step)
+    if expected.tobytes() == probe.tobytes() and expected.size == probe.size:
+        return None
+    for candidate in Image.Transpose:
+        result = probe.transpose(candidate)
+        if result.size == expected.size and result.tobytes() == expected.tobytes():
+            return candidate
+    raise ValueError(f'지원하지 않는 방향 조합입니다: orientation={orientation}, rotation={rotation_degrees}')
+
+
+class PipelineStats:
+    """Timing and pixel-buffer size of every stage of one :func:`optimize_image` run."""
+
+    def __init__(self):
+        self.stages = []
+        self._started = time.perf_counter()
+
+    def record(self, stage, image=None):
+        now = time.perf_counter()
+        buffer_bytes = image.width * image.height * len(image.getbands()) if image is not None else 0
+        self.stages.append({
+            'stage': stage,
+            'ms': (now - self._started) * 1000,
+            'size': image.size if image is not None else None,
+            'buffer_bytes': buffer_bytes,
+        })
+        self._started = now
+
+    @property
+    def peak_buffer_bytes(self):
+        return max((stage['buffer_bytes'] for stage in self.stages), default=0)
+
+    @property
+    def total_ms(self):
+        return sum(stage['ms'] for stage in self.stages)
+
+    def summary(self):
+        parts = [
+            f"{stage['stage']} {stage['ms']:.0f}ms"
+            + (f" {stage['size'][0]}x{stage['size'][1]} {stage['buffer_bytes'] / 1048576:.1f}MB" if stage['size'] else '')
+            for stage in self.stages
+        ]
+        return f"{' / '.join(parts)} (총 {self.total_ms:.0f}ms, 최대 버퍼 {self.peak_buffer_bytes / 1048576:.1f}MB)"
+
+
+def _fit_size(size, box):
+    scale = min(box[0] / size[0], box[1] / size[1], 1)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def optimize_image(source, max_size=(1280, 1280), quality=80, rotation_degrees=0):
+    """Return ``(jpeg_bytes, stats)`` for ``source`` fitted inside ``max_size`` as displayed.
+
+    ``rotation_degrees`` is the clockwise rotation chosen in the upload form. Raises Pillow's
+    usual ``UnidentifiedImageError``/``OSError`` for unreadable files.
+    """
+    stats = PipelineStats()
+    rotation_degrees %= 360
+    quarter_turn = rotation_degrees if rotation_degrees % 90 == 0 else 0
+
+    image = Image.open(source)
+    orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    transpose = combined_transpose(orientation, quarter_turn)
+    stats.record('open')
+
+    # 저장된 픽셀 기준으로 목표 크기를 잡는다. 방향을 바꾸면 가로/세로가 뒤바뀌는 경우가 있다.
+    box = (max_size[1], max_size[0]) if transpose in _AXIS_SWAPPING else max_size
+    target = _fit_size(image.size, box)
+    if image.format == 'JPEG':
+        image.draft(None, (target[0] * REDUCING_GAP, target[1] * REDUCING_GAP))
+    image.load()
+    stats.record('decode', image)
+
+    factor = int(min(image.width / target[0], image.height / target[1]) / REDUCING_GAP)
+    if factor > 1:
+        image = image.reduce(factor)
+        stats.record('reduce', image)
+
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    if image.size != target:
+        image = image.resize(target, Image.Resampling.LANCZOS)
+        stats.record('resize', image)
+
+    if transpose is not None:
+        image = image.transpose(transpose)
+    if rotation_degrees != quarter_turn:
+        image = image.rotate(-rotation_degrees, expand=True)
+    if transpose is not None or rotation_degrees != quarter_turn:
+        stats.record('orient', image)
+
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    stats.record('encode', image)
+    return buffer.getvalue(), stats
@@ -0,0 +1,194 @@
+"""Lossless quarter-turn rotation of photos that are already stored.
+
+JPEG files are turned by rewriting the EXIF orientation tag in the APP1 segment, so the
+compressed scan data is copied byte for byte and nothing is decoded. Browsers, Pillow's
+``exif_transpose`` and the rendition/newspaper code all honour that tag. Formats without a
+usable orientation tag are transposed and saved again in their own format.
+"""
+from io import BytesIO
+import logging
+from pathlib import Path
+import re
+import uuid
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from PIL import Image, ImageOps
+
+from .background import submit_after_commit
+from .image_pipeline import EXIF_ORIENTATION_TAG, _ORIENTATION_STEPS, combined_transpose
+from .image_service import delete_renditions, is_rendition_source_referenced
+
+
+logger = logging.getLogger('posts.upload')
+
+_SOI = b'\xff\xd8'
+_APP0 = 0xE0
+_APP1 = 0xE1
+_SOS = 0xDA
+_EXIF_HEADER = b'Exif\x00\x00'
+_MAX_SEGMENT_LENGTH = 0xFFFF
+# 단일 Transpose -> 그 결과를 뜻하는 EXIF 방향 값
+_ORIENTATION_FOR_TRANSPOSE = {steps[0]: orientation for orientation, steps in _ORIENTATION_STEPS.items()}
+_ROTATED_SUFFIX = re.compile(r'_rot[0-9a-f]{8}$')
+_RESAVE_OPTIONS = {
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'TIFF': {'compression': 'tiff_lzw'},
+}
+
+
+def _normalize_quarter_turn(rotation_degrees):
+    try:
+        rotation_degrees = int(rotation_degrees) % 360
+    except (TypeError, ValueError):
+        return 0
+    return rotation_degrees if rotation_degrees % 90 == 0 else 0
+
+
+def _jpeg_header_segments(data):
+    """Yield ``(marker, start, end)`` for each marker segment before the first scan."""
+    if data[:2] != _SOI:
+        raise ValueError('JPEG 파일이 아닙니다.')
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            raise ValueError('JPEG 마커를 읽을 수 없습니다.')
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # 마커 앞의 채움 바이트
+            position += 1
+            continue
+        if marker == _SOS:
+            return
+        end = position + 2 + int.from_bytes(data[position + 2:position + 4], 'big')
+        yield marker, position, end
+        position = end
+    raise ValueError('JPEG 스캔 데이터를 찾지 못했습니다.')
+
+
+def rotated_orientation(orientation, rotation_degrees):
+    """Return the EXIF orientation that displays ``orientation`` turned clockwise by ``rotation_degrees``."""
+    transpose = combined_transpose(orientation, _normalize_quarter_turn(rotation_degrees))
+    return 1 if transpose is None else _ORIENTATION_FOR_TRANSPOSE[transpose]
+
+
+def set_jpeg_orientation(data, orientation):
+    """Return ``data`` with its EXIF orientation set to ``orientation``, leaving the scan untouched."""
+    exif_segment = None
+    insert_at = 2
+    for marker, start, end in _jpeg_header_segments(data):
+        if marker == _APP1 and data[start + 4:start + 10] == _EXIF_HEADER:
+            exif_segment = (start, end)
+            break
+        if marker == _APP0 and start == insert_at:
+            # JFIF APP0 는 SOI 바로 뒤에 있어야 한다.
+            insert_at = end
+
+    exif = Image.Exif()
+    if exif_segment:
+        exif.load(data[exif_segment[0] + 4:exif_segment[1]])
+    exif[EXIF_ORIENTATION_TAG] = orientation
+    payload = exif.tobytes()
+    if len(payload) + 2 > _MAX_SEGMENT_LENGTH:
+        raise ValueError('EXIF 블록이 너무 커서 다시 쓸 수 없습니다.')
+    segment = bytes((0xFF, _APP1)) + (len(payload) + 2).to_bytes(2, 'big') + payload
+
+    if exif_segment:
+        return data[:exif_segment[0]] + segment + data[exif_segment[1]:]
+    return data[:insert_at] + segment + data[insert_at:]
+
+
+def rotate_image_bytes(data, rotation_degrees):
+    """Return the bytes of ``data`` turned clockwise by ``rotation_degrees`` (a multiple of 90).
+
+    JPEG input only gets a new orientation tag. Other formats are transposed and saved in the
+    same format, which is lossless for PNG/TIFF/GIF.
+    """
+    rotation_degrees = _normalize_quarter_turn(rotation_degrees)
+    image = Image.open(BytesIO(data))
+    orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    if image.format == 'JPEG':
+        return set_jpeg_orientation(data, rotated_orientation(orientation, rotation_degrees))
+
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    transpose = combined_transpose(1, rotation_degrees)
+    if transpose is not None:
+        image = image.transpose(transpose)
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **_RESAVE_OPTIONS.get(image_format, {}))
+    return buffer.getvalue()
+
+
+def _rotated_file_name(name):
+    # 새 이름으로 저장해야 브라우저/프록시 캐시에 남은 예전 방향 사진이 보이지 않는다.
+    path = Path(name)
+    stem = _ROTATED_SUFFIX.sub('', path.stem)
+    return f'{stem}_rot{uuid.uuid4().hex[:8]}{path.suffix.lower()}'
+
+
+def rotate_stored_image(model_label, pk, field_name, rotation_degrees):
+    """Rotate the file in ``field_name`` of the ``model_label`` row ``pk`` and swap it in.
+
+    The rotated copy gets a new storage name; the old file and its renditions are removed once
+    nothing else points at them, and saving the field schedules renditions for the new name.
+    Returns ``True`` when the row was updated.
+    """
+    rotation_degrees = _normalize_quarter_turn(rotation_degrees)
+    if not rotation_degrees:
+        return False
+
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    field_file = getattr(instance, field_name, None)
+    if not field_file:
+        return False
+
+    old_name = field_file.name
+    with field_file.storage.open(old_name, 'rb') as source_file:
+        rotated = rotate_image_bytes(source_file.read(), rotation_degrees)
+
+    field_file.save(_rotated_file_name(old_name), ContentFile(rotated), save=False)
+    # 회전을 기다리는 동안 다른 수정으로 사진이 바뀌었으면 새 파일만 버린다.
+    updated = model.objects.filter(pk=pk, **{field_name: old_name}).update(**{field_name: field_file.name})
+    if not updated:
+        field_file.storage.delete(field_file.name)
+        return False
+    # 저장 신호가 새 이름의 파생 이미지 생성과 홈/신문 갱신을 예약한다.
+    instance.save(update_fields=[field_name])
+
+    # 대표 사진과 가족 사진첩 행이 같은 파일을 쓰므로 네 가지 사진 필드를 모두 확인한다.
+    if not is_rendition_source_referenced(old_name):
+        delete_renditions(old_name)
+        field_file.storage.delete(old_name)
+    return True
+
+
+def _rotate_in_background(model_label, pk, field_name, rotation_degrees):
+    close_old_connections()
+    try:
+        if rotate_stored_image(model_label, pk, field_name, rotation_degrees):
+            logger.info(f'[ROTATE] {model_label}#{pk}.{field_name}: {rotation_degrees}도 회전')
+    except Exception:
+        logger.exception(f'[ROTATE] 회전 실패: {model_label}#{pk}.{field_name}')
+    finally:
+        close_old_connections()
+
+
+def schedule_image_rotation(instance, field_name, rotation_degrees):
+    rotation_degrees = _normalize_quarter_turn(rotation_degrees)
+    if not rotation_degrees or not getattr(instance, field_name, None):
+        return
+    submit_after_commit(
+        'image-rotate',
+        _rotate_in_background,
+        instance._meta.label,
+        instance.pk,
+        field_name,
+        rotation_degrees,
+        # 같은 사진을 연달아 돌려도 순서대로 쌓이도록 한 줄로 처리한다.
+        max_workers=1,
+    )
@@ -0,0 +1,178 @@
+from io import BytesIO
+import logging
+from pathlib import Path
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .background import submit_after_commit
+from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostImage, ImageRendition
+
+
+logger = logging.getLogger('posts.upload')
+
+RENDITION_WIDTHS = (240, 480, 960, 1280)
+RENDITION_QUALITY = {'jpeg': 80, 'webp': 78, 'avif': 60}
+RENDITION_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# <picture> 안에서 먼저 나온 형식이 우선 선택된다.
+RENDITION_FORMAT_ORDER = ('avif', 'webp', 'jpeg')
+# 파생 이미지를 만드는 사진 필드. 대표 사진 승격처럼 같은 파일 이름을 여러 행이 함께 쓸 수 있다.
+RENDITION_SOURCE_FIELDS = {
+    FamilyPost: 'main_image',
+    FamilyPostImage: 'image',
+    FamilyMemberPhoto: 'image',
+    FamilyMemberProfile: 'photo',
+}
+
+
+def rendition_formats():
+    configured = getattr(settings, 'IMAGE_RENDITION_FORMATS', ('webp', 'jpeg'))
+    formats = []
+    for image_format in RENDITION_FORMAT_ORDER:
+        if image_format not in configured:
+            continue
+        if image_format == 'avif' and not features.check('avif'):
+            continue
+        formats.append(image_format)
+    if 'jpeg' not in formats:
+        formats.append('jpeg')
+    return formats
+
+
+def _target_widths(source_width):
+    widths = [width for width in RENDITION_WIDTHS if width < source_width]
+    widths.append(min(source_width, RENDITION_WIDTHS[-1]))
+    return sorted(set(widths), reverse=True)
+
+
+def _oriented_width(image):
+    orientation = image.getexif().get(0x0112)
+    return image.height if orientation in (5, 6, 7, 8) else image.width
+
+
+def delete_renditions(source_name):
+    """Delete every rendition row and file made from ``source_name``. Returns the number deleted."""
+    deleted = 0
+    for rendition in ImageRendition.objects.filter(source_name=source_name):
+        rendition.file.delete(save=False)
+        rendition.delete()
+        deleted += 1
+    return deleted
+
+
+def is_rendition_source_referenced(source_name):
+    return any(
+        model.objects.filter(**{field_name: source_name}).exists()
+        for model, field_name in RENDITION_SOURCE_FIELDS.items()
+    )
+
+
+def discard_renditions_after_commit(source_name):
+    """Delete the renditions of ``source_name`` after commit unless a row still points at it."""
+    if not source_name:
+        return
+
+    def discard():
+        if not is_rendition_source_referenced(source_name):
+            delete_renditions(source_name)
+
+    transaction.on_commit(discard)
+
+
+def generate_renditions(source_name, force=False):
+    """Create the width/format renditions missing for ``source_name``. Returns the number created."""
+    if not source_name:
+        return 0
+
+    if force:
+        delete_renditions(source_name)
+    existing = set(ImageRendition.objects.filter(source_name=source_name).values_list('format', 'width'))
+
+    start = time.monotonic()
+    formats = rendition_formats()
+    try:
+        with default_storage.open(source_name, 'rb') as source_file:
+            image = Image.open(source_file)
+            widths = _target_widths(_oriented_width(image))
+            if all((image_format, width) in existing for width in widths for image_format in formats):
+                return 0
+
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError, ValueError):
+        logger.warning(f'[RENDITION] 원본을 열 수 없음: {source_name}')
+        return 0
+
+    created = 0
+    stem = Path(source_name).stem
+    current = image
+    for width in widths:
+        if all((image_format, width) in existing for image_format in formats):
+            continue
+        # 큰 너비부터 차례로 줄여서 매번 원본 전체를 다시 리샘플링하지 않는다.
+        if current.width != width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.Resampling.LANCZOS)
+
+        for image_format in formats:
+            if (image_format, width) in existing:
+                continue
+            buffer = BytesIO()
+            current.save(buffer, format=image_format.upper(), quality=RENDITION_QUALITY[image_format], optimize=True)
+            extension = 'jpg' if image_format == 'jpeg' else image_format
+            try:
+                ImageRendition.objects.create(
+                    source_name=source_name,
+                    width=width,
+                    format=image_format,
+                    file=ContentFile(buffer.getvalue(), name=f'{stem}_{width}.{extension}'),
+                )
+                created += 1
+            except IntegrityError:
+                pass
+
+    if created:
+        duration_ms = int((time.monotonic() - start) * 1000)
+        logger.info(f'[RENDITION] {source_name}: {created}개 생성, {duration_ms}ms')
+    return created
+
+
+def _generate_renditions_in_background(source_name):
+    close_old_connections()
+    try:
+        generate_renditions(source_name)
+    except Exception:
+        logger.exception(f'[RENDITION] 생성 실패: {source_name}')
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(field_file):
+    if not field_file or not getattr(field_file, 'name', ''):
+        return
+    submit_after_commit(
+        'image-rendition',
+        _generate_renditions_in_background,
+        field_file.name,
+        max_workers=getattr(settings, 'IMAGE_RENDITION_THREADS', 1),
+    )
+
+
+def load_renditions(source_names):
+    """Return ``{source_name: {format: [(width, url), ...]}}`` for all names in one query."""
+    names = {name for name in source_names if name}
+    renditions = {}
+    if not names:
+        return renditions
+
+    for rendition in ImageRendition.objects.filter(source_name__in=names).order_by('width'):
+        renditions.setdefault(rendition.source_name, {}).setdefault(rendition.format, []).append(
+            (rendition.width, rendition.file.url)
+        )
+    return renditions
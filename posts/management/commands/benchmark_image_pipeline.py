@@ -0,0 +1,112 @@
+from io import BytesIO
+import multiprocessing
+from pathlib import Path
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageOps
+
+from posts.image_pipeline import optimize_image
+
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp', '.heic', '.tif', '.tiff'}
+
+
+def legacy_optimize_image(path, max_size, quality, rotation_degrees):
+    """The upload path before draft decoding: full decode, transpose, rotate, then thumbnail."""
+    image = Image.open(path)
+    image = ImageOps.exif_transpose(image)
+    if rotation_degrees:
+        image = image.rotate(-rotation_degrees, expand=True)
+    image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _current_optimize_image(path, max_size, quality, rotation_degrees):
+    image_bytes, _ = optimize_image(path, max_size=max_size, quality=quality, rotation_degrees=rotation_degrees)
+    return image_bytes
+
+
+PIPELINES = {
+    'legacy': legacy_optimize_image,
+    'draft': _current_optimize_image,
+}
+
+
+def _measure(pipeline, path, max_size, quality, rotation_degrees, repeat):
+    # 새 프로세스에서 실행해 최대 RSS 증가분이 다른 파일/방식의 영향을 받지 않게 한다.
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    output_bytes = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output_bytes = len(PIPELINES[pipeline](path, max_size, quality, rotation_degrees))
+        timings.append((time.perf_counter() - started) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'ms': min(timings), 'peak_mb': max(peak_kb - baseline_kb, 0) / 1024, 'output_bytes': output_bytes}
+
+
+class Command(BaseCommand):
+    help = '큰 사진 묶음으로 업로드 이미지 최적화의 기존 방식(전체 디코드)과 draft/reduce 방식을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='사진 파일 또는 사진이 든 폴더')
+        parser.add_argument('--repeat', type=int, default=3, help='파일마다 반복 횟수 (가장 빠른 값을 씁니다)')
+        parser.add_argument('--max-size', type=int, default=1280, help='긴 변 최대 크기(px)')
+        parser.add_argument('--quality', type=int, default=80)
+        parser.add_argument('--rotate', type=int, default=0, help='사용자 회전(시계 방향, 도)')
+        parser.add_argument('--stages', action='store_true', help='draft 방식의 단계별 시간/버퍼 크기도 출력합니다.')
+
+    def _corpus(self, paths):
+        files = []
+        for raw_path in paths:
+            path = Path(raw_path)
+            if path.is_dir():
+                files.extend(sorted(child for child in path.rglob('*') if child.suffix.lower() in IMAGE_SUFFIXES))
+            elif path.is_file():
+                files.append(path)
+        if not files:
+            raise CommandError('비교할 사진을 찾지 못했습니다.')
+        return files
+
+    def handle(self, *args, **options):
+        files = self._corpus(options['paths'])
+        max_size = (options['max_size'], options['max_size'])
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+
+        totals = {pipeline: {'ms': 0.0, 'peak_mb': 0.0} for pipeline in PIPELINES}
+        for path in files:
+            with Image.open(path) as probe:
+                megapixels = probe.width * probe.height / 1_000_000
+            row = {}
+            for pipeline in PIPELINES:
+                with context.Pool(1) as pool:
+                    row[pipeline] = pool.apply(
+                        _measure,
+                        (pipeline, str(path), max_size, options['quality'], options['rotate'], options['repeat']),
+                    )
+                totals[pipeline]['ms'] += row[pipeline]['ms']
+                totals[pipeline]['peak_mb'] = max(totals[pipeline]['peak_mb'], row[pipeline]['peak_mb'])
+
+            self.stdout.write(
+                f"{path.name} ({megapixels:.1f}MP): "
+                + ' | '.join(
+                    f"{pipeline} {result['ms']:.0f}ms 최대 +{result['peak_mb']:.0f}MB {result['output_bytes'] // 1024}KB"
+                    for pipeline, result in row.items()
+                )
+            )
+            if options['stages']:
+                _, stats = optimize_image(str(path), max_size=max_size, quality=options['quality'], rotation_degrees=options['rotate'])
+                self.stdout.write(f'    {stats.summary()}')
+
+        legacy, draft = totals['legacy'], totals['draft']
+        self.stdout.write(self.style.SUCCESS(
+            f"사진 {len(files)}장: legacy {legacy['ms']:.0f}ms / 최대 +{legacy['peak_mb']:.0f}MB, "
+            f"draft {draft['ms']:.0f}ms / 최대 +{draft['peak_mb']:.0f}MB "
+            f"(시간 {legacy['ms'] / max(draft['ms'], 1):.1f}배 빠름)"
+        ))
@@ -0,0 +1,179 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts.comment_service import load_comment_page
+from posts.front_page import _build_front_page
+from posts.gallery_service import load_gallery_page
+from posts.models import FamilyPost, FamilyPostComment, FamilyPostImage, PostSearchDocument, PostSearchToken, RelatedPost, Tag
+from posts.newspaper_service import get_year_quarter, quarter_posts_queryset
+from posts.search_service import search_posts, tokenize
+
+
+SEED_BATCH_SIZE = 500
+# EXPLAIN 결과에서 전체 테이블 스캔을 뜻하는 접근 방식
+FULL_SCAN_TYPES = {'ALL'}
+
+
+class Command(BaseCommand):
+    help = (
+        '홈/갤러리/검색/상세/분기 신문 화면의 주요 쿼리를 시드 데이터 위에서 MariaDB EXPLAIN 으로 확인하고, '
+        '전체 테이블 스캔이 있으면 실패합니다. 시드 데이터는 트랜잭션을 되돌려 남기지 않습니다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000, help='시드로 넣을 기사 수')
+        parser.add_argument('--comments', type=int, default=1000, help='상세 화면 기사에 넣을 댓글 수')
+        parser.add_argument(
+            '--ignore-table',
+            action='append',
+            default=[],
+            help='전체 스캔이어도 괜찮은 작은 테이블 (여러 번 지정 가능)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError('EXPLAIN 점검은 MariaDB/MySQL 에서만 실행할 수 있습니다.')
+
+        ignored_tables = set(options['ignore_table'])
+        with transaction.atomic():
+            seed = self._seed(options['posts'], options['comments'])
+            results = [
+                (label, self._explain(run), ignored_tables | set(exempt_tables))
+                for label, run, exempt_tables in self._hot_queries(seed)
+            ]
+            transaction.set_rollback(True)
+
+        failures = []
+        for label, plans, exempt_tables in results:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'[{label}]'))
+            for sql, rows in plans:
+                self.stdout.write(f'  {sql[:160]}')
+                for row in rows:
+                    full_scan = row['type'] in FULL_SCAN_TYPES and not self._is_exempt(row['table'], exempt_tables)
+                    line = f"    {row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row['Extra'] or ''}"
+                    if full_scan:
+                        failures.append(f"{label}: {row['table']}")
+                        self.stdout.write(self.style.ERROR(line))
+                    else:
+                        self.stdout.write(line)
+
+        if failures:
+            raise CommandError('전체 테이블 스캔이 있는 쿼리가 있습니다: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('모든 주요 쿼리가 인덱스를 사용합니다.'))
+
+    def _is_exempt(self, table, ignored_tables):
+        # <union1,2>, <derived2>, <subquery3> 같은 임시 결과는 이미 걸러진 행만 담는다.
+        return not table or table.startswith('<') or table in ignored_tables
+
+    def _explain(self, run):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN {sql}')
+                columns = [column[0] for column in cursor.description]
+                plans.append((sql, [dict(zip(columns, row)) for row in cursor.fetchall()]))
+        return plans
+
+    def _hot_queries(self, seed):
+        post = seed['detail_post']
+        first_comments = load_comment_page(post)
+        year, quarter = get_year_quarter(post.created_at)
+
+        def detail():
+            detail_post = (
+                FamilyPost.objects.select_related('author__family_profile')
+                .prefetch_related('tags', 'images', 'videos')
+                .get(pk=post.pk)
+            )
+            list(RelatedPost.objects.filter(post=detail_post).select_related('related__author__family_profile')[:8])
+            load_comment_page(detail_post)
+
+        def search(sort):
+            return lambda: list(
+                search_posts('가족 나들이', sort=sort).select_related('author__family_profile').prefetch_related('tags')[:10]
+            )
+
+        return [
+            ('home', _build_front_page, ()),
+            ('hero', lambda: FamilyPost.objects.filter(is_hero=True).exists(), ()),
+            ('gallery', lambda: load_gallery_page(before=load_gallery_page()['next_cursor']), ()),
+            ('search', search('latest'), ()),
+            # BM25 의 평균 문서 길이는 색인 문서 전체를 집계하므로 그 테이블은 전체 스캔이 정상이다.
+            ('search relevance', search('relevance'), ('posts_postsearchdocument',)),
+            ('detail', detail, ()),
+            ('detail comments', lambda: load_comment_page(post, before=first_comments['next_cursor']), ()),
+            ('newspaper quarter', lambda: list(quarter_posts_queryset(year, quarter)), ()),
+        ]
+
+    def _seed(self, post_count, comment_count):
+        author, _ = User.objects.get_or_create(username='explain-hot-queries', defaults={'is_active': False})
+        common_tag, _ = Tag.objects.get_or_create(name='가족')
+        tags = [common_tag] + [Tag.objects.get_or_create(name=f'점검{index}')[0] for index in range(50)]
+
+        FamilyPost.objects.bulk_create(
+            FamilyPost(
+                title=f'가족 나들이 {index}' if index % 10 == 0 else f'일상 기록 {index}',
+                content='점검용 본문',
+                main_image=f'family_photos/explain/{index}.jpg',
+                author=author,
+            )
+            for index in range(post_count)
+        )
+        posts = list(FamilyPost.objects.filter(author=author).order_by('pk'))
+        # auto_now_add 가 작성일을 덮어쓰므로 시간 순서를 만들려면 따로 고친다.
+        now = timezone.now()
+        for offset in range(0, len(posts), SEED_BATCH_SIZE):
+            batch = posts[offset:offset + SEED_BATCH_SIZE]
+            FamilyPost.objects.filter(pk__in=[post.pk for post in batch]).update(
+                created_at=Case(
+                    *[When(pk=post.pk, then=Value(now - timedelta(hours=6 * (len(posts) - index)))) for index, post in enumerate(batch, offset)],
+                    output_field=DateTimeField(),
+                )
+            )
+
+        through = FamilyPost.tags.through
+        through.objects.bulk_create(
+            [through(familypost_id=post.pk, tag_id=common_tag.pk) for post in posts]
+            + [through(familypost_id=post.pk, tag_id=tags[1 + index % 50].pk) for index, post in enumerate(posts)],
+            batch_size=SEED_BATCH_SIZE,
+        )
+        FamilyPostImage.objects.bulk_create(
+            (FamilyPostImage(post=post, image=f'family_posts/explain/{post.pk}.jpg') for post in posts),
+            batch_size=SEED_BATCH_SIZE,
+        )
+
+        tokens = []
+        documents = []
+        for post in posts:
+            title_tokens = tokenize(post.title)
+            tokens.extend(
+                PostSearchToken(post=post, token=token, field=PostSearchToken.FIELD_TITLE, frequency=frequency)
+                for token, frequency in Counter(title_tokens).items()
+            )
+            tokens.append(PostSearchToken(post=post, token='가족', field=PostSearchToken.FIELD_TAG, frequency=1))
+            documents.append(PostSearchDocument(post=post, title_length=len(title_tokens), tag_length=1, content_length=0))
+        PostSearchToken.objects.bulk_create(tokens, batch_size=SEED_BATCH_SIZE)
+        PostSearchDocument.objects.bulk_create(documents, batch_size=SEED_BATCH_SIZE)
+
+        detail_post = posts[len(posts) // 2]
+        FamilyPostComment.objects.bulk_create(
+            (FamilyPostComment(post=detail_post, author=author, content=f'점검 댓글 {index}') for index in range(comment_count)),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        RelatedPost.objects.bulk_create(
+            RelatedPost(post=detail_post, related=related, rank=rank, score=1.0)
+            for rank, related in enumerate(post for post in posts[:13] if post.pk != detail_post.pk)
+        )
+        return {'detail_post': FamilyPost.objects.get(pk=detail_post.pk)}
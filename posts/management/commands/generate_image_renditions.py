@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.image_service import generate_renditions
+from posts.models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostImage
+
+
+RENDITION_SOURCES = (
+    (FamilyPost, 'main_image'),
+    (FamilyPostImage, 'image'),
+    (FamilyMemberPhoto, 'image'),
+    (FamilyMemberProfile, 'photo'),
+)
+
+
+class Command(BaseCommand):
+    help = '기존 업로드 이미지의 크기별 파생본(JPEG/WebP 등)을 생성합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='이미 있는 파생본도 지우고 다시 생성합니다.')
+
+    def handle(self, *args, **options):
+        source_names = set()
+        for model, field_name in RENDITION_SOURCES:
+            source_names.update(
+                model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .values_list(field_name, flat=True)
+            )
+
+        created = 0
+        for source_name in sorted(source_names):
+            created += generate_renditions(source_name, force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'원본 {len(source_names)}개에서 파생본 {created}개 생성 완료'))
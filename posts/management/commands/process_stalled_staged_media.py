@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts.models import StagedMedia
+from posts.staging_service import claim_stalled_staged_media, process_staged_media, staged_processing_timeout
+
+
+class Command(BaseCommand):
+    help = '처리 중 상태로 남은 업로드 대기 파일(워커 재시작 등으로 중단된 작업)을 다시 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=None, help='이 시간(분) 동안 변화가 없는 항목만 처리합니다. (기본: STAGED_PROCESSING_TIMEOUT_MINUTES)')
+
+    def handle(self, *args, **options):
+        min_age = timedelta(minutes=options['min_age']) if options['min_age'] is not None else staged_processing_timeout()
+        stalled = [
+            staged
+            for staged in StagedMedia.objects.filter(status=StagedMedia.STATUS_PROCESSING).order_by('created_at')
+            if claim_stalled_staged_media(staged, min_age)
+        ]
+
+        processed = sum(1 for staged in stalled if process_staged_media(staged.pk))
+        self.stdout.write(self.style.SUCCESS(f'업로드 대기 파일 {len(stalled)}건 중 {processed}건 처리 완료'))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts.staging_service import purge_stale_staged_media
+from posts.upload_service import purge_stale_upload_sessions
+
+
+class Command(BaseCommand):
+    help = '오랫동안 이어지지 않은 분할 업로드, 남은 임시 조각 파일, 기사에 붙지 않은 업로드 대기 파일을 정리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='이 시간 동안 변화가 없으면 정리 (기본: UPLOAD_SESSION_MAX_AGE_HOURS)')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options['hours']) if options['hours'] is not None else None
+        purged_sessions = purge_stale_upload_sessions(max_age)
+        purged_staged = purge_stale_staged_media(max_age)
+        self.stdout.write(self.style.SUCCESS(f'분할 업로드 {purged_sessions}건, 업로드 대기 파일 {purged_staged}건을 정리했습니다.'))
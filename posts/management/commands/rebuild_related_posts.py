@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import FamilyPost
+from posts.related_service import refresh_related_posts
+
+
+class Command(BaseCommand):
+    help = '기사별 연관 기사 목록(공유 태그 IDF 가중치 + 작성 시점 감쇠)을 계산합니다. 기본값은 목록이 없는 태그 기사만 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='모든 기사의 연관 기사 목록을 다시 계산합니다.')
+
+    def handle(self, *args, **options):
+        posts = FamilyPost.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.filter(tags__isnull=False, related_links__isnull=True).distinct()
+
+        refreshed = 0
+        for post_id in posts.values_list('pk', flat=True).iterator(chunk_size=500):
+            refresh_related_posts(post_id)
+            refreshed += 1
+        self.stdout.write(self.style.SUCCESS(f'기사 {refreshed}건의 연관 기사 갱신 완료'))
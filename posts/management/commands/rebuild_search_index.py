@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import FamilyPost
+from posts.search_service import index_post
+
+
+class Command(BaseCommand):
+    help = '기사 검색 색인(제목/태그/본문 n-gram)을 만듭니다. 기본값은 색인이 없는 기사만 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='모든 기사를 다시 색인합니다.')
+
+    def handle(self, *args, **options):
+        posts = FamilyPost.objects.prefetch_related('tags').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(search_document__isnull=True)
+
+        indexed = 0
+        for post in posts.iterator(chunk_size=200):
+            index_post(post)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'기사 {indexed}건 색인 완료'))
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import FamilyPost, PostSearchToken
+from posts.search_memory import InProcessSearchIndex, snapshot_path, write_snapshot
+from posts.search_service import query_tokens
+
+
+class Command(BaseCommand):
+    help = '프로세스 내 검색 색인 스냅샷을 다시 만들고, 필요하면 ORM 검색과 속도를 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--benchmark', action='append', default=[], metavar='QUERY', help='비교할 검색어 (여러 번 지정 가능)')
+        parser.add_argument('--repeat', type=int, default=50, help='검색어마다 반복할 횟수')
+        parser.add_argument('--content', action='store_true', help='본문까지 검색하는 범위로 비교합니다.')
+        parser.add_argument('--skip-rebuild', action='store_true', help='기존 스냅샷으로 비교만 합니다.')
+
+    def handle(self, *args, **options):
+        if not options['skip_rebuild']:
+            start = time.perf_counter()
+            term_count, posting_count = write_snapshot()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f'스냅샷 생성 완료: {snapshot_path()} (키 {term_count}개, 포스팅 {posting_count}개, {elapsed_ms:.0f}ms)'
+            ))
+
+        if not options['benchmark']:
+            return
+
+        index = InProcessSearchIndex()
+        fields = [PostSearchToken.FIELD_TAG, PostSearchToken.FIELD_TITLE]
+        if options['content']:
+            fields.append(PostSearchToken.FIELD_CONTENT)
+        repeat = max(1, options['repeat'])
+
+        for query in options['benchmark']:
+            tokens = query_tokens(query)
+            if not tokens:
+                self.stdout.write(f'"{query}": 색인할 수 있는 토큰이 없어 건너뜁니다.')
+                continue
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                memory_ids = index.match(tokens, include_content=options['content'])
+            memory_ms = (time.perf_counter() - start) * 1000 / repeat
+
+            orm_qs = (
+                FamilyPost.objects.filter(search_tokens__token__in=tokens, search_tokens__field__in=fields)
+                .values('pk')
+                .annotate(matched=Count('search_tokens__token', distinct=True))
+                .filter(matched=len(tokens))
+                .order_by('-pk')
+                .values_list('pk', flat=True)
+            )
+            start = time.perf_counter()
+            for _ in range(repeat):
+                orm_ids = list(orm_qs.all())
+            orm_ms = (time.perf_counter() - start) * 1000 / repeat
+
+            status = '일치' if memory_ids == orm_ids else '불일치'
+            self.stdout.write(
+                f'"{query}": 결과 {len(orm_ids)}건 ({status}) · ORM {orm_ms:.2f}ms · 메모리 색인 {memory_ms:.3f}ms'
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.counter_service import recount_post_counters
+
+
+class Command(BaseCommand):
+    help = '기사별 댓글/추가 사진/동영상 수 카운터를 실제 행 수로 다시 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int, help='다시 계산할 기사 id (생략하면 전체)')
+
+    def handle(self, *args, **options):
+        updated = recount_post_counters(options['post_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'기사 {updated}건의 카운터를 다시 계산했습니다.'))
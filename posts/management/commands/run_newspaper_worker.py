@@ -0,0 +1,40 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.newspaper_jobs import recover_interrupted_jobs, run_due_jobs
+
+
+class Command(BaseCommand):
+    help = '분기 신문 재생성 작업 큐를 처리하는 워커입니다. gunicorn과 별도 컨테이너로 실행합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='실행 가능한 작업을 한 번만 처리하고 종료합니다.')
+        parser.add_argument('--interval', type=float, default=5.0, help='작업이 없을 때 대기할 초 (기본 5초)')
+        parser.add_argument('--batch', type=int, default=10, help='한 번에 처리할 최대 작업 수')
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        recovered = recover_interrupted_jobs()
+        if recovered:
+            self.stdout.write(f'중단된 작업 {recovered}건을 다시 대기열에 넣었습니다.')
+
+        while not self._stopping:
+            close_old_connections()
+            processed = run_due_jobs(limit=options['batch'])
+            if processed:
+                self.stdout.write(f'분기 신문 작업 {processed}건 처리')
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+        close_old_connections()
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.newspaper_service import REPORTLAB_READY, generate_quarterly_newspaper, sync_all_quarterly_newspapers
+
+
+class Command(BaseCommand):
+    help = '분기 신문 PDF를 동기화합니다. 내용이 바뀐 분기만 다시 생성하며 --force로 전체 재생성할 수 있습니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='지문이 같아도 PDF를 다시 생성합니다.')
+        parser.add_argument('--year', type=int, help='특정 연도만 처리합니다. --quarter와 함께 사용합니다.')
+        parser.add_argument('--quarter', type=int, choices=[1, 2, 3, 4], help='특정 분기만 처리합니다.')
+
+    def handle(self, *args, **options):
+        if not REPORTLAB_READY:
+            raise CommandError('reportlab이 설치되어 있지 않아 신문을 생성할 수 없습니다.')
+
+        force = options['force']
+        year = options.get('year')
+        quarter = options.get('quarter')
+        if (year is None) != (quarter is None):
+            raise CommandError('--year와 --quarter는 함께 지정해야 합니다.')
+
+        if year is not None:
+            issue = generate_quarterly_newspaper(year, quarter, force=force)
+            if issue:
+                self.stdout.write(self.style.SUCCESS(f'{issue} 동기화 완료'))
+            else:
+                self.stdout.write(f'{year}년 {quarter}분기에는 기사가 없어 신문이 없습니다.')
+            return
+
+        issues = sync_all_quarterly_newspapers(force=force)
+        self.stdout.write(self.style.SUCCESS(f'분기 신문 {len(issues)}건 동기화 완료'))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import FamilyPostVideo
+from posts.video_service import process_video_transcode
+
+
+class Command(BaseCommand):
+    help = '변환 중 상태로 남은 동영상(워커 재시작 등으로 중단된 작업)을 다시 변환합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=30, help='업로드 후 이 시간(분)이 지난 항목만 처리합니다.')
+        parser.add_argument('--retry-failed', action='store_true', help='변환 실패 항목도 다시 시도합니다.')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            FamilyPostVideo.objects.filter(status=FamilyPostVideo.STATUS_FAILED).update(status=FamilyPostVideo.STATUS_PROCESSING)
+
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+        video_ids = list(
+            FamilyPostVideo.objects.filter(status=FamilyPostVideo.STATUS_PROCESSING, created_at__lte=cutoff)
+            .order_by('created_at')
+            .values_list('pk', flat=True)
+        )
+
+        converted = sum(1 for video_id in video_ids if process_video_transcode(video_id))
+        self.stdout.write(self.style.SUCCESS(f'동영상 {len(video_ids)}건 중 {converted}건 처리 완료'))
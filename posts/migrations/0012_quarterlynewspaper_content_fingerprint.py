@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_quarterlynewspaper'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quarterlynewspaper',
+            name='content_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='콘텐츠 지문'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_quarterlynewspaper_content_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewspaperRegenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='연도')),
+                ('quarter', models.PositiveSmallIntegerField(verbose_name='분기')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('running', '실행 중'), ('done', '완료'), ('failed', '실패')], default='pending', max_length=10, verbose_name='상태')),
+                ('run_after', models.DateTimeField(verbose_name='실행 예정 시각')),
+                ('pending_since', models.DateTimeField(verbose_name='최초 요청 시각')),
+                ('requested_at', models.DateTimeField(verbose_name='마지막 요청 시각')),
+                ('request_count', models.PositiveIntegerField(default=0, verbose_name='누적 요청 수')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='연속 실패 횟수')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='시작 시각')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='종료 시각')),
+                ('last_duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='소요 시간(ms)')),
+                ('last_error', models.TextField(blank=True, verbose_name='마지막 오류')),
+            ],
+            options={
+                'verbose_name': '분기 신문 생성 작업',
+                'verbose_name_plural': '분기 신문 생성 작업',
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='posts_newsjob_status_run_idx')],
+                'unique_together': {('year', 'quarter')},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_newspaperregenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familypostvideo',
+            name='status',
+            field=models.CharField(choices=[('processing', '변환 중'), ('ready', '완료'), ('failed', '변환 실패')], default='ready', max_length=12, verbose_name='처리 상태'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_familypostvideo_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=255, verbose_name='원본 파일')),
+                ('width', models.PositiveSmallIntegerField(verbose_name='너비')),
+                ('format', models.CharField(max_length=8, verbose_name='형식')),
+                ('file', models.ImageField(upload_to='renditions/%Y/%m/%d/', verbose_name='파생 이미지')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+            ],
+            options={
+                'verbose_name': '파생 이미지',
+                'verbose_name_plural': '파생 이미지',
+                'ordering': ['source_name', 'format', 'width'],
+                'unique_together': {('source_name', 'format', 'width')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_imagerendition'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familypost',
+            index=models.Index(fields=['created_at', 'id'], name='posts_post_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familypostimage',
+            index=models.Index(fields=['created_at', 'id'], name='posts_postimage_created_id_idx'),
+        ),
+    ]
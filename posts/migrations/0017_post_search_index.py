@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_gallery_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='posts.familypost', verbose_name='기사')),
+                ('title_length', models.PositiveIntegerField(default=0, verbose_name='제목 토큰 수')),
+                ('tag_length', models.PositiveIntegerField(default=0, verbose_name='태그 토큰 수')),
+                ('content_length', models.PositiveIntegerField(default=0, verbose_name='본문 토큰 수')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='색인 시각')),
+            ],
+            options={
+                'verbose_name': '검색 색인 문서',
+                'verbose_name_plural': '검색 색인 문서',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, verbose_name='토큰')),
+                ('field', models.CharField(choices=[('title', '제목'), ('tag', '태그'), ('content', '본문')], max_length=8, verbose_name='필드')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='출현 횟수')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='posts.familypost', verbose_name='기사')),
+            ],
+            options={
+                'verbose_name': '검색 토큰',
+                'verbose_name_plural': '검색 토큰',
+                'unique_together': {('token', 'field', 'post')},
+            },
+        ),
+    ]
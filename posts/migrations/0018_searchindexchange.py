@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.BigIntegerField(verbose_name='기사 ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='변경 시각')),
+            ],
+            options={
+                'verbose_name': '검색 색인 변경 기록',
+                'verbose_name_plural': '검색 색인 변경 기록',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_post_counts(apps, schema_editor):
+    Tag = apps.get_model('posts', 'Tag')
+    for tag in Tag.objects.annotate(total=Count('posts')).iterator():
+        if tag.total:
+            Tag.objects.filter(pk=tag.pk).update(post_count=tag.total)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_searchindexchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='기사 수'),
+        ),
+        migrations.RunPython(fill_post_counts, noop_reverse),
+    ]
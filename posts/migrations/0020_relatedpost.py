@@ -0,0 +1,28 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='순위')),
+                ('score', models.FloatField(verbose_name='점수')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='posts.familypost', verbose_name='기사')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.familypost', verbose_name='연관 기사')),
+            ],
+            options={
+                'verbose_name': '연관 기사',
+                'verbose_name_plural': '연관 기사',
+                'ordering': ['post', 'rank'],
+                'unique_together': {('post', 'rank')},
+            },
+        ),
+    ]
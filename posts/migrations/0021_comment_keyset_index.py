@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familypostcomment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='posts_comment_post_created_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_post_counters(apps, schema_editor):
+    FamilyPost = apps.get_model('posts', 'FamilyPost')
+    posts = FamilyPost.objects.annotate(
+        comments_total=Count('comments', distinct=True),
+        images_total=Count('images', distinct=True),
+        videos_total=Count('videos', distinct=True),
+    )
+    for post in posts.iterator():
+        if post.comments_total or post.images_total or post.videos_total:
+            FamilyPost.objects.filter(pk=post.pk).update(
+                comment_count=post.comments_total,
+                image_count=post.images_total,
+                video_count=post.videos_total,
+            )
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familypost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='댓글 수'),
+        ),
+        migrations.AddField(
+            model_name='familypost',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='추가 사진 수'),
+        ),
+        migrations.AddField(
+            model_name='familypost',
+            name='video_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='동영상 수'),
+        ),
+        migrations.RunPython(fill_post_counters, noop_reverse),
+    ]
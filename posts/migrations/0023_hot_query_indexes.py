@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familypost',
+            index=models.Index(fields=['is_hero', 'created_at'], name='posts_post_hero_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familypostimage',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='posts_postimage_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familypostvideo',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='posts_postvideo_post_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255, verbose_name='파일 이름')),
+                ('content_type', models.CharField(max_length=100, verbose_name='파일 형식')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='전체 크기')),
+                ('received_bytes', models.PositiveBigIntegerField(default=0, verbose_name='받은 크기')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='전체 SHA-256')),
+                ('status', models.CharField(choices=[('uploading', '업로드 중'), ('complete', '업로드 완료')], default='uploading', max_length=10, verbose_name='상태')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='마지막 수신')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='업로드한 사람')),
+            ],
+            options={
+                'verbose_name': '분할 업로드',
+                'verbose_name_plural': '분할 업로드',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['updated_at'], name='posts_upload_updated_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_upload_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedMedia',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('image', '사진'), ('video', '동영상')], max_length=5, verbose_name='종류')),
+                ('original_name', models.CharField(max_length=255, verbose_name='원본 파일 이름')),
+                ('status', models.CharField(choices=[('processing', '처리 중'), ('ready', '완료'), ('failed', '처리 실패')], default='processing', max_length=12, verbose_name='처리 상태')),
+                ('file_name', models.CharField(max_length=255, verbose_name='처리된 파일')),
+                ('poster_name', models.CharField(blank=True, max_length=255, verbose_name='동영상 대표 이미지')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='오류 내용')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='수정일')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staged_media', to=settings.AUTH_USER_MODEL, verbose_name='올린 사람')),
+            ],
+            options={
+                'verbose_name': '업로드 대기 파일',
+                'verbose_name_plural': '업로드 대기 파일',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['updated_at'], name='posts_staged_updated_idx')],
+            },
+        ),
+    ]
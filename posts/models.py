@@ -1,4 +1,6 @@
 # posts/models.py
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -9,6 +11,7 @@ def quarterly_pdf_upload_to(instance, filename):
 
 class Tag(models.Model):
     name = models.CharField(max_length=30, unique=True, verbose_name='태그명')
+    post_count = models.PositiveIntegerField(default=0, verbose_name='기사 수')
 
     class Meta:
         ordering = ['name']
@@ -61,8 +64,19 @@ class FamilyPost(models.Model):
     # 매거진 스타일을 위한 '중요 포스트(히어로 이미지용)' 체크 박스
     is_hero = models.BooleanField(default=False, verbose_name="메인 히어로 설정")
 
+    # 목록 화면에서 집계 없이 읽도록 댓글/추가 사진/동영상 수를 저장해 둔다 (posts.signals 에서 갱신).
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='댓글 수')
+    image_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='추가 사진 수')
+    video_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='동영상 수')
+
+    COUNTER_FIELDS = ('comment_count', 'image_count', 'video_count')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='posts_post_created_id_idx'),
+            models.Index(fields=['is_hero', 'created_at'], name='posts_post_hero_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -75,6 +89,10 @@ class FamilyPostImage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='posts_postimage_created_id_idx'),
+            models.Index(fields=['post', 'created_at', 'id'], name='posts_postimage_post_idx'),
+        ]
         verbose_name = '기사 추가 사진'
         verbose_name_plural = '기사 추가 사진'
 
@@ -83,18 +101,35 @@ class FamilyPostImage(models.Model):
 
 
 class FamilyPostVideo(models.Model):
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, '변환 중'),
+        (STATUS_READY, '완료'),
+        (STATUS_FAILED, '변환 실패'),
+    ]
+
     post = models.ForeignKey(FamilyPost, on_delete=models.CASCADE, related_name='videos', verbose_name='기사')
     video = models.FileField(upload_to='family_posts/videos/%Y/%m/%d/', verbose_name='동영상')
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_READY, verbose_name='처리 상태')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='등록일')
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='posts_postvideo_post_idx'),
+        ]
         verbose_name = '기사 동영상'
         verbose_name_plural = '기사 동영상'
 
     def __str__(self):
         return f'{self.post.title} - {self.created_at:%Y-%m-%d %H:%M}'
 
+    @property
+    def is_processing(self):
+        return self.status == self.STATUS_PROCESSING
+
 
 class FamilyPostComment(models.Model):
     EMOJI_CHOICES = [
@@ -115,6 +150,9 @@ class FamilyPostComment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='posts_comment_post_created_idx'),
+        ]
         verbose_name = '기사 댓글'
         verbose_name_plural = '기사 댓글'
 
@@ -128,6 +166,7 @@ class QuarterlyNewspaper(models.Model):
     title = models.CharField(max_length=120, verbose_name='신문 제목')
     article_count = models.PositiveIntegerField(default=0, verbose_name='기사 수')
     pdf_file = models.FileField(upload_to=quarterly_pdf_upload_to, verbose_name='신문 PDF')
+    content_fingerprint = models.CharField(max_length=64, blank=True, default='', verbose_name='콘텐츠 지문')
     generated_at = models.DateTimeField(auto_now=True, verbose_name='생성일')
 
     class Meta:
@@ -138,4 +177,204 @@ class QuarterlyNewspaper(models.Model):
 
     def __str__(self):
         short_year = str(self.year)[-2:]
-        return f'{short_year}년 {self.quarter}분기 신문'
\ No newline at end of file
+        return f'{short_year}년 {self.quarter}분기 신문'
+
+class NewspaperRegenerationJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '대기'),
+        (STATUS_RUNNING, '실행 중'),
+        (STATUS_DONE, '완료'),
+        (STATUS_FAILED, '실패'),
+    ]
+
+    year = models.PositiveSmallIntegerField(verbose_name='연도')
+    quarter = models.PositiveSmallIntegerField(verbose_name='분기')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='상태')
+    run_after = models.DateTimeField(verbose_name='실행 예정 시각')
+    pending_since = models.DateTimeField(verbose_name='최초 요청 시각')
+    requested_at = models.DateTimeField(verbose_name='마지막 요청 시각')
+    request_count = models.PositiveIntegerField(default=0, verbose_name='누적 요청 수')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='연속 실패 횟수')
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name='시작 시각')
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name='종료 시각')
+    last_duration_ms = models.PositiveIntegerField(blank=True, null=True, verbose_name='소요 시간(ms)')
+    last_error = models.TextField(blank=True, verbose_name='마지막 오류')
+
+    class Meta:
+        ordering = ['run_after']
+        unique_together = [('year', 'quarter')]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='posts_newsjob_status_run_idx'),
+        ]
+        verbose_name = '분기 신문 생성 작업'
+        verbose_name_plural = '분기 신문 생성 작업'
+
+    def __str__(self):
+        return f'{self.year}년 {self.quarter}분기 ({self.get_status_display()})'
+
+
+class ImageRendition(models.Model):
+    source_name = models.CharField(max_length=255, verbose_name='원본 파일')
+    width = models.PositiveSmallIntegerField(verbose_name='너비')
+    format = models.CharField(max_length=8, verbose_name='형식')
+    file = models.ImageField(upload_to='renditions/%Y/%m/%d/', verbose_name='파생 이미지')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+
+    class Meta:
+        ordering = ['source_name', 'format', 'width']
+        unique_together = [('source_name', 'format', 'width')]
+        verbose_name = '파생 이미지'
+        verbose_name_plural = '파생 이미지'
+
+    def __str__(self):
+        return f'{self.source_name} ({self.format}, {self.width}w)'
+
+
+class PostSearchDocument(models.Model):
+    post = models.OneToOneField(FamilyPost, on_delete=models.CASCADE, primary_key=True, related_name='search_document', verbose_name='기사')
+    title_length = models.PositiveIntegerField(default=0, verbose_name='제목 토큰 수')
+    tag_length = models.PositiveIntegerField(default=0, verbose_name='태그 토큰 수')
+    content_length = models.PositiveIntegerField(default=0, verbose_name='본문 토큰 수')
+    indexed_at = models.DateTimeField(auto_now=True, verbose_name='색인 시각')
+
+    class Meta:
+        verbose_name = '검색 색인 문서'
+        verbose_name_plural = '검색 색인 문서'
+
+    def __str__(self):
+        return f'검색 색인 #{self.post_id}'
+
+
+class PostSearchToken(models.Model):
+    FIELD_TITLE = 'title'
+    FIELD_TAG = 'tag'
+    FIELD_CONTENT = 'content'
+    FIELD_CHOICES = [
+        (FIELD_TITLE, '제목'),
+        (FIELD_TAG, '태그'),
+        (FIELD_CONTENT, '본문'),
+    ]
+
+    token = models.CharField(max_length=32, verbose_name='토큰')
+    post = models.ForeignKey(FamilyPost, on_delete=models.CASCADE, related_name='search_tokens', verbose_name='기사')
+    field = models.CharField(max_length=8, choices=FIELD_CHOICES, verbose_name='필드')
+    frequency = models.PositiveIntegerField(default=1, verbose_name='출현 횟수')
+
+    class Meta:
+        unique_together = [('token', 'field', 'post')]
+        verbose_name = '검색 토큰'
+        verbose_name_plural = '검색 토큰'
+
+    def __str__(self):
+        return f'{self.token} ({self.field}) #{self.post_id}'
+
+
+class SearchIndexChange(models.Model):
+    post_id = models.BigIntegerField(verbose_name='기사 ID')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='변경 시각')
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = '검색 색인 변경 기록'
+        verbose_name_plural = '검색 색인 변경 기록'
+
+    def __str__(self):
+        return f'#{self.pk} post={self.post_id}'
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(FamilyPost, on_delete=models.CASCADE, related_name='related_links', verbose_name='기사')
+    related = models.ForeignKey(FamilyPost, on_delete=models.CASCADE, related_name='+', verbose_name='연관 기사')
+    rank = models.PositiveSmallIntegerField(verbose_name='순위')
+    score = models.FloatField(verbose_name='점수')
+
+    class Meta:
+        ordering = ['post', 'rank']
+        unique_together = [('post', 'rank')]
+        verbose_name = '연관 기사'
+        verbose_name_plural = '연관 기사'
+
+    def __str__(self):
+        return f'#{self.post_id} -> #{self.related_id} ({self.rank})'
+
+
+class UploadSession(models.Model):
+    STATUS_UPLOADING = 'uploading'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, '업로드 중'),
+        (STATUS_COMPLETE, '업로드 완료'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name='업로드한 사람')
+    file_name = models.CharField(max_length=255, verbose_name='파일 이름')
+    content_type = models.CharField(max_length=100, verbose_name='파일 형식')
+    total_size = models.PositiveBigIntegerField(verbose_name='전체 크기')
+    received_bytes = models.PositiveBigIntegerField(default=0, verbose_name='받은 크기')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='전체 SHA-256')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_UPLOADING, verbose_name='상태')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='마지막 수신')
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='posts_upload_updated_idx'),
+        ]
+        verbose_name = '분할 업로드'
+        verbose_name_plural = '분할 업로드'
+
+    def __str__(self):
+        return f'{self.file_name} ({self.received_bytes}/{self.total_size})'
+
+    @property
+    def is_complete(self):
+        return self.status == self.STATUS_COMPLETE
+
+
+class StagedMedia(models.Model):
+    KIND_IMAGE = 'image'
+    KIND_VIDEO = 'video'
+    KIND_CHOICES = [
+        (KIND_IMAGE, '사진'),
+        (KIND_VIDEO, '동영상'),
+    ]
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, '처리 중'),
+        (STATUS_READY, '완료'),
+        (STATUS_FAILED, '처리 실패'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='staged_media', verbose_name='올린 사람')
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES, verbose_name='종류')
+    original_name = models.CharField(max_length=255, verbose_name='원본 파일 이름')
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_PROCESSING, verbose_name='처리 상태')
+    file_name = models.CharField(max_length=255, verbose_name='처리된 파일')
+    poster_name = models.CharField(max_length=255, blank=True, verbose_name='동영상 대표 이미지')
+    error = models.CharField(max_length=255, blank=True, verbose_name='오류 내용')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='수정일')
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='posts_staged_updated_idx'),
+        ]
+        verbose_name = '업로드 대기 파일'
+        verbose_name_plural = '업로드 대기 파일'
+
+    def __str__(self):
+        return f'{self.original_name} ({self.get_status_display()})'
+
+    @property
+    def is_image(self):
+        return self.kind == self.KIND_IMAGE
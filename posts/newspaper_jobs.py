@@ -0,0 +1,150 @@
+from datetime import timedelta
+import logging
+import time
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NewspaperRegenerationJob
+from .newspaper_service import REPORTLAB_READY, generate_quarterly_newspaper, get_year_quarter
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 4000
+
+
+def _debounce_seconds():
+    return max(0, int(getattr(settings, 'NEWSPAPER_JOB_DEBOUNCE_SECONDS', 30)))
+
+
+def _max_wait_seconds():
+    return max(_debounce_seconds(), int(getattr(settings, 'NEWSPAPER_JOB_MAX_WAIT_SECONDS', 300)))
+
+
+def _max_attempts():
+    return max(1, int(getattr(settings, 'NEWSPAPER_JOB_MAX_ATTEMPTS', 3)))
+
+
+def enqueue_quarter_regeneration(year, quarter):
+    """Request a rebuild of one quarter, coalescing with any pending request.
+
+    Each new request pushes ``run_after`` back by the debounce window, but never
+    past ``pending_since + NEWSPAPER_JOB_MAX_WAIT_SECONDS`` so a steady stream of
+    edits cannot starve the job.
+    """
+    now = timezone.now()
+    debounce_until = now + timedelta(seconds=_debounce_seconds())
+
+    with transaction.atomic():
+        job = NewspaperRegenerationJob.objects.select_for_update().filter(year=year, quarter=quarter).first()
+        if job is None:
+            try:
+                with transaction.atomic():
+                    return NewspaperRegenerationJob.objects.create(
+                        year=year,
+                        quarter=quarter,
+                        run_after=debounce_until,
+                        pending_since=now,
+                        requested_at=now,
+                        request_count=1,
+                    )
+            except IntegrityError:
+                job = NewspaperRegenerationJob.objects.select_for_update().get(year=year, quarter=quarter)
+
+        if job.status != NewspaperRegenerationJob.STATUS_PENDING:
+            job.pending_since = now
+            job.attempts = 0
+        job.status = NewspaperRegenerationJob.STATUS_PENDING
+        job.run_after = min(debounce_until, job.pending_since + timedelta(seconds=_max_wait_seconds()))
+        job.requested_at = now
+        job.request_count = F('request_count') + 1
+        job.save(update_fields=['status', 'run_after', 'pending_since', 'requested_at', 'request_count', 'attempts'])
+        job.refresh_from_db(fields=['request_count'])
+        return job
+
+
+def schedule_quarter_regeneration(created_at):
+    if not REPORTLAB_READY or not created_at:
+        return
+
+    year, quarter = get_year_quarter(created_at)
+    transaction.on_commit(lambda: enqueue_quarter_regeneration(year, quarter))
+
+
+def recover_interrupted_jobs():
+    """Return jobs left ``running`` by a killed worker to the queue."""
+    return NewspaperRegenerationJob.objects.filter(
+        status=NewspaperRegenerationJob.STATUS_RUNNING,
+    ).update(status=NewspaperRegenerationJob.STATUS_PENDING, run_after=timezone.now())
+
+
+def _claim_job(job):
+    return NewspaperRegenerationJob.objects.filter(
+        pk=job.pk,
+        status=NewspaperRegenerationJob.STATUS_PENDING,
+        requested_at=job.requested_at,
+    ).update(
+        status=NewspaperRegenerationJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        finished_at=None,
+    )
+
+
+def _run_job(job):
+    start = time.monotonic()
+    error_text = ''
+    try:
+        generate_quarterly_newspaper(job.year, job.quarter)
+    except Exception:
+        error_text = traceback.format_exc()[-MAX_ERROR_LENGTH:]
+        logger.exception('Quarterly newspaper job failed. year=%s quarter=%s', job.year, job.quarter)
+
+    duration_ms = int((time.monotonic() - start) * 1000)
+    now = timezone.now()
+    timing_fields = {'finished_at': now, 'last_duration_ms': duration_ms}
+    # requested_at가 바뀌었다면 실행 중에 새 요청이 들어온 것이므로 대기 상태를 유지한다.
+    still_current = NewspaperRegenerationJob.objects.filter(
+        pk=job.pk,
+        status=NewspaperRegenerationJob.STATUS_RUNNING,
+        requested_at=job.requested_at,
+    )
+
+    if not error_text:
+        if not still_current.update(status=NewspaperRegenerationJob.STATUS_DONE, attempts=0, last_error='', **timing_fields):
+            NewspaperRegenerationJob.objects.filter(pk=job.pk).update(**timing_fields)
+        logger.info('Quarterly newspaper job done. year=%s quarter=%s duration_ms=%s', job.year, job.quarter, duration_ms)
+        return True
+
+    attempts = job.attempts + 1
+    if attempts < _max_attempts():
+        failure_fields = {
+            'status': NewspaperRegenerationJob.STATUS_PENDING,
+            'run_after': now + timedelta(seconds=60 * attempts),
+        }
+    else:
+        failure_fields = {'status': NewspaperRegenerationJob.STATUS_FAILED}
+    if not still_current.update(attempts=attempts, last_error=error_text, **failure_fields, **timing_fields):
+        NewspaperRegenerationJob.objects.filter(pk=job.pk).update(last_error=error_text, **timing_fields)
+    return False
+
+
+def run_due_jobs(limit=10):
+    """Run up to ``limit`` due jobs and return how many were processed."""
+    due_jobs = list(
+        NewspaperRegenerationJob.objects.filter(
+            status=NewspaperRegenerationJob.STATUS_PENDING,
+            run_after__lte=timezone.now(),
+        ).order_by('run_after')[:limit]
+    )
+
+    processed = 0
+    for job in due_jobs:
+        if not _claim_job(job):
+            continue
+        _run_job(job)
+        processed += 1
+    return processed
@@ -1,9 +1,15 @@
-from datetime import date
+from datetime import date, datetime, time
+import hashlib
 from io import BytesIO
+import logging
+import os
 from textwrap import shorten
 
 from django.core.files.base import ContentFile
-from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractQuarter, ExtractYear
+from django.utils import timezone
+from PIL import Image, ImageOps
 
 from .models import FamilyPost, QuarterlyNewspaper
 
@@ -18,11 +24,20 @@ except ImportError:
     REPORTLAB_READY = False
 
 
+logger = logging.getLogger(__name__)
+
+# PDF 레이아웃을 바꾸면 올려서 기존 신문이 모두 다시 생성되도록 한다.
+NEWSPAPER_LAYOUT_VERSION = 1
+
+
 def _quarter_from_month(month):
     return ((month - 1) // 3) + 1
 
 
 def get_year_quarter(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # 분기는 서비스 시간대 기준으로 나눈다. UTC 날짜를 쓰면 1일 새벽 기사가 이전 분기로 간다.
+        value = timezone.localtime(value)
     value_date = value.date() if hasattr(value, 'date') else value
     return value_date.year, _quarter_from_month(value_date.month)
 
@@ -37,11 +52,65 @@ def quarter_date_range(year, quarter):
     return start_date, end_date
 
 
+def quarter_datetime_range(year, quarter):
+    """Return the quarter as an aware ``[start, end)`` datetime range in the current time zone.
+
+    Unlike ``created_at__date`` lookups, a plain range on ``created_at`` can use its index.
+    """
+    start_date, end_date = quarter_date_range(year, quarter)
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min)),
+        timezone.make_aware(datetime.combine(end_date, time.min)),
+    )
+
+
 def _quarter_label(year, quarter):
     short_year = str(year)[-2:]
     return f'{short_year}년 {quarter}분기 가족신문'
 
 
+def _image_file_identity(image_field):
+    if not image_field:
+        return ''
+    try:
+        stat = os.stat(image_field.path)
+    except (OSError, ValueError, NotImplementedError):
+        return image_field.name
+    return f'{image_field.name}:{stat.st_size}:{int(stat.st_mtime)}'
+
+
+def compute_quarter_fingerprint(posts):
+    digest = hashlib.sha256(f'layout:{NEWSPAPER_LAYOUT_VERSION}'.encode('utf-8'))
+    for post in posts:
+        parts = [
+            str(post.pk),
+            post.title,
+            post.content or '',
+            post.created_at.isoformat(),
+            post.author.username,
+            _image_file_identity(post.main_image),
+        ]
+        digest.update('\x1f'.join(parts).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _issue_file_exists(issue):
+    if not issue.pdf_file:
+        return False
+    try:
+        return issue.pdf_file.storage.exists(issue.pdf_file.name)
+    except Exception:
+        return False
+
+
+def _pdf_image(path):
+    # 회전은 EXIF 방향값으로만 저장되므로 PDF 에 넣기 전에 적용한다.
+    with Image.open(path) as image:
+        image.draft('RGB', (340, 220))
+        return ImageReader(ImageOps.exif_transpose(image))
+
+
 def _build_issue_pdf(posts, year, quarter):
     if not REPORTLAB_READY:
         return None
@@ -94,7 +163,7 @@ def _build_issue_pdf(posts, year, quarter):
 
         if post.main_image:
             try:
-                image_reader = ImageReader(post.main_image.path)
+                image_reader = _pdf_image(post.main_image.path)
                 pdf.drawImage(image_reader, 38, y - 120, width=170, height=110, preserveAspectRatio=True, anchor='sw')
                 y -= 124
             except Exception:
@@ -109,20 +178,50 @@ def _build_issue_pdf(posts, year, quarter):
     return buffer.getvalue()
 
 
-def generate_quarterly_newspaper(year, quarter):
-    start_date, end_date = quarter_date_range(year, quarter)
-    quarter_posts = list(
+def quarter_posts_queryset(year, quarter):
+    start, end = quarter_datetime_range(year, quarter)
+    return (
         FamilyPost.objects.select_related('author')
-        .filter(created_at__date__gte=start_date, created_at__date__lt=end_date)
+        .filter(created_at__gte=start, created_at__lt=end)
         .order_by('created_at')
     )
 
+
+def quarter_summaries():
+    """Return one row per quarter that has posts: ``year``, ``quarter``, ``post_count``.
+
+    Grouping happens in the database, in the current time zone. No last-modified value is
+    returned: posts carry no modification time, and the latest ``created_at`` stays the same
+    when a title, content or photo is edited. Neither it nor the count is a change check, so
+    each issue is still compared by its content fingerprint.
+    """
+    return list(
+        FamilyPost.objects.annotate(year=ExtractYear('created_at'), quarter=ExtractQuarter('created_at'))
+        .values('year', 'quarter')
+        .annotate(post_count=Count('pk'))
+        .order_by('-year', '-quarter')
+    )
+
+
+def generate_quarterly_newspaper(year, quarter, force=False):
+    quarter_posts = list(quarter_posts_queryset(year, quarter))
+
     existing_issue = QuarterlyNewspaper.objects.filter(year=year, quarter=quarter).first()
     if not quarter_posts:
         if existing_issue:
             existing_issue.delete()
         return None
 
+    fingerprint = compute_quarter_fingerprint(quarter_posts)
+    if (
+        not force
+        and existing_issue
+        and existing_issue.content_fingerprint == fingerprint
+        and _issue_file_exists(existing_issue)
+    ):
+        logger.debug('Quarterly newspaper unchanged, skipping. year=%s quarter=%s', year, quarter)
+        return existing_issue
+
     pdf_bytes = _build_issue_pdf(quarter_posts, year, quarter)
     if not pdf_bytes:
         return None
@@ -138,44 +237,32 @@ def generate_quarterly_newspaper(year, quarter):
     )
     issue.title = issue_title
     issue.article_count = len(quarter_posts)
+    issue.content_fingerprint = fingerprint
 
     file_name = f'family_news_{year}_q{quarter}.pdf'
     if issue.pdf_file:
         issue.pdf_file.delete(save=False)
     issue.pdf_file.save(file_name, ContentFile(pdf_bytes), save=False)
     issue.save()
+    logger.info('Quarterly newspaper regenerated. year=%s quarter=%s articles=%s', year, quarter, issue.article_count)
     return issue
 
 
-def sync_all_quarterly_newspapers():
+def sync_all_quarterly_newspapers(force=False):
     if not REPORTLAB_READY:
         return []
 
-    quarter_keys = {
-        get_year_quarter(created_at)
-        for created_at in FamilyPost.objects.values_list('created_at', flat=True)
-    }
+    summaries = quarter_summaries()
     generated = []
-    for year, quarter in sorted(quarter_keys, reverse=True):
-        issue = generate_quarterly_newspaper(year, quarter)
+    for summary in summaries:
+        issue = generate_quarterly_newspaper(summary['year'], summary['quarter'], force=force)
         if issue:
             generated.append(issue)
 
-    QuarterlyNewspaper.objects.exclude(
-        year__in=[year for year, _ in quarter_keys],
-    ).delete()
-
-    existing_pairs = {(year, quarter) for year, quarter in quarter_keys}
-    for stale_issue in QuarterlyNewspaper.objects.all():
-        if (stale_issue.year, stale_issue.quarter) not in existing_pairs:
-            stale_issue.delete()
+    # 기사가 하나도 없는 분기의 신문은 한 번의 DELETE 로 지운다.
+    live_quarters = Q(pk__in=[])
+    for summary in summaries:
+        live_quarters |= Q(year=summary['year'], quarter=summary['quarter'])
+    QuarterlyNewspaper.objects.exclude(live_quarters).delete()
 
     return generated
-
-
-def regenerate_quarter_for_post(post):
-    if not REPORTLAB_READY or not post:
-        return
-
-    year, quarter = get_year_quarter(post.created_at)
-    transaction.on_commit(lambda: generate_quarterly_newspaper(year, quarter))
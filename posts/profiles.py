@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+
+from .models import FamilyMemberProfile
+
+
+DEFAULT_EMOJI = '🙂'
+
+
+class ProfileResolver:
+    """Request-scoped cache of ``FamilyMemberProfile`` rows keyed by user id.
+
+    ``prime()`` loads the profiles of every user on a page in one query; users whose profile
+    was already joined with ``select_related('author__family_profile')`` cost nothing.
+    """
+
+    def __init__(self):
+        self._profiles = {}
+
+    def prime(self, users):
+        missing = set()
+        for user in users:
+            if not user or not user.pk or user.pk in self._profiles:
+                continue
+            if User.family_profile.is_cached(user):
+                try:
+                    self._profiles[user.pk] = user.family_profile
+                except FamilyMemberProfile.DoesNotExist:
+                    self._profiles[user.pk] = None
+            else:
+                missing.add(user.pk)
+
+        if missing:
+            profiles = {profile.user_id: profile for profile in FamilyMemberProfile.objects.filter(user_id__in=missing)}
+            for user_id in missing:
+                self._profiles[user_id] = profiles.get(user_id)
+        return self
+
+    def profile(self, user):
+        if not user or not user.is_authenticated:
+            return None
+        if user.pk not in self._profiles:
+            self.prime([user])
+        return self._profiles[user.pk]
+
+    def emoji(self, user):
+        profile = self.profile(user)
+        return (profile.emoji if profile else '') or DEFAULT_EMOJI
+
+
+def get_profile_resolver(request):
+    resolver = getattr(request, '_profile_resolver', None)
+    if resolver is None:
+        resolver = ProfileResolver()
+        request._profile_resolver = resolver
+    return resolver
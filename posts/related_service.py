@@ -0,0 +1,120 @@
+import logging
+import math
+
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, FloatField, Sum, Value, When
+
+from .background import submit_after_commit
+from .models import FamilyPost, RelatedPost
+
+
+logger = logging.getLogger('posts.related')
+
+RELATED_POSTS_PER_POST = 12
+# 공유 태그 가중치 합으로 먼저 이만큼 추린 뒤 시간 감쇠를 적용한다.
+RELATED_CANDIDATE_LIMIT = 200
+# 두 기사의 작성 시점이 이 일수만큼 떨어질 때마다 점수가 절반이 된다.
+RELATED_HALF_LIFE_DAYS = 180
+
+
+def _tag_weights(post):
+    """IDF weight per tag of ``post`` from the denormalized ``Tag.post_count``."""
+    total_posts = FamilyPost.objects.count() or 1
+    return {
+        tag.pk: math.log(1 + total_posts / max(tag.post_count, 1))
+        for tag in post.tags.all()
+    }
+
+
+def compute_related_posts(post, limit=RELATED_POSTS_PER_POST):
+    """Return ``[(related_id, score), ...]`` best first.
+
+    Each shared tag contributes its IDF, so a shared rare tag outweighs a shared ``가족``, and
+    the sum decays with the time between the two posts.
+    """
+    weights = _tag_weights(post)
+    if not weights:
+        return []
+
+    through = FamilyPost.tags.through
+    candidates = (
+        through.objects.filter(tag_id__in=weights)
+        .exclude(familypost_id=post.pk)
+        .values('familypost_id')
+        .annotate(
+            weight=Sum(
+                Case(
+                    *[When(tag_id=tag_id, then=Value(weight)) for tag_id, weight in weights.items()],
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            ),
+            created_at=F('familypost__created_at'),
+        )
+        .order_by('-weight', '-familypost_id')[:RELATED_CANDIDATE_LIMIT]
+    )
+
+    scored = []
+    for candidate in candidates:
+        distance_days = abs((candidate['created_at'] - post.created_at).total_seconds()) / 86400
+        decay = 0.5 ** (distance_days / RELATED_HALF_LIFE_DAYS)
+        scored.append((candidate['familypost_id'], candidate['weight'] * decay))
+    scored.sort(key=lambda item: (-item[1], -item[0]))
+    return scored[:limit]
+
+
+def refresh_related_posts(post_id):
+    """Recompute and store the related list of one post. Returns the related ids."""
+    post = FamilyPost.objects.filter(pk=post_id).first()
+    if post is None:
+        return []
+
+    scored = compute_related_posts(post)
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id=post_id).delete()
+        RelatedPost.objects.bulk_create(
+            RelatedPost(post_id=post_id, related_id=related_id, rank=rank, score=score)
+            for rank, (related_id, score) in enumerate(scored)
+        )
+    return [related_id for related_id, _ in scored]
+
+
+def refresh_related_for_tag_change(post_ids, tag_ids):
+    """Refresh ``post_ids`` and every post whose list may now gain or lose one of them.
+
+    That is every post sharing one of the changed ``tag_ids`` (an older post can start listing
+    a newly tagged one even if it was never in that post's own top list) and every post that
+    listed one of ``post_ids`` before. Returns the refreshed ids.
+    """
+    affected = set(post_ids)
+    affected.update(
+        FamilyPost.tags.through.objects.filter(tag_id__in=tag_ids).values_list('familypost_id', flat=True)
+    )
+    affected.update(RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True))
+    for affected_id in sorted(affected):
+        refresh_related_posts(affected_id)
+    return affected
+
+
+def _refresh_in_background(post_ids, tag_ids, affected_ids):
+    close_old_connections()
+    try:
+        if affected_ids:
+            # 삭제된 기사: 그 기사를 가리키던 목록만 다시 채운다.
+            for affected_id in affected_ids:
+                refresh_related_posts(affected_id)
+        else:
+            refresh_related_for_tag_change(post_ids, tag_ids)
+    except Exception:
+        logger.exception(f'[RELATED] 연관 기사 갱신 실패: post_ids={post_ids}')
+    finally:
+        close_old_connections()
+
+
+def schedule_related_refresh(post_ids, tag_ids=(), affected_ids=()):
+    """Refresh related lists after commit.
+
+    ``tag_ids`` are the tags added to or removed from ``post_ids``. ``affected_ids`` is used
+    for a deleted post: the posts that listed it are refilled instead of the post itself.
+    """
+    submit_after_commit('related-posts', _refresh_in_background, list(post_ids), list(tag_ids), list(affected_ids))
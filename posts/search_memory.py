@@ -0,0 +1,215 @@
+"""Optional in-process search index loaded from a memory-mapped snapshot.
+
+The snapshot holds, for every bigram, the ascending post ids that contain it, in two scopes:
+``m:`` (title and tags) and ``a:`` (title, tags and content). Each gunicorn worker maps the
+file lazily and keeps itself current by tailing ``SearchIndexChange`` rows written whenever a
+post is (re)indexed or deleted.
+"""
+from array import array
+from bisect import bisect_left
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+
+from django.conf import settings
+
+from .models import PostSearchToken, SearchIndexChange
+
+
+logger = logging.getLogger('posts.search')
+
+SNAPSHOT_MAGIC = b'FNSI'
+SNAPSHOT_VERSION = 1
+# magic, version, last change id, posting count, term count
+HEADER = struct.Struct('<4sIQQI')
+TERM_ENTRY = struct.Struct('<HQI')
+POSTING_TYPECODE = 'Q'
+
+SCOPE_META = 'm'
+SCOPE_ALL = 'a'
+META_FIELDS = (PostSearchToken.FIELD_TITLE, PostSearchToken.FIELD_TAG)
+
+
+def snapshot_path():
+    configured = getattr(settings, 'SEARCH_SNAPSHOT_PATH', '')
+    return Path(configured) if configured else Path(settings.MEDIA_WORK_DIR) / 'search-index.bin'
+
+
+def _scope_keys(token, field):
+    keys = [f'{SCOPE_ALL}:{token}']
+    if field in META_FIELDS:
+        keys.append(f'{SCOPE_META}:{token}')
+    return keys
+
+
+def write_snapshot(path=None):
+    """Write a new snapshot atomically and return ``(term_count, posting_count)``."""
+    path = Path(path or snapshot_path())
+    # 스냅샷 이후의 변경은 작업자가 변경 기록에서 다시 적용하므로, 색인을 읽기 전에 위치를 먼저 잡는다.
+    last_change = SearchIndexChange.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    postings = {}
+    for token, field, post_id in PostSearchToken.objects.values_list('token', 'field', 'post_id').iterator(chunk_size=5000):
+        for key in _scope_keys(token, field):
+            postings.setdefault(key, set()).add(post_id)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    posting_count = sum(len(post_ids) for post_ids in postings.values())
+    with open(temp_path, 'wb') as output:
+        output.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, last_change, posting_count, len(postings)))
+        directory = []
+        offset = 0
+        for key in sorted(postings):
+            post_ids = array(POSTING_TYPECODE, sorted(postings[key]))
+            post_ids.tofile(output)
+            directory.append((key.encode('utf-8'), offset, len(post_ids)))
+            offset += len(post_ids)
+        for encoded_key, key_offset, key_count in directory:
+            output.write(TERM_ENTRY.pack(len(encoded_key), key_offset, key_count))
+            output.write(encoded_key)
+    os.replace(temp_path, path)
+
+    SearchIndexChange.objects.filter(pk__lte=last_change).delete()
+    return len(postings), posting_count
+
+
+class SnapshotIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as snapshot_file:
+            stat = os.fstat(snapshot_file.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns)
+            self._map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.last_change_id, posting_count, term_count = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._map.close()
+            raise ValueError(f'지원하지 않는 검색 스냅샷입니다: {self.path}')
+
+        item_size = array(POSTING_TYPECODE).itemsize
+        postings_end = HEADER.size + posting_count * item_size
+        self._postings = memoryview(self._map)[HEADER.size:postings_end].cast(POSTING_TYPECODE)
+
+        self._terms = {}
+        position = postings_end
+        for _ in range(term_count):
+            key_length, offset, count = TERM_ENTRY.unpack_from(self._map, position)
+            position += TERM_ENTRY.size
+            key = self._map[position:position + key_length].decode('utf-8')
+            position += key_length
+            self._terms[key] = (offset, count)
+
+    def postings(self, key):
+        offset, count = self._terms.get(key, (0, 0))
+        return self._postings[offset:offset + count]
+
+    def close(self):
+        self._postings.release()
+        self._map.close()
+
+
+def galloping_intersect(small, large):
+    """Intersect two ascending id sequences, probing ``large`` with exponential search."""
+    if len(small) > len(large):
+        small, large = large, small
+    result = []
+    low = 0
+    size = len(large)
+    for value in small:
+        bound = 1
+        while low + bound < size and large[low + bound] < value:
+            bound *= 2
+        position = bisect_left(large, value, low, min(low + bound + 1, size))
+        if position >= size:
+            break
+        if large[position] == value:
+            result.append(value)
+        low = position
+    return result
+
+
+class InProcessSearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._last_change_id = 0
+        self._last_poll = 0.0
+        # 스냅샷 이후 바뀐 기사: post_id -> 그 기사가 가진 scope 키 집합 (삭제된 기사는 빈 집합)
+        self._changed_posts = {}
+
+    def _load_snapshot(self, path):
+        # 이전 스냅샷은 진행 중인 검색이 참조하고 있을 수 있으므로 닫지 않고 참조가 사라질 때 해제되게 둔다.
+        self._snapshot = SnapshotIndex(path)
+        snapshot = self._snapshot
+        self._last_change_id = snapshot.last_change_id
+        self._changed_posts = {}
+        logger.info(f'[SEARCH] 스냅샷 로드: {path} (변경 기록 #{snapshot.last_change_id}까지 반영)')
+
+    def _apply_changes(self):
+        changes = list(
+            SearchIndexChange.objects.filter(pk__gt=self._last_change_id).order_by('pk').values_list('pk', 'post_id')[:5000]
+        )
+        if not changes:
+            return
+        post_ids = {post_id for _, post_id in changes}
+        keys_by_post = {post_id: set() for post_id in post_ids}
+        for token, field, post_id in PostSearchToken.objects.filter(post_id__in=post_ids).values_list('token', 'field', 'post_id'):
+            keys_by_post[post_id].update(_scope_keys(token, field))
+        self._changed_posts.update(keys_by_post)
+        self._last_change_id = changes[-1][0]
+
+    def refresh(self):
+        poll_seconds = getattr(settings, 'SEARCH_CHANGELOG_POLL_SECONDS', 2)
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._last_poll < poll_seconds:
+            return True
+
+        with self._lock:
+            if self._snapshot is not None and now - self._last_poll < poll_seconds:
+                return True
+            path = snapshot_path()
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return self._snapshot is not None
+            if self._snapshot is None or self._snapshot.identity != (stat.st_ino, stat.st_mtime_ns):
+                self._load_snapshot(path)
+            self._apply_changes()
+            self._last_poll = now
+        return True
+
+    def match(self, tokens, include_content=False):
+        """Return matching post ids, newest first, or ``None`` when no snapshot is available."""
+        if not tokens or not self.refresh():
+            return None
+
+        scope = SCOPE_ALL if include_content else SCOPE_META
+        keys = [f'{scope}:{token}' for token in tokens]
+        snapshot = self._snapshot
+        changed_posts = self._changed_posts
+
+        lists = sorted((snapshot.postings(key) for key in keys), key=len)
+        matched = list(lists[0])
+        for post_ids in lists[1:]:
+            if not matched:
+                break
+            matched = galloping_intersect(matched, post_ids)
+
+        result = {post_id for post_id in matched if post_id not in changed_posts}
+        result.update(
+            post_id for post_id, post_keys in changed_posts.items()
+            if post_keys and all(key in post_keys for key in keys)
+        )
+        return sorted(result, reverse=True)
+
+
+_index = InProcessSearchIndex()
+
+
+def match_post_ids(tokens, include_content=False):
+    return _index.match(tokens, include_content=include_content)
@@ -0,0 +1,206 @@
+from collections import Counter
+import logging
+import math
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .models import FamilyPost, PostSearchDocument, PostSearchToken, SearchIndexChange
+from .search_memory import match_post_ids
+
+
+logger = logging.getLogger('posts.search')
+
+WORD_PATTERN = re.compile(r'\w+')
+MAX_QUERY_TOKENS = 16
+# 프로세스 내 색인으로 찾은 결과는 최신순으로 이 개수까지만 DB 에 넘긴다.
+IN_PROCESS_MAX_RESULTS = 1000
+# 스레드(= DB 연결)마다 기사별로 마지막에 예약된 색인
+_scheduled_index = threading.local()
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {
+    PostSearchToken.FIELD_TAG: 3.0,
+    PostSearchToken.FIELD_TITLE: 2.0,
+    PostSearchToken.FIELD_CONTENT: 1.0,
+}
+LENGTH_COLUMNS = {
+    PostSearchToken.FIELD_TAG: 'search_document__tag_length',
+    PostSearchToken.FIELD_TITLE: 'search_document__title_length',
+    PostSearchToken.FIELD_CONTENT: 'search_document__content_length',
+}
+
+
+def tokenize(text):
+    """Split text into lowercase character bigrams per word; one-character words stay whole.
+
+    Bigrams let a Hangul query like ``나들`` match ``가족나들이`` without a morphological analyzer.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall(unicodedata.normalize('NFC', text or '').lower()):
+        if len(word) == 1:
+            tokens.append(word)
+            continue
+        tokens.extend(word[index:index + 2] for index in range(len(word) - 1))
+    return tokens
+
+
+def query_tokens(query):
+    tokens = []
+    for word in WORD_PATTERN.findall(unicodedata.normalize('NFC', query or '').lower()):
+        # 한 글자 검색어는 색인된 한 글자 단어하고만 맞으므로 bigram 이 있는 단어만 쓴다.
+        if len(word) > 1:
+            tokens.extend(tokenize(word))
+    return list(dict.fromkeys(tokens))[:MAX_QUERY_TOKENS]
+
+
+def index_post(post):
+    field_tokens = {
+        PostSearchToken.FIELD_TITLE: tokenize(post.title),
+        PostSearchToken.FIELD_TAG: [token for tag in post.tags.all() for token in tokenize(tag.name)],
+        PostSearchToken.FIELD_CONTENT: tokenize(post.content),
+    }
+
+    with transaction.atomic():
+        PostSearchToken.objects.filter(post=post).delete()
+        PostSearchToken.objects.bulk_create(
+            PostSearchToken(post=post, token=token, field=field, frequency=frequency)
+            for field, tokens in field_tokens.items()
+            for token, frequency in Counter(tokens).items()
+        )
+        PostSearchDocument.objects.update_or_create(
+            post=post,
+            defaults={
+                'title_length': len(field_tokens[PostSearchToken.FIELD_TITLE]),
+                'tag_length': len(field_tokens[PostSearchToken.FIELD_TAG]),
+                'content_length': len(field_tokens[PostSearchToken.FIELD_CONTENT]),
+            },
+        )
+        record_index_change(post.pk)
+
+
+def record_index_change(post_id):
+    # 프로세스 내 검색 색인을 쓰는 작업자들이 스냅샷 이후의 변경을 따라잡을 수 있도록 남긴다.
+    if getattr(settings, 'SEARCH_IN_PROCESS_INDEX', False):
+        SearchIndexChange.objects.create(post_id=post_id)
+
+
+def _index_post_by_id(post_id):
+    post = FamilyPost.objects.prefetch_related('tags').filter(pk=post_id).first()
+    if post is None:
+        return
+    try:
+        index_post(post)
+    except Exception:
+        logger.exception(f'[SEARCH] 색인 실패: post_id={post_id}')
+
+
+def schedule_post_index(post_id):
+    """Index ``post_id`` after the current transaction commits.
+
+    Saving a post and attaching its tags each ask for an index. Within one transaction only
+    the last request runs, so the post is indexed once with its state at commit time. In
+    autocommit ``on_commit`` runs immediately, so views wrap the post save and the tag sync
+    in ``transaction.atomic()``.
+    """
+    tokens = getattr(_scheduled_index, 'tokens', None)
+    if tokens is None:
+        tokens = _scheduled_index.tokens = {}
+    token = object()
+    tokens[post_id] = token
+
+    def run():
+        # 더 나중에 예약된 색인이 있으면 그쪽에 맡긴다.
+        if tokens.get(post_id) is not token:
+            return
+        del tokens[post_id]
+        _index_post_by_id(post_id)
+
+    transaction.on_commit(run)
+
+
+def _legacy_search(query, fields):
+    condition = Q(tags__name__icontains=query)
+    if PostSearchToken.FIELD_TITLE in fields:
+        condition |= Q(title__icontains=query)
+    if PostSearchToken.FIELD_CONTENT in fields:
+        condition |= Q(content__icontains=query)
+    return FamilyPost.objects.filter(condition).distinct()
+
+
+def search_posts(query, include_content=False, sort='latest'):
+    """Return a ``FamilyPost`` queryset matching every token of ``query``.
+
+    Title and tags are always searched, content only with ``include_content``. With
+    ``sort='relevance'`` results are ordered by a BM25 score in which tag, title and
+    content matches carry weights 3/2/1.
+    """
+    fields = [PostSearchToken.FIELD_TAG, PostSearchToken.FIELD_TITLE]
+    if include_content:
+        fields.append(PostSearchToken.FIELD_CONTENT)
+
+    tokens = query_tokens(query)
+    if not tokens:
+        # 한 글자 검색어 등 색인으로 찾을 수 없는 입력은 기존 부분 문자열 검색으로 처리한다.
+        result_qs = _legacy_search(query, fields)
+        return result_qs.order_by('-pk')
+
+    if sort != 'relevance' and getattr(settings, 'SEARCH_IN_PROCESS_INDEX', False):
+        post_ids = match_post_ids(tokens, include_content=include_content)
+        if post_ids is not None:
+            return FamilyPost.objects.filter(pk__in=post_ids[:IN_PROCESS_MAX_RESULTS]).order_by('-pk')
+
+    result_qs = (
+        FamilyPost.objects.filter(search_tokens__token__in=tokens, search_tokens__field__in=fields)
+        .annotate(matched_tokens=Count('search_tokens__token', distinct=True))
+        .filter(matched_tokens=len(tokens))
+    )
+    if sort != 'relevance':
+        return result_qs.order_by('-pk')
+    return result_qs.annotate(relevance_score=_bm25_expression(tokens, fields)).order_by('-relevance_score', '-pk')
+
+
+def _bm25_expression(tokens, fields):
+    stats = PostSearchDocument.objects.aggregate(
+        documents=Count('pk'),
+        **{f'avg_{field}': Avg(LENGTH_COLUMNS[field].split('__', 1)[1]) for field in fields},
+    )
+    document_count = stats['documents'] or 1
+    document_frequency = dict(
+        PostSearchToken.objects.filter(token__in=tokens, field__in=fields)
+        .values('token')
+        .annotate(frequency=Count('post', distinct=True))
+        .values_list('token', 'frequency')
+    )
+
+    # 필드별 가중치를 곱한 길이를 문서 길이로 보고, 평균 길이로 정규화한다 (BM25F 단순형).
+    weighted_length = sum(Cast(F(LENGTH_COLUMNS[field]), FloatField()) * FIELD_WEIGHTS[field] for field in fields)
+    average_length = sum((stats[f'avg_{field}'] or 0) * FIELD_WEIGHTS[field] for field in fields) or 1.0
+    length_norm = Value(BM25_K1 * (1 - BM25_B)) + Value(BM25_K1 * BM25_B / average_length) * weighted_length
+
+    score = Value(0.0)
+    for token in tokens:
+        frequency = document_frequency.get(token, 0)
+        idf = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+        term_frequency = Sum(
+            Case(
+                *[
+                    When(
+                        search_tokens__token=token,
+                        search_tokens__field=field,
+                        then=Cast(F('search_tokens__frequency'), FloatField()) * FIELD_WEIGHTS[field],
+                    )
+                    for field in fields
+                ],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+        score = score + Value(idf * (BM25_K1 + 1)) * term_frequency / (term_frequency + length_norm)
+    return score
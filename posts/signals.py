@@ -1,15 +1,198 @@
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import FamilyPost
-from .newspaper_service import regenerate_quarter_for_post
+from .counter_service import decrement_post_counter, increment_post_counter
+from .front_page import invalidate_front_page
+from .image_service import RENDITION_SOURCE_FIELDS, discard_renditions_after_commit, schedule_renditions
+from .models import (
+    FamilyMemberPhoto,
+    FamilyMemberProfile,
+    FamilyPost,
+    FamilyPostComment,
+    FamilyPostImage,
+    FamilyPostVideo,
+    ImageRendition,
+    RelatedPost,
+    Tag,
+)
+from .newspaper_jobs import schedule_quarter_regeneration
+from .related_service import schedule_related_refresh
+from .search_service import record_index_change, schedule_post_index
+from .tag_service import refresh_tag_post_counts
+from .tag_trie import invalidate_tag_trie
 
 
 @receiver(post_save, sender=FamilyPost)
 def regenerate_quarterly_newspaper_on_save(sender, instance, **kwargs):
-    regenerate_quarter_for_post(instance)
+    schedule_quarter_regeneration(instance.created_at)
 
 
 @receiver(post_delete, sender=FamilyPost)
 def regenerate_quarterly_newspaper_on_delete(sender, instance, **kwargs):
-    regenerate_quarter_for_post(instance)
+    schedule_quarter_regeneration(instance.created_at)
+
+
+@receiver(post_init, sender=FamilyPost)
+@receiver(post_init, sender=FamilyPostImage)
+@receiver(post_init, sender=FamilyMemberPhoto)
+@receiver(post_init, sender=FamilyMemberProfile)
+def remember_rendition_source(sender, instance, **kwargs):
+    # DB 에서 읽은 사진 이름. only()/defer() 로 빠진 필드는 모르는 값(None)으로 둔다.
+    instance._rendition_source_name = instance.__dict__.get(RENDITION_SOURCE_FIELDS[sender])
+
+
+def _schedule_image_renditions(instance, field_name, created, update_fields):
+    if update_fields is not None and field_name not in update_fields:
+        return
+    field_file = getattr(instance, field_name)
+    # 제목만 고친 전체 저장 등 사진 이름이 그대로인 저장은 파생본을 다시 만들지 않는다.
+    old_name = instance._rendition_source_name
+    if not created and field_file.name == old_name:
+        return
+    if not created and old_name:
+        # 사진을 바꾼 경우 이전 사진의 파생본은 더 쓰는 행이 없을 때 지운다.
+        discard_renditions_after_commit(old_name)
+    instance._rendition_source_name = field_file.name
+    schedule_renditions(field_file)
+
+
+@receiver(post_save, sender=FamilyPost)
+def generate_main_image_renditions(sender, instance, created, update_fields=None, **kwargs):
+    _schedule_image_renditions(instance, 'main_image', created, update_fields)
+
+
+@receiver(post_save, sender=FamilyPostImage)
+def generate_post_image_renditions(sender, instance, created, update_fields=None, **kwargs):
+    _schedule_image_renditions(instance, 'image', created, update_fields)
+
+
+@receiver(post_save, sender=FamilyMemberPhoto)
+def generate_member_photo_renditions(sender, instance, created, update_fields=None, **kwargs):
+    _schedule_image_renditions(instance, 'image', created, update_fields)
+
+
+@receiver(post_save, sender=FamilyMemberProfile)
+def generate_profile_photo_renditions(sender, instance, created, update_fields=None, **kwargs):
+    _schedule_image_renditions(instance, 'photo', created, update_fields)
+
+
+@receiver(post_delete, sender=FamilyPost)
+@receiver(post_delete, sender=FamilyPostImage)
+@receiver(post_delete, sender=FamilyMemberPhoto)
+@receiver(post_delete, sender=FamilyMemberProfile)
+def discard_renditions_on_delete(sender, instance, **kwargs):
+    discard_renditions_after_commit(getattr(instance, RENDITION_SOURCE_FIELDS[sender]).name)
+
+
+@receiver(post_save, sender=FamilyPost)
+@receiver(post_delete, sender=FamilyPost)
+@receiver(post_save, sender=FamilyPostComment)
+@receiver(post_delete, sender=FamilyPostComment)
+@receiver(post_save, sender=FamilyMemberProfile)
+@receiver(post_save, sender=ImageRendition)
+def invalidate_front_page_snapshot(sender, **kwargs):
+    invalidate_front_page()
+
+
+@receiver(post_save, sender=FamilyPost)
+def index_post_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    schedule_post_index(instance.pk)
+
+
+@receiver(post_delete, sender=FamilyPost)
+def record_search_change_on_delete(sender, instance, **kwargs):
+    record_index_change(instance.pk)
+
+
+@receiver(m2m_changed, sender=FamilyPost.tags.through)
+def index_post_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_post_index(instance.pk)
+        return
+    for post_id in pk_set or ():
+        schedule_post_index(post_id)
+
+
+@receiver(post_save, sender=Tag)
+def index_posts_on_tag_rename(sender, instance, created, **kwargs):
+    if created:
+        return
+    for post_id in instance.posts.values_list('pk', flat=True):
+        schedule_post_index(post_id)
+
+
+@receiver(m2m_changed, sender=FamilyPost.tags.through)
+def update_tag_counts_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        refresh_tag_post_counts([instance.pk])
+    elif action == 'post_clear':
+        refresh_tag_post_counts(getattr(instance, '_cleared_tag_ids', ()))
+    else:
+        refresh_tag_post_counts(pk_set)
+
+
+@receiver(pre_delete, sender=FamilyPost)
+def remember_tags_before_post_delete(sender, instance, **kwargs):
+    instance._tag_ids_before_delete = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=FamilyPost)
+def update_tag_counts_on_post_delete(sender, instance, **kwargs):
+    refresh_tag_post_counts(getattr(instance, '_tag_ids_before_delete', ()))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_trie_on_tag_change(sender, **kwargs):
+    invalidate_tag_trie()
+
+
+@receiver(m2m_changed, sender=FamilyPost.tags.through)
+def refresh_related_posts_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        schedule_related_refresh(pk_set or (), tag_ids=[instance.pk])
+    elif action == 'post_clear':
+        schedule_related_refresh([instance.pk], tag_ids=getattr(instance, '_cleared_tag_ids', ()))
+    else:
+        schedule_related_refresh([instance.pk], tag_ids=pk_set)
+
+
+@receiver(pre_delete, sender=FamilyPost)
+def refresh_related_posts_on_post_delete(sender, instance, **kwargs):
+    # 연결 행은 기사와 함께 지워지므로, 이 기사를 연관 기사로 두던 목록을 미리 모아 둔다.
+    affected_ids = list(RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True).distinct())
+    if affected_ids:
+        schedule_related_refresh([instance.pk], affected_ids=affected_ids)
+
+
+COUNTER_FIELD_BY_SENDER = {
+    FamilyPostComment: 'comment_count',
+    FamilyPostImage: 'image_count',
+    FamilyPostVideo: 'video_count',
+}
+
+
+@receiver(post_save, sender=FamilyPostComment)
+@receiver(post_save, sender=FamilyPostImage)
+@receiver(post_save, sender=FamilyPostVideo)
+def increment_post_counter_on_create(sender, instance, created, **kwargs):
+    if created:
+        increment_post_counter(instance.post_id, COUNTER_FIELD_BY_SENDER[sender])
+
+
+@receiver(post_delete, sender=FamilyPostComment)
+@receiver(post_delete, sender=FamilyPostImage)
+@receiver(post_delete, sender=FamilyPostVideo)
+def decrement_post_counter_on_delete(sender, instance, **kwargs):
+    decrement_post_counter(instance.post_id, COUNTER_FIELD_BY_SENDER[sender])
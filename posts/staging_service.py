@@ -0,0 +1,269 @@
+"""Per-file staging between a finished upload session and the post that uses it.
+
+As soon as a chunked upload is finalized its file moves into ``MEDIA_WORK_DIR/staged`` and is
+processed in the background: photos are optimized like form uploads, videos get their poster
+frame and transcode. Submitting the upload form then only attaches ready staged files, so
+post creation is a short metadata write instead of the whole processing pipeline.
+"""
+from datetime import timedelta
+import logging
+import os
+from pathlib import Path
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import UnidentifiedImageError
+
+from .background import submit_after_commit
+from .image_pipeline import optimize_image
+from .image_rotation import rotate_image_bytes
+from .models import StagedMedia, UploadSession
+from .upload_service import _remove_file, spool_path
+from .video_service import TemporaryPathFile, VideoIngest, ffmpeg_slot, media_work_dir, transcode_video_file
+
+
+logger = logging.getLogger('posts.upload')
+
+
+class StagedMediaError(Exception):
+    """A staged file the form referred to cannot be attached (missing, still processing or failed)."""
+
+
+def staging_dir():
+    directory = media_work_dir() / 'staged'
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def staged_path(name):
+    return staging_dir() / name
+
+
+def stage_upload(session):
+    """Turn a finished upload session into a ``StagedMedia`` row and queue its processing.
+
+    The staged row takes over the session id, so a finalize that is sent again (the client lost
+    the first response, or two requests raced) returns the row staged the first time.
+    """
+    kind = StagedMedia.KIND_IMAGE if session.content_type.startswith('image/') else StagedMedia.KIND_VIDEO
+    with transaction.atomic():
+        if not UploadSession.objects.select_for_update().filter(pk=session.pk).first():
+            return StagedMedia.objects.get(pk=session.pk, user=session.user)
+        staged = StagedMedia.objects.create(
+            id=session.pk,
+            user=session.user,
+            kind=kind,
+            original_name=session.file_name,
+            file_name=f'{session.pk}.upload{Path(session.file_name).suffix.lower()}',
+        )
+        # 같은 파일시스템 안이라 이름만 바뀐다.
+        os.replace(spool_path(session), staged_path(staged.file_name))
+        session.delete()
+    schedule_staged_processing(staged)
+    return staged
+
+
+def _process_staged_image(staged):
+    source_path = staged_path(staged.file_name)
+    try:
+        image_bytes, stats = optimize_image(str(source_path))
+    except (UnidentifiedImageError, OSError, ValueError):
+        # 폼 업로드와 같이 최적화할 수 없는 사진은 원본을 그대로 쓴다.
+        logger.warning(f'[STAGE] 이미지 최적화 실패, 원본 유지: {staged.original_name}')
+        return {}
+    logger.info(f'[STAGE] 이미지 최적화 {staged.original_name}: {stats.summary()}')
+
+    processed_name = f'{staged.pk}.jpg'
+    staged_path(processed_name).write_bytes(image_bytes)
+    _remove_file(source_path)
+    return {'file_name': processed_name}
+
+
+def _process_staged_video(staged):
+    source_path = staged_path(staged.file_name)
+    source = TemporaryPathFile(str(source_path), staged.original_name)
+    try:
+        with VideoIngest(source) as ingest:
+            poster, error = ingest.extract_poster()
+    finally:
+        source.close()
+    if error:
+        return {'status': StagedMedia.STATUS_FAILED, 'error': error}
+
+    poster_name = f'{staged.pk}_poster.jpg'
+    staged_path(poster_name).write_bytes(poster.read())
+    changes = {'poster_name': poster_name}
+
+    with ffmpeg_slot():
+        compressed_file, error = transcode_video_file(str(source_path), staged.original_name)
+    if error:
+        # 변환에 실패해도 원본은 올린다. 기사에는 변환 실패 상태로 붙는다.
+        logger.warning(f'[STAGE] 동영상 변환 실패, 원본 유지: {staged.original_name}, {error}')
+        changes['error'] = error[:255]
+    elif compressed_file:
+        processed_name = f'{staged.pk}.mp4'
+        compressed_file.close()
+        os.replace(compressed_file.temporary_file_path(), staged_path(processed_name))
+        _remove_file(source_path)
+        changes['file_name'] = processed_name
+    return changes
+
+
+def process_staged_media(staged_id):
+    close_old_connections()
+    try:
+        staged = StagedMedia.objects.filter(pk=staged_id, status=StagedMedia.STATUS_PROCESSING).first()
+        if not staged:
+            return False
+
+        if not staged_path(staged.file_name).exists():
+            # 처리 도중 워커가 죽어 원본만 지워진 경우
+            changes = {'status': StagedMedia.STATUS_FAILED, 'error': '업로드한 파일을 찾을 수 없습니다. 다시 선택해주세요.'}
+        elif staged.is_image:
+            changes = _process_staged_image(staged)
+        else:
+            changes = _process_staged_video(staged)
+        changes.setdefault('status', StagedMedia.STATUS_READY)
+        StagedMedia.objects.filter(pk=staged_id, status=StagedMedia.STATUS_PROCESSING).update(
+            updated_at=timezone.now(),
+            **changes,
+        )
+        return changes['status'] == StagedMedia.STATUS_READY
+    except Exception:
+        logger.exception(f'[STAGE] 처리 오류: staged_id={staged_id}')
+        StagedMedia.objects.filter(pk=staged_id, status=StagedMedia.STATUS_PROCESSING).update(
+            status=StagedMedia.STATUS_FAILED,
+            error='파일 처리 중 오류가 발생했습니다.',
+            updated_at=timezone.now(),
+        )
+        return False
+    finally:
+        close_old_connections()
+
+
+def schedule_staged_processing(staged):
+    # 사진은 전용 풀에서 처리해 폼 업로드 요청이 기다리는 'image-optimize' 풀을 막지 않는다.
+    # 동영상은 다른 백그라운드 변환과 같은 풀을 써서 동시 FFmpeg 수를 함께 제한한다.
+    if staged.is_image:
+        pool_name, max_workers = 'staged-image', getattr(settings, 'STAGED_IMAGE_THREADS', 1)
+    else:
+        pool_name, max_workers = 'video-transcode', getattr(settings, 'VIDEO_TRANSCODE_THREADS', 1)
+    submit_after_commit(pool_name, process_staged_media, staged.pk, max_workers=max_workers)
+
+
+def staged_processing_timeout():
+    return timedelta(minutes=getattr(settings, 'STAGED_PROCESSING_TIMEOUT_MINUTES', 30))
+
+
+def claim_stalled_staged_media(staged, min_age=None):
+    """Claim ``staged`` when it has sat in ``processing`` for ``min_age`` and return whether it was.
+
+    The in-process pools lose their queue when a gunicorn worker is recycled or the container
+    restarts, so such rows would otherwise stay "processing" until the purge. Claiming bumps
+    ``updated_at``; of several callers racing on the same row only one wins.
+    """
+    if min_age is None:
+        min_age = staged_processing_timeout()
+    if staged.status != StagedMedia.STATUS_PROCESSING or staged.updated_at > timezone.now() - min_age:
+        return False
+    return bool(
+        StagedMedia.objects.filter(
+            pk=staged.pk,
+            status=StagedMedia.STATUS_PROCESSING,
+            updated_at=staged.updated_at,
+        ).update(updated_at=timezone.now())
+    )
+
+
+def requeue_if_stalled(staged):
+    """Queue ``staged`` again when its processing was lost. Returns ``True`` when requeued."""
+    if not claim_stalled_staged_media(staged):
+        return False
+    logger.warning(f'[STAGE] 중단된 처리 다시 예약: {staged.original_name} ({staged.pk})')
+    schedule_staged_processing(staged)
+    return True
+
+
+def find_staged_upload(session_id, user):
+    """The staged row an earlier finalize of ``session_id`` created, or ``None``."""
+    return StagedMedia.objects.filter(pk=session_id, user=user).first()
+
+
+def load_staged_media(user, staged_ids):
+    """Return ``user``'s ready staged files in ``staged_ids`` order or raise ``StagedMediaError``."""
+    ids = []
+    for raw_id in staged_ids:
+        try:
+            staged_id = uuid.UUID(str(raw_id).strip())
+        except ValueError:
+            raise StagedMediaError('업로드한 파일 정보가 올바르지 않습니다. 다시 선택해주세요.')
+        if staged_id not in ids:
+            ids.append(staged_id)
+    if not ids:
+        return []
+
+    staged_by_id = StagedMedia.objects.filter(pk__in=ids, user=user).in_bulk()
+    staged_items = []
+    for staged_id in ids:
+        staged = staged_by_id.get(staged_id)
+        if not staged or not staged_path(staged.file_name).exists():
+            raise StagedMediaError('업로드한 파일을 찾을 수 없습니다. 다시 선택해주세요.')
+        if staged.status == StagedMedia.STATUS_PROCESSING:
+            requeue_if_stalled(staged)
+            raise StagedMediaError('아직 처리 중인 파일이 있습니다. 잠시 후 다시 시도해주세요.')
+        if staged.status == StagedMedia.STATUS_FAILED:
+            raise StagedMediaError(staged.error or f'{staged.original_name} 처리에 실패했습니다.')
+        staged_items.append(staged)
+    return staged_items
+
+
+def staged_image_file(staged, rotation_degrees=0):
+    """The optimized photo as an in-memory file, turned by the rotation chosen in the form.
+
+    Optimized photos are small, and an in-memory file can be saved to more than one field
+    (the representative photo goes to both the member photo and the post).
+    """
+    data = staged_path(staged.file_name).read_bytes()
+    if rotation_degrees:
+        try:
+            data = rotate_image_bytes(data, rotation_degrees)
+        except (UnidentifiedImageError, OSError, ValueError):
+            logger.warning(f'[STAGE] 회전 실패, 원래 방향 유지: {staged.original_name}')
+    return ContentFile(data, name=f'{Path(staged.original_name).stem}{Path(staged.file_name).suffix}')
+
+
+def staged_video_file(staged):
+    """The processed video, moved (not copied) into MEDIA_ROOT when saved."""
+    suffix = Path(staged.file_name).suffix.lower() or '.mp4'
+    return TemporaryPathFile(str(staged_path(staged.file_name)), f'{Path(staged.original_name).stem}{suffix}')
+
+
+def staged_poster_file(staged):
+    if not staged.poster_name:
+        return None
+    return ContentFile(staged_path(staged.poster_name).read_bytes(), name=f'{Path(staged.original_name).stem}_thumb.jpg')
+
+
+def discard_staged_media(staged_items):
+    """Delete the rows and whatever files were not moved into MEDIA_ROOT."""
+    staged_ids = []
+    for staged in staged_items:
+        # 처리 전 원본, 처리 결과, 동영상 대표 이미지가 모두 id 로 시작한다.
+        for leftover in staging_dir().glob(f'{staged.pk}*'):
+            _remove_file(leftover)
+        staged_ids.append(staged.pk)
+    if staged_ids:
+        StagedMedia.objects.filter(pk__in=staged_ids).delete()
+
+
+def purge_stale_staged_media(max_age=None):
+    """Remove staged files nobody attached within ``max_age``. Returns the row count."""
+    if max_age is None:
+        max_age = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_MAX_AGE_HOURS', 24))
+    stale = list(StagedMedia.objects.filter(updated_at__lt=timezone.now() - max_age))
+    discard_staged_media(stale)
+    return len(stale)
+
@@ -0,0 +1,56 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import FamilyPost, Tag
+from .tag_trie import invalidate_tag_trie
+
+
+def refresh_tag_post_counts(tag_ids):
+    """Recompute ``Tag.post_count`` for ``tag_ids`` from the through table in one UPDATE."""
+    tag_ids = set(tag_ids or ())
+    if not tag_ids:
+        return
+    through = FamilyPost.tags.through
+    post_count = (
+        through.objects.filter(tag_id=OuterRef('pk'))
+        .values('tag_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Tag.objects.filter(pk__in=tag_ids).update(post_count=Coalesce(Subquery(post_count), 0))
+    invalidate_tag_trie()
+
+
+def resolve_tags(names):
+    """Return ``Tag`` rows for ``names`` in order, creating the missing ones with one bulk insert.
+
+    Names that differ only in case count as one tag. Both the input and the names the database
+    returns are keyed by ``casefold()``, so a row found through MariaDB's case-insensitive
+    collation is matched to the name that asked for it instead of being inserted again.
+    """
+    wanted = {}
+    for name in names:
+        if name and name.casefold() not in wanted:
+            wanted[name.casefold()] = name
+    if not wanted:
+        return []
+
+    tags = {tag.name.casefold(): tag for tag in Tag.objects.filter(name__in=wanted.values())}
+    missing = [name for key, name in wanted.items() if key not in tags]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update({tag.name.casefold(): tag for tag in Tag.objects.filter(name__in=missing)})
+    return [tags[key] for key in wanted if key in tags]
+
+
+def sync_post_tags(post, names):
+    """Make ``post.tags`` equal to ``names``, touching only the through rows that differ."""
+    tag_ids = {tag.pk for tag in resolve_tags(names)}
+    current_ids = set(FamilyPost.tags.through.objects.filter(familypost_id=post.pk).values_list('tag_id', flat=True))
+
+    removed_ids = current_ids - tag_ids
+    added_ids = tag_ids - current_ids
+    if removed_ids:
+        post.tags.remove(*removed_ids)
+    if added_ids:
+        post.tags.add(*added_ids)
@@ -0,0 +1,163 @@
+"""Per-worker prefix trie over tag names for autocomplete.
+
+Every tag is reachable by its lowercase name, by its Hangul jamo sequence (so ``가조`` typed
+mid-composition still finds ``가족``) and by its initial consonants (``ㄱㅈ``). Each node keeps
+its top tags by post count, so a lookup only walks the prefix.
+"""
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Tag
+
+
+TAG_TRIE_VERSION_KEY = 'posts:tag-trie:version'
+TOP_TAGS_PER_NODE = 10
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSEONG = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+             'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+# 겹받침/겹모음은 입력 중에 낱자로 들어오므로 낱자로 풀어서 색인한다.
+COMPOUND_JAMO = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+
+
+def _split_compound(jamo):
+    return COMPOUND_JAMO.get(jamo, jamo)
+
+
+def decompose_hangul(text):
+    """Return ``text`` with every Hangul syllable spelled out as compatibility jamo."""
+    letters = []
+    for char in text:
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            letters.append(CHOSEONG[offset // 588])
+            letters.append(_split_compound(JUNGSEONG[(offset % 588) // 28]))
+            letters.append(_split_compound(JONGSEONG[offset % 28]))
+        else:
+            letters.append(_split_compound(char))
+    return ''.join(letters)
+
+
+def initial_consonants(text):
+    initials = []
+    for char in text:
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            initials.append(CHOSEONG[(code - HANGUL_BASE) // 588])
+        else:
+            initials.append(char)
+    return ''.join(initials)
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFC', text or '').strip().lower()
+
+
+def lookup_keys(name):
+    normalized = _normalize(name)
+    return {normalized, decompose_hangul(normalized), initial_consonants(normalized)}
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+class TagTrie:
+    def __init__(self, tags):
+        """``tags`` is an iterable of ``(name, post_count)`` pairs."""
+        self._root = _Node()
+        ranked = sorted(tags, key=lambda tag: (-tag[1], tag[0]))
+        for rank, (name, post_count) in enumerate(ranked):
+            for key in lookup_keys(name):
+                self._insert(key, rank, name, post_count)
+
+    def _insert(self, key, rank, name, post_count):
+        # 이름을 순위순으로 넣으므로 각 노드의 top 은 자동으로 정렬되고, 가득 차면 더 넣지 않는다.
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            top = node.top
+            if len(top) < TOP_TAGS_PER_NODE and (not top or top[-1][0] != rank):
+                top.append((rank, name, post_count))
+
+    def suggest(self, prefix, limit=TOP_TAGS_PER_NODE):
+        seen = set()
+        candidates = []
+        normalized = _normalize(prefix)
+        # 초성만 입력한 경우는 그대로 초성 키와 맞고, 완성된 글자의 초성까지 넓혀 찾지는 않는다.
+        for key in (normalized, decompose_hangul(normalized)):
+            if not key:
+                continue
+            node = self._root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            else:
+                for rank, name, post_count in node.top:
+                    if name not in seen:
+                        seen.add(name)
+                        candidates.append((rank, name, post_count))
+        candidates.sort()
+        return [{'name': name, 'post_count': post_count} for _, name, post_count in candidates[:limit]]
+
+
+_lock = threading.Lock()
+_cached = {'version': None, 'trie': None, 'checked_at': None}
+
+
+def get_tag_trie():
+    """Return this worker's trie, rebuilding it when another process bumped the shared version.
+
+    The shared version lives in the file cache, so it is read at most once every
+    ``TAG_TRIE_VERSION_CHECK_SECONDS`` per worker instead of on every keystroke. Changes
+    committed in this worker are picked up at once.
+    """
+    now = time.monotonic()
+    trie = _cached['trie']
+    checked_at = _cached['checked_at']
+    check_seconds = getattr(settings, 'TAG_TRIE_VERSION_CHECK_SECONDS', 5)
+    if trie is not None and checked_at is not None and now - checked_at < check_seconds:
+        return trie
+
+    version = cache.get_or_set(TAG_TRIE_VERSION_KEY, 1, timeout=None)
+    if trie is not None and _cached['version'] == version:
+        _cached['checked_at'] = now
+        return trie
+
+    with _lock:
+        if _cached['trie'] is None or _cached['version'] != version:
+            _cached['trie'] = TagTrie(Tag.objects.filter(post_count__gt=0).values_list('name', 'post_count'))
+            _cached['version'] = version
+        _cached['checked_at'] = now
+        return _cached['trie']
+
+
+def _bump_tag_trie_version():
+    try:
+        cache.incr(TAG_TRIE_VERSION_KEY)
+    except ValueError:
+        cache.set(TAG_TRIE_VERSION_KEY, 1, timeout=None)
+    # 이 워커에서 바꾼 태그는 확인 간격을 기다리지 않고 다음 요청에서 바로 반영한다.
+    _cached['checked_at'] = None
+
+
+def invalidate_tag_trie():
+    transaction.on_commit(_bump_tag_trie_version)
@@ -0,0 +1,46 @@
+from django import template
+
+from posts.image_service import RENDITION_MIME_TYPES, load_renditions
+
+
+register = template.Library()
+
+RENDITIONS_CONTEXT_KEY = 'image_renditions'
+
+
+def _renditions_for(context, source_name):
+    renditions = context.get(RENDITIONS_CONTEXT_KEY)
+    if renditions is None:
+        # 뷰에서 미리 불러오지 않은 페이지는 렌더링 한 번 동안만 개별 조회 결과를 재사용한다.
+        renditions = context.render_context.setdefault(RENDITIONS_CONTEXT_KEY, {})
+        if source_name not in renditions:
+            renditions[source_name] = load_renditions([source_name]).get(source_name, {})
+    return renditions.get(source_name) or {}
+
+
+def _srcset(candidates):
+    return ', '.join(f'{url} {width}w' for width, url in candidates)
+
+
+@register.inclusion_tag('posts/_responsive_image.html', takes_context=True)
+def responsive_image(context, image_field, alt='', css_class='', sizes='100vw', loading='lazy'):
+    source_name = getattr(image_field, 'name', '') if image_field else ''
+    renditions = _renditions_for(context, source_name) if source_name else {}
+    jpeg_candidates = renditions.get('jpeg', [])
+
+    sources = [
+        {'type': RENDITION_MIME_TYPES[image_format], 'srcset': _srcset(candidates)}
+        for image_format, candidates in renditions.items()
+        if image_format != 'jpeg' and candidates
+    ]
+    sources.sort(key=lambda source: list(RENDITION_MIME_TYPES.values()).index(source['type']))
+
+    return {
+        'src': image_field.url if source_name else '',
+        'srcset': _srcset(jpeg_candidates),
+        'sources': sources,
+        'sizes': sizes,
+        'alt': alt,
+        'css_class': css_class,
+        'loading': loading,
+    }
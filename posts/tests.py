@@ -1,12 +1,39 @@
+from unittest import mock
+import os
+import pickle
+import re
+import shutil
+import tempfile
+
 from django.contrib.auth.models import User
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
 from django.core import mail
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.db import connection
 from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from PIL import Image, ImageOps
 
-from .models import FamilyPost
+from . import comment_service, counter_service, front_page, gallery_service, image_pipeline, image_rotation, image_service, newspaper_jobs, newspaper_service, profiles, related_service, search_memory, search_service, staging_service, tag_service, tag_trie, upload_service, video_service, views
+from .management.commands import explain_hot_queries
+from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo, ImageRendition, NewspaperRegenerationJob, QuarterlyNewspaper, RelatedPost, StagedMedia, Tag, UploadSession
 from .notifications import send_new_post_notification, send_signup_request_notification
 
 
+def _skip_related_refresh(test_case):
+	# 연관 기사 갱신은 커밋 뒤 별도 스레드에서 돌아 테스트 DB 를 잠그므로, 커밋 콜백을 실행하는 테스트에서는 예약하지 않는다.
+	patcher = mock.patch('posts.signals.schedule_related_refresh')
+	patcher.start()
+	test_case.addCleanup(patcher.stop)
+
+
 @override_settings(
 	EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
 	DEFAULT_FROM_EMAIL='no-reply@test.local',
@@ -75,3 +102,1324 @@ class NotificationEmailTests(TestCase):
 		self.assertEqual(mimetype, 'text/html')
 		self.assertIn('<img', html_body)
 		self.assertIn('/posts/', html_body)
+
+
+class QuarterlyNewspaperSyncTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='봄 소풍', content='즐거운 하루', main_image='family_photos/a.jpg', author=self.author)
+		self.year, self.quarter = newspaper_service.get_year_quarter(self.post.created_at)
+
+	def test_unchanged_quarter_is_not_rebuilt(self):
+		with mock.patch.object(newspaper_service, '_build_issue_pdf', return_value=b'%PDF-1.4') as build_pdf:
+			first_issue = newspaper_service.generate_quarterly_newspaper(self.year, self.quarter)
+			second_issue = newspaper_service.generate_quarterly_newspaper(self.year, self.quarter)
+
+		self.assertEqual(build_pdf.call_count, 1)
+		self.assertEqual(first_issue.pk, second_issue.pk)
+		self.assertTrue(second_issue.content_fingerprint)
+
+	def test_changed_post_or_force_rebuilds_quarter(self):
+		with mock.patch.object(newspaper_service, '_build_issue_pdf', return_value=b'%PDF-1.4') as build_pdf:
+			newspaper_service.generate_quarterly_newspaper(self.year, self.quarter)
+			FamilyPost.objects.filter(pk=self.post.pk).update(title='가을 소풍')
+			newspaper_service.generate_quarterly_newspaper(self.year, self.quarter)
+			newspaper_service.generate_quarterly_newspaper(self.year, self.quarter, force=True)
+
+		self.assertEqual(build_pdf.call_count, 3)
+		self.assertEqual(QuarterlyNewspaper.objects.count(), 1)
+
+	@override_settings(TIME_ZONE='Asia/Seoul')
+	def test_quarter_boundaries_follow_local_time(self):
+		# 서울 4월 1일 새벽 1시는 UTC 로는 아직 3월 31일이다.
+		created_at = timezone.make_aware(datetime(2026, 4, 1, 1, 0))
+		FamilyPost.objects.filter(pk=self.post.pk).update(created_at=created_at)
+
+		self.assertEqual(newspaper_service.get_year_quarter(created_at), (2026, 2))
+		self.assertEqual(list(newspaper_service.quarter_posts_queryset(2026, 2)), [self.post])
+		self.assertFalse(newspaper_service.quarter_posts_queryset(2026, 1).exists())
+		summaries = newspaper_service.quarter_summaries()
+		self.assertEqual(
+			[(row['year'], row['quarter'], row['post_count']) for row in summaries],
+			[(2026, 2, 1)],
+		)
+
+	def test_sync_generates_live_quarters_and_drops_stale_issues(self):
+		QuarterlyNewspaper.objects.create(year=2001, quarter=1, title='지난 신문', pdf_file='newspapers/2001/q1/old.pdf')
+
+		with mock.patch.object(newspaper_service, 'REPORTLAB_READY', True), \
+			mock.patch.object(newspaper_service, '_build_issue_pdf', return_value=b'%PDF-1.4'):
+			generated = newspaper_service.sync_all_quarterly_newspapers()
+
+		self.assertEqual([(issue.year, issue.quarter) for issue in generated], [(self.year, self.quarter)])
+		self.assertEqual(list(QuarterlyNewspaper.objects.values_list('year', 'quarter')), [(self.year, self.quarter)])
+
+	def test_newspaper_hall_does_not_generate_pdfs(self):
+		self.client.force_login(self.author)
+		with mock.patch.object(newspaper_service, '_build_issue_pdf') as build_pdf:
+			response = self.client.get('/newspapers/')
+
+		self.assertEqual(response.status_code, 200)
+		build_pdf.assert_not_called()
+
+
+@override_settings(NEWSPAPER_JOB_DEBOUNCE_SECONDS=0)
+class NewspaperRegenerationJobTests(TestCase):
+	def setUp(self):
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+
+	def test_post_saves_are_coalesced_into_one_job(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			post = FamilyPost.objects.create(title='첫 기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+		with self.captureOnCommitCallbacks(execute=True):
+			post.title = '수정된 기사'
+			post.save()
+
+		job = NewspaperRegenerationJob.objects.get()
+		self.assertEqual(job.status, NewspaperRegenerationJob.STATUS_PENDING)
+		self.assertEqual(job.request_count, 2)
+
+		with mock.patch.object(newspaper_jobs, 'generate_quarterly_newspaper') as generate:
+			processed = newspaper_jobs.run_due_jobs()
+
+		self.assertEqual(processed, 1)
+		generate.assert_called_once_with(job.year, job.quarter)
+		job.refresh_from_db()
+		self.assertEqual(job.status, NewspaperRegenerationJob.STATUS_DONE)
+		self.assertIsNotNone(job.last_duration_ms)
+
+	def test_failed_job_records_error_and_is_retried(self):
+		newspaper_jobs.enqueue_quarter_regeneration(2026, 1)
+
+		with mock.patch.object(newspaper_jobs, 'generate_quarterly_newspaper', side_effect=RuntimeError('boom')):
+			newspaper_jobs.run_due_jobs()
+
+		job = NewspaperRegenerationJob.objects.get()
+		self.assertEqual(job.status, NewspaperRegenerationJob.STATUS_PENDING)
+		self.assertEqual(job.attempts, 1)
+		self.assertIn('boom', job.last_error)
+		self.assertGreater(job.run_after, job.finished_at)
+
+
+class BackgroundVideoTranscodeTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root, FFMPEG_LOCK_DIR=self.media_root)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='영상 기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+
+	def _create_processing_video(self):
+		return FamilyPostVideo.objects.create(
+			post=self.post,
+			video=SimpleUploadedFile('clip.mov', b'original-bytes', content_type='video/quicktime'),
+			status=FamilyPostVideo.STATUS_PROCESSING,
+		)
+
+	def test_transcode_replaces_original_and_marks_ready(self):
+		video_item = self._create_processing_video()
+		original_name = video_item.video.name
+		with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4', dir=self.media_root) as output:
+			output.write(b'compressed-bytes')
+		compressed = video_service.TemporaryPathFile(output.name, 'clip.mp4')
+
+		with mock.patch.object(video_service, 'transcode_video_file', return_value=(compressed, None)):
+			self.assertTrue(video_service.process_video_transcode(video_item.pk))
+
+		video_item.refresh_from_db()
+		self.assertEqual(video_item.status, FamilyPostVideo.STATUS_READY)
+		self.assertTrue(video_item.video.name.endswith('.mp4'))
+		self.assertFalse(video_item.video.storage.exists(original_name))
+		# 결과 파일은 읽어서 복사하지 않고 MEDIA_ROOT 안으로 옮겨진다.
+		self.assertFalse(os.path.exists(output.name))
+		with video_item.video.open('rb') as stored:
+			self.assertEqual(stored.read(), b'compressed-bytes')
+
+	def test_failed_transcode_keeps_original(self):
+		video_item = self._create_processing_video()
+		original_name = video_item.video.name
+
+		with mock.patch.object(video_service, 'transcode_video_file', return_value=(None, '변환 실패')):
+			self.assertFalse(video_service.process_video_transcode(video_item.pk))
+
+		video_item.refresh_from_db()
+		self.assertEqual(video_item.status, FamilyPostVideo.STATUS_FAILED)
+		self.assertEqual(video_item.video.name, original_name)
+		self.assertTrue(video_item.video.storage.exists(original_name))
+
+
+class VideoTranscodePlanTests(TestCase):
+	def _probe(self, **overrides):
+		probe = {
+			'video_codec': 'h264',
+			'pix_fmt': 'yuv420p',
+			'audio_codec': 'aac',
+			'width': 1080,
+			'height': 1920,
+			'duration': 30.0,
+			'bit_rate': 5_000_000,
+		}
+		probe.update(overrides)
+		return probe
+
+	def test_compliant_clip_is_remuxed(self):
+		plan = video_service.choose_transcode_plan(self._probe(), 20 * 1024 * 1024)
+		self.assertEqual(plan['mode'], 'remux')
+		self.assertIn('copy', plan['args'])
+		self.assertIn('+faststart', plan['args'])
+
+	def test_non_aac_audio_only_reencodes_audio(self):
+		plan = video_service.choose_transcode_plan(self._probe(audio_codec='opus'), 20 * 1024 * 1024)
+		self.assertEqual(plan['mode'], 'audio')
+
+	def test_hevc_clip_gets_single_bitrate_encode(self):
+		plan = video_service.choose_transcode_plan(self._probe(video_codec='hevc', width=3840), 150 * 1024 * 1024)
+		self.assertEqual(plan['mode'], 'bitrate')
+		self.assertIn('-b:v', plan['args'])
+
+	def test_unknown_probe_falls_back_to_crf_ladder(self):
+		self.assertEqual(video_service.choose_transcode_plan(None, 1024)['mode'], 'ladder')
+		self.assertEqual(video_service.choose_transcode_plan(self._probe(video_codec='hevc', duration=None), 1024)['mode'], 'ladder')
+
+
+class VideoIngestTests(TestCase):
+	def test_in_memory_upload_is_spooled_once_and_removed(self):
+		uploaded = SimpleUploadedFile('clip.mp4', b'video-bytes', content_type='video/mp4')
+		with video_service.VideoIngest(uploaded) as video_source:
+			first_path = video_source.path
+			self.assertEqual(video_source.path, first_path)
+			self.assertEqual(os.path.dirname(first_path), str(video_service.media_work_dir()))
+			with open(first_path, 'rb') as spooled:
+				self.assertEqual(spooled.read(), b'video-bytes')
+
+		self.assertFalse(os.path.exists(first_path))
+
+	def test_temporary_upload_path_is_reused(self):
+		uploaded = TemporaryUploadedFile('clip.mp4', 'video/mp4', 11, None)
+		uploaded.write(b'video-bytes')
+		uploaded.flush()
+		self.addCleanup(uploaded.close)
+
+		with video_service.VideoIngest(uploaded) as video_source:
+			self.assertEqual(video_source.path, uploaded.temporary_file_path())
+
+		self.assertTrue(os.path.exists(uploaded.temporary_file_path()))
+
+
+@override_settings(IMAGE_RENDITION_FORMATS=('webp', 'jpeg'))
+class ImageRenditionTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+
+		buffer = BytesIO()
+		Image.new('RGB', (1000, 500), 'green').save(buffer, format='JPEG')
+		self.source_name = default_storage.save('family_photos/wide.jpg', ContentFile(buffer.getvalue()))
+
+	def test_generates_each_width_below_source_in_every_format(self):
+		self.assertEqual(image_service.generate_renditions(self.source_name), 8)
+		self.assertEqual(image_service.generate_renditions(self.source_name), 0)
+
+		widths = set(ImageRendition.objects.filter(format='webp').values_list('width', flat=True))
+		# 1280보다 작은 원본은 원래 너비가 가장 큰 파생본이 된다.
+		self.assertEqual(widths, {240, 480, 960, 1000})
+		rendition = ImageRendition.objects.get(format='jpeg', width=480)
+		with Image.open(rendition.file.path) as image:
+			self.assertEqual(image.size, (480, 240))
+
+	def test_responsive_image_tag_emits_srcset(self):
+		image_service.generate_renditions(self.source_name)
+		post = FamilyPost(title='사진', content='본문', main_image=self.source_name)
+
+		html = Template('{% load media_tags %}{% responsive_image post.main_image alt="사진" sizes="50vw" %}').render(
+			Context({'post': post, 'image_renditions': image_service.load_renditions([self.source_name])})
+		)
+
+		self.assertIn('<source type="image/webp"', html)
+		self.assertIn('_960.webp 960w', html)
+		self.assertIn('_240.jpg 240w', html)
+		self.assertIn('sizes="50vw"', html)
+		self.assertIn(f'src="/media/{self.source_name}"', html)
+
+	def test_only_saves_that_change_the_photo_schedule_renditions(self):
+		author = User.objects.create_user(username='writer', password='test-pass-1234')
+		with mock.patch('posts.signals.schedule_renditions') as schedule:
+			post = FamilyPost.objects.create(title='사진', content='본문', main_image=self.source_name, author=author)
+			self.assertEqual(schedule.call_count, 1)
+
+			post = FamilyPost.objects.get(pk=post.pk)
+			post.title = '제목만 수정'
+			post.save()
+			self.assertEqual(schedule.call_count, 1)
+
+			post.main_image = 'family_photos/other.jpg'
+			post.save()
+			post.content = '본문만 수정'
+			post.save()
+
+		self.assertEqual(schedule.call_count, 2)
+		self.assertEqual(schedule.call_args.args[0].name, 'family_photos/other.jpg')
+
+	def test_replaced_or_deleted_photo_drops_its_renditions(self):
+		_skip_related_refresh(self)
+		author = User.objects.create_user(username='writer', password='test-pass-1234')
+		post = FamilyPost.objects.create(title='사진', content='본문', main_image=self.source_name, author=author)
+		image_service.generate_renditions(self.source_name)
+		rendition_path = ImageRendition.objects.filter(source_name=self.source_name).first().file.path
+
+		with mock.patch('posts.signals.schedule_renditions'), self.captureOnCommitCallbacks(execute=True):
+			post.main_image = 'family_photos/other.jpg'
+			post.save()
+		self.assertFalse(ImageRendition.objects.filter(source_name=self.source_name).exists())
+		self.assertFalse(os.path.exists(rendition_path))
+
+		image_service.generate_renditions(self.source_name)
+		FamilyPostImage.objects.create(post=post, image=self.source_name)
+		with self.captureOnCommitCallbacks(execute=True):
+			post.delete()
+		self.assertFalse(ImageRendition.objects.filter(source_name=self.source_name).exists())
+
+		image_service.generate_renditions(self.source_name)
+		# 대표 사진으로 승격된 추가 사진처럼 다른 행이 아직 쓰는 이름이면 남겨 둔다.
+		other_post = FamilyPost.objects.create(title='다른 기사', content='본문', main_image=self.source_name, author=author)
+		extra = FamilyPostImage.objects.create(post=other_post, image=self.source_name)
+		with self.captureOnCommitCallbacks(execute=True):
+			extra.delete()
+		self.assertTrue(ImageRendition.objects.filter(source_name=self.source_name).exists())
+
+
+class PhotoGalleryPaginationTests(TestCase):
+	def setUp(self):
+		author = User.objects.create_user(username='writer', password='test-pass-1234')
+		base = timezone.now()
+		for index in range(3):
+			post = FamilyPost.objects.create(title=f'기사 {index}', content='본문', main_image=f'family_photos/{index}.jpg', author=author)
+			FamilyPostImage.objects.create(post=post, image=f'family_posts/multi/{index}.jpg')
+			FamilyPostImage.objects.create(post=post, image=f'family_posts/multi/{index}-b.jpg')
+			# 대표 사진과 추가 사진 중 일부가 같은 시각을 갖도록 해서 종류/id 순서까지 확인한다.
+			FamilyPost.objects.filter(pk=post.pk).update(created_at=base - timedelta(hours=index))
+			post.images.update(created_at=base - timedelta(hours=index))
+
+	def _walk(self, page_size):
+		names = []
+		page = gallery_service.load_gallery_page(page_size=page_size)
+		pages = [page]
+		while page['next_cursor']:
+			names.extend(item['image'].name for item in page['items'])
+			page = gallery_service.load_gallery_page(before=page['next_cursor'], page_size=page_size)
+			pages.append(page)
+		names.extend(item['image'].name for item in page['items'])
+		return names, pages
+
+	def test_keyset_pages_cover_every_photo_once_in_order(self):
+		names, pages = self._walk(page_size=4)
+
+		self.assertEqual(len(names), 9)
+		self.assertEqual(len(set(names)), 9)
+		self.assertEqual(names[:3], ['family_posts/multi/0-b.jpg', 'family_posts/multi/0.jpg', 'family_photos/0.jpg'])
+		self.assertIsNone(pages[0]['previous_cursor'])
+
+		previous = gallery_service.load_gallery_page(after=pages[1]['previous_cursor'], page_size=4)
+		self.assertEqual(
+			[item['image'].name for item in previous['items']],
+			[item['image'].name for item in pages[0]['items']],
+		)
+		self.assertIsNone(previous['previous_cursor'])
+
+	def test_page_cost_does_not_depend_on_photo_count(self):
+		with self.assertNumQueries(2):
+			page = gallery_service.load_gallery_page(page_size=4)
+		with self.assertNumQueries(2):
+			gallery_service.load_gallery_page(before=page['next_cursor'], page_size=4)
+
+	def test_invalid_cursor_falls_back_to_first_page(self):
+		page = gallery_service.load_gallery_page(before='not-a-cursor', page_size=4)
+		self.assertEqual(page['items'][0]['image'].name, 'family_posts/multi/0-b.jpg')
+
+	def test_out_of_range_cursor_falls_back_to_first_page(self):
+		self.assertIsNone(gallery_service.decode_cursor('99999999999999999999.0.1'))
+
+		self.client.force_login(User.objects.get(username='writer'))
+		response = self.client.get('/gallery/', {'before': '99999999999999999999.0.1'})
+		self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'front-page-tests'}})
+class FrontPageSnapshotTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.posts = [
+			FamilyPost.objects.create(title=f'기사 {index}', content='본문', main_image=f'family_photos/{index}.jpg', author=self.author)
+			for index in range(12)
+		]
+
+	def _refresh(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			pass
+
+	def test_snapshot_holds_only_the_rendered_rows_and_is_reused(self):
+		self._refresh()
+		with self.assertNumQueries(2):
+			snapshot = front_page.load_front_page()
+		with self.assertNumQueries(0):
+			front_page.load_front_page()
+
+		self.assertEqual(snapshot['hero_post']['pk'], self.posts[-1].pk)
+		self.assertEqual(snapshot['hero_post']['main_image'].url, '/media/family_photos/11.jpg')
+		self.assertEqual(len(snapshot['story_posts']), front_page.FRONT_PAGE_STORY_COUNT)
+
+	def test_snapshot_caches_plain_values_without_user_rows(self):
+		self._refresh()
+		front_page.load_front_page()
+
+		version = cache.get(front_page.FRONT_PAGE_VERSION_KEY)
+		cached = pickle.dumps(cache.get(front_page._snapshot_key(version)))
+		self.assertNotIn(self.author.password.encode(), cached)
+		self.assertNotIn(b'django.contrib.auth', cached)
+		self.assertNotIn(b'posts.models', cached)
+
+	def test_new_comment_invalidates_snapshot(self):
+		self._refresh()
+		front_page.load_front_page()
+
+		with self.captureOnCommitCallbacks(execute=True):
+			FamilyPostComment.objects.create(post=self.posts[-1], author=self.author, content='축하해요')
+
+		self.assertEqual(front_page.load_front_page()['hero_post']['comment_count'], 1)
+
+	def test_home_view_reads_snapshot(self):
+		self._refresh()
+		self.client.force_login(self.author)
+		self.client.get('/')
+		with mock.patch.object(front_page, '_build_front_page') as build:
+			response = self.client.get('/')
+		build.assert_not_called()
+		self.assertEqual(len(response.context['post_items']), front_page.FRONT_PAGE_STORY_COUNT)
+
+
+class ProfileQueryBudgetTests(TestCase):
+	def setUp(self):
+		_skip_related_refresh(self)
+		# bihong 관리자 계정은 마이그레이션에서 만들어진다.
+		self.admin = User.objects.get(username='bihong')
+		FamilyMemberProfile.objects.update_or_create(user=self.admin, defaults={'emoji': '😀'})
+		tag = Tag.objects.create(name='가족')
+		with self.captureOnCommitCallbacks(execute=True):
+			for index in range(6):
+				author = User.objects.create_user(username=f'writer{index}', password='test-pass-1234')
+				if index % 2:
+					FamilyMemberProfile.objects.create(user=author, emoji='🎉')
+				post = FamilyPost.objects.create(title=f'기사 {index}', content='가족 나들이', main_image=f'family_photos/{index}.jpg', author=author)
+				post.tags.add(tag)
+				FamilyPostImage.objects.create(post=post, image=f'family_posts/multi/{index}.jpg')
+		self.client.force_login(self.admin)
+
+	def test_resolver_loads_missing_profiles_in_one_query(self):
+		authors = list(User.objects.exclude(username='bihong'))
+		resolver = profiles.ProfileResolver()
+		with self.assertNumQueries(1):
+			resolver.prime(authors)
+			emojis = [resolver.emoji(author) for author in authors]
+		self.assertEqual(emojis.count('🎉'), 3)
+		self.assertEqual(emojis.count(profiles.DEFAULT_EMOJI), 3)
+
+	def test_gallery_query_budget(self):
+		# 세션, 사용자, UNION 페이지, 기사+작성자+프로필, 파생본
+		with self.assertNumQueries(5):
+			response = self.client.get('/gallery/')
+		self.assertEqual(len(response.context['gallery_items']), 12)
+
+	def test_search_query_budget(self):
+		# 세션, 사용자, 개수, 결과+작성자+프로필, 태그 prefetch, 파생본
+		with self.assertNumQueries(6):
+			response = self.client.get('/search/', {'q': '가족'})
+		self.assertEqual(len(response.context['result_items']), 6)
+
+	def test_member_management_query_budget(self):
+		# 세션, 사용자, 구성원+프로필
+		with self.assertNumQueries(3):
+			response = self.client.get('/members/')
+		self.assertEqual(len(response.context['member_items']), 6)
+
+
+class PostSearchIndexTests(TestCase):
+	def setUp(self):
+		_skip_related_refresh(self)
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+
+	def _create_post(self, title, content, tags=()):
+		with self.captureOnCommitCallbacks(execute=True):
+			post = FamilyPost.objects.create(title=title, content=content, main_image='family_photos/a.jpg', author=self.author)
+			post.tags.set([Tag.objects.get_or_create(name=name)[0] for name in tags])
+		return post
+
+	def _search(self, query, **kwargs):
+		return list(search_service.search_posts(query, **kwargs).values_list('pk', flat=True))
+
+	def test_tokenize_uses_hangul_bigrams(self):
+		self.assertEqual(search_service.tokenize('가족나들이 Trip 꽃'), ['가족', '족나', '나들', '들이', 'tr', 'ri', 'ip', '꽃'])
+
+	def test_substring_queries_match_through_bigram_index(self):
+		outing = self._create_post('봄 소풍', '한강 공원에서 도시락을 먹었다', tags=['가족나들이'])
+		self._create_post('생일', '케이크를 먹었다', tags=['생일'])
+
+		self.assertEqual(self._search('나들이'), [outing.pk])
+		self.assertEqual(self._search('한강'), [])
+		self.assertEqual(self._search('한강', include_content=True), [outing.pk])
+
+	def test_index_follows_tag_changes(self):
+		post = self._create_post('여름', '바다', tags=['휴가'])
+		with self.captureOnCommitCallbacks(execute=True):
+			post.tags.set([Tag.objects.create(name='캠핑')])
+
+		self.assertEqual(self._search('휴가'), [])
+		self.assertEqual(self._search('캠핑'), [post.pk])
+
+	def test_relevance_prefers_tag_matches_and_repeated_terms(self):
+		content_only = self._create_post('일상', '운동회 이야기', tags=['학교'])
+		tagged = self._create_post('가을', '운동회 운동회 운동회', tags=['운동회'])
+
+		self.assertEqual(self._search('운동회', include_content=True, sort='relevance'), [tagged.pk, content_only.pk])
+
+	def test_upload_with_tags_indexes_the_post_once(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+		buffer = BytesIO()
+		Image.new('RGB', (400, 300), (120, 160, 200)).save(buffer, format='JPEG')
+		self.client.force_login(self.author)
+
+		with (
+			override_settings(MEDIA_ROOT=media_root, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'),
+			mock.patch.object(search_service, '_index_post_by_id') as index,
+			mock.patch('posts.background.get_executor'),
+			self.captureOnCommitCallbacks(execute=True),
+		):
+			response = self.client.post('/upload-photo/', {
+				'caption': '봄 소풍',
+				'tags': '가족, 소풍',
+				'main_image_index': '0',
+				'images': SimpleUploadedFile('a.jpg', buffer.getvalue(), content_type='image/jpeg'),
+			})
+
+		self.assertEqual(response.status_code, 302)
+		index.assert_called_once_with(FamilyPost.objects.get().pk)
+
+
+class InProcessSearchIndexTests(TestCase):
+	def setUp(self):
+		_skip_related_refresh(self)
+		work_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, work_dir, ignore_errors=True)
+		search_override = override_settings(
+			SEARCH_IN_PROCESS_INDEX=True,
+			SEARCH_SNAPSHOT_PATH=os.path.join(work_dir, 'search-index.bin'),
+			SEARCH_CHANGELOG_POLL_SECONDS=0,
+		)
+		search_override.enable()
+		self.addCleanup(search_override.disable)
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+
+	def _create_post(self, title, tags=()):
+		with self.captureOnCommitCallbacks(execute=True):
+			post = FamilyPost.objects.create(title=title, content='본문', main_image='family_photos/a.jpg', author=self.author)
+			post.tags.set([Tag.objects.get_or_create(name=name)[0] for name in tags])
+		return post
+
+	def test_galloping_intersect(self):
+		large = list(range(0, 1000, 3))
+		self.assertEqual(search_memory.galloping_intersect([3, 4, 300, 999, 2000], large), [3, 300, 999])
+		self.assertEqual(search_memory.galloping_intersect([], large), [])
+
+	def test_snapshot_matches_and_follows_change_log(self):
+		outing = self._create_post('가족 나들이', tags=['봄소풍'])
+		self._create_post('생일 잔치')
+		search_memory.write_snapshot()
+		index = search_memory.InProcessSearchIndex()
+		tokens = search_service.query_tokens('나들이')
+
+		self.assertEqual(index.match(tokens), [outing.pk])
+
+		later = self._create_post('바다 나들이')
+		with self.captureOnCommitCallbacks(execute=True):
+			outing.title = '가족 여행'
+			outing.save()
+
+		self.assertEqual(index.match(tokens), [later.pk])
+
+		later.delete()
+		self.assertEqual(index.match(tokens), [])
+
+	def test_search_posts_uses_snapshot_for_latest_sort(self):
+		post = self._create_post('운동회')
+		search_memory.write_snapshot()
+
+		with mock.patch.object(search_service, 'match_post_ids', wraps=search_service.match_post_ids) as match:
+			result = list(search_service.search_posts('운동회'))
+
+		match.assert_called_once()
+		self.assertEqual(result, [post])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tag-trie-tests'}})
+class TagAutocompleteTests(TestCase):
+	def setUp(self):
+		_skip_related_refresh(self)
+		cache.clear()
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+
+	def _create_post(self, tags):
+		with self.captureOnCommitCallbacks(execute=True):
+			post = FamilyPost.objects.create(title='기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+			post.tags.set([Tag.objects.get_or_create(name=name)[0] for name in tags])
+		return post
+
+	def test_trie_matches_partial_syllables_and_initials(self):
+		trie = tag_trie.TagTrie([('가족', 5), ('가족여행', 9), ('강아지', 2), ('Beach', 1)])
+
+		self.assertEqual([tag['name'] for tag in trie.suggest('가족')], ['가족여행', '가족'])
+		# 입력 중인 '가조'(ㄱㅏㅈㅗ)도 '가족'의 앞부분으로 찾는다.
+		self.assertEqual([tag['name'] for tag in trie.suggest('가조')], ['가족여행', '가족'])
+		self.assertEqual([tag['name'] for tag in trie.suggest('ㄱㅇ')], ['강아지'])
+		self.assertEqual([tag['name'] for tag in trie.suggest('bea')], ['Beach'])
+
+	def test_post_counts_follow_tag_changes_and_deletes(self):
+		first = self._create_post(['바다', '여름'])
+		self._create_post(['바다'])
+		with self.captureOnCommitCallbacks(execute=True):
+			first.tags.set([Tag.objects.get(name='바다')])
+
+		self.assertEqual(dict(Tag.objects.values_list('name', 'post_count')), {'바다': 2, '여름': 0})
+
+		with self.captureOnCommitCallbacks(execute=True):
+			first.delete()
+		self.assertEqual(Tag.objects.get(name='바다').post_count, 1)
+
+	def test_version_written_by_another_worker_is_read_once_per_interval(self):
+		self._create_post(['바다'])
+		tag_trie.get_tag_trie()
+		# 다른 워커가 태그를 바꾼 것처럼 공유 버전만 올린다.
+		Tag.objects.filter(name='바다').update(post_count=0)
+		Tag.objects.create(name='바람', post_count=1)
+		cache.incr(tag_trie.TAG_TRIE_VERSION_KEY)
+
+		with mock.patch.object(tag_trie.time, 'monotonic', return_value=tag_trie._cached['checked_at'] + 1):
+			with mock.patch.object(tag_trie.cache, 'get_or_set') as get_version:
+				self.assertEqual([tag['name'] for tag in tag_trie.get_tag_trie().suggest('바')], ['바다'])
+			get_version.assert_not_called()
+
+		with mock.patch.object(tag_trie.time, 'monotonic', return_value=tag_trie._cached['checked_at'] + 60):
+			self.assertEqual([tag['name'] for tag in tag_trie.get_tag_trie().suggest('바')], ['바람'])
+
+	def test_autocomplete_endpoint_ranks_by_post_count(self):
+		self._create_post(['바다', '바닷가'])
+		self._create_post(['바다'])
+		self.client.force_login(self.author)
+
+		response = self.client.get('/tags/autocomplete/', {'q': '#바'})
+
+		self.assertEqual(response.json()['results'], [{'name': '바다', 'post_count': 2}, {'name': '바닷가', 'post_count': 1}])
+		with self.assertNumQueries(2):
+			# 세션/사용자 조회뿐이고 태그는 워커에 캐시된 트라이에서 답한다.
+			self.client.get('/tags/autocomplete/', {'q': '바닷'})
+
+
+class BulkTagSyncTests(TestCase):
+	def setUp(self):
+		author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='기사', content='본문', main_image='family_photos/a.jpg', author=author)
+
+	def _sync_query_count(self, names):
+		with CaptureQueriesContext(connection) as queries:
+			tag_service.sync_post_tags(self.post, names)
+		return len(queries)
+
+	def test_query_count_does_not_grow_with_tag_count(self):
+		few = self._sync_query_count([f'짧은{index}' for index in range(3)])
+		self.post.tags.clear()
+		many = self._sync_query_count([f'긴태그{index}' for index in range(15)])
+
+		self.assertEqual(few, many)
+		self.assertEqual(self.post.tags.count(), 15)
+
+	def test_only_changed_links_are_touched(self):
+		tag_service.sync_post_tags(self.post, ['바다', '여름'])
+		kept_link = FamilyPost.tags.through.objects.get(familypost=self.post, tag__name='바다')
+
+		tag_service.sync_post_tags(self.post, ['바다', '가을', '가을'])
+
+		self.assertEqual(sorted(self.post.tags.values_list('name', flat=True)), ['가을', '바다'])
+		self.assertTrue(FamilyPost.tags.through.objects.filter(pk=kept_link.pk).exists())
+		self.assertEqual(Tag.objects.get(name='여름').post_count, 0)
+
+	def test_names_differing_only_in_case_resolve_to_one_tag(self):
+		existing = Tag.objects.create(name='Beach')
+
+		tags = tag_service.resolve_tags(['Beach', 'BEACH', 'Straße', 'STRASSE'])
+
+		self.assertEqual([tag.name for tag in tags], ['Beach', 'Straße'])
+		self.assertEqual(tags[0].pk, existing.pk)
+		self.assertEqual(Tag.objects.count(), 2)
+
+
+class RelatedPostTests(TestCase):
+	def setUp(self):
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.client.force_login(self.author)
+
+	def _post(self, title, tag_names, days_ago=0):
+		post = FamilyPost.objects.create(title=title, content='본문', main_image='family_photos/a.jpg', author=self.author)
+		FamilyPost.objects.filter(pk=post.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+		tag_service.sync_post_tags(post, tag_names)
+		return FamilyPost.objects.get(pk=post.pk)
+
+	def test_shared_rare_tag_outranks_shared_common_tag(self):
+		source = self._post('제주 여행', ['가족', '제주'])
+		common = self._post('가족 모임', ['가족'])
+		rare = self._post('제주 바다', ['제주'])
+		for index in range(4):
+			self._post(f'일상 {index}', ['가족'])
+
+		related_ids = related_service.refresh_related_posts(source.pk)
+
+		self.assertLess(related_ids.index(rare.pk), related_ids.index(common.pk))
+		self.assertEqual(
+			list(RelatedPost.objects.filter(post=source).values_list('related_id', flat=True)),
+			related_ids,
+		)
+
+	def test_older_post_decays_below_recent_one(self):
+		source = self._post('봄 소풍', ['소풍'])
+		recent = self._post('가을 소풍', ['소풍'], days_ago=10)
+		old = self._post('옛날 소풍', ['소풍'], days_ago=900)
+
+		self.assertEqual(related_service.refresh_related_posts(source.pk), [recent.pk, old.pk])
+
+	def test_tag_change_schedules_refresh_and_detail_reads_stored_rank(self):
+		source = self._post('제주 여행', ['제주'])
+		with mock.patch('posts.signals.schedule_related_refresh') as schedule:
+			related = self._post('제주 바다', ['제주'])
+		schedule.assert_called_with([related.pk], tag_ids={Tag.objects.get(name='제주').pk})
+
+		related_service.refresh_related_for_tag_change([related.pk], [Tag.objects.get(name='제주').pk])
+		response = self.client.get(f'/posts/{source.pk}/')
+
+		self.assertEqual([item['post'].pk for item in response.context['related_items']], [related.pk])
+
+	def test_tag_change_refreshes_every_post_sharing_the_tag(self):
+		older = [self._post(f'제주 {index}', ['제주'], days_ago=30 + index) for index in range(related_service.RELATED_POSTS_PER_POST + 2)]
+		new_post = self._post('제주 새 기사', ['제주'])
+
+		refreshed = related_service.refresh_related_for_tag_change([new_post.pk], [Tag.objects.get(name='제주').pk])
+
+		# 새 기사의 상위 목록에 들지 못한 옛 기사도 새 기사를 목록에 넣을 수 있어야 한다.
+		self.assertEqual(refreshed, {new_post.pk, *(post.pk for post in older)})
+		self.assertEqual(RelatedPost.objects.filter(post=older[-1]).count(), related_service.RELATED_POSTS_PER_POST)
+
+
+class PostDetailQueryBudgetTests(TestCase):
+	def setUp(self):
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+		self.post.tags.add(Tag.objects.create(name='가족'))
+		self.client.force_login(self.author)
+
+	def _add_comments(self, count):
+		FamilyPostComment.objects.bulk_create(
+			FamilyPostComment(post=self.post, author=self.author, content=f'댓글 {index}')
+			for index in range(count)
+		)
+		# bulk_create 는 신호를 보내지 않으므로 카운터를 직접 맞춘다.
+		counter_service.recount_post_counters([self.post.pk])
+
+	def _detail_query_count(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(f'/posts/{self.post.pk}/')
+		self.assertEqual(response.status_code, 200)
+		return len(queries), response
+
+	def test_query_count_does_not_grow_with_comments(self):
+		self._add_comments(3)
+		few, _ = self._detail_query_count()
+		self._add_comments(997)
+
+		with self.assertNumQueries(few):
+			response = self.client.get(f'/posts/{self.post.pk}/')
+
+		self.assertEqual(response.context['post'].comment_count, 1000)
+		self.assertEqual(len(response.context['comments']), comment_service.COMMENTS_PAGE_SIZE)
+		self.assertIsNotNone(response.context['comments_next_cursor'])
+
+	def test_more_endpoint_walks_every_comment_once(self):
+		self._add_comments(45)
+		first_page = self.client.get(f'/posts/{self.post.pk}/').context
+		seen = [comment.content for comment in first_page['comments']]
+		cursor = first_page['comments_next_cursor']
+
+		while cursor:
+			payload = self.client.get(f'/posts/{self.post.pk}/comments/', {'before': cursor}).json()
+			seen.extend(re.findall(r'댓글 \d+', payload['html']))
+			cursor = payload['next_cursor']
+
+		self.assertEqual(len(seen), 45)
+		self.assertEqual(set(seen), {f'댓글 {index}' for index in range(45)})
+
+	def test_out_of_range_cursor_falls_back_to_first_page(self):
+		self._add_comments(3)
+		cursor = '99999999999999999999.1'
+		self.assertIsNone(comment_service.decode_comment_cursor(cursor))
+
+		response = self.client.get(f'/posts/{self.post.pk}/', {'comments_before': cursor})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.context['comments']), 3)
+
+		payload = self.client.get(f'/posts/{self.post.pk}/comments/', {'before': cursor}).json()
+		self.assertEqual(len(re.findall(r'댓글 \d+', payload['html'])), 3)
+
+
+class AjaxCommentTests(TestCase):
+	def setUp(self):
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+		FamilyPostComment.objects.create(post=self.post, author=self.author, content='첫 댓글')
+		self.client.force_login(self.author)
+
+	def test_ajax_submission_returns_fragment_and_count(self):
+		response = self.client.post(
+			f'/posts/{self.post.pk}/comments/add/',
+			{'emoji': '🎉', 'content': '축하해요'},
+			HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+		)
+
+		payload = response.json()
+		self.assertTrue(payload['ok'])
+		self.assertEqual(payload['comment_count'], 2)
+		self.assertIn('축하해요', payload['html'])
+		self.assertEqual(payload['html'].count('class="comment-item"'), 1)
+
+	def test_ajax_validation_error_is_json(self):
+		response = self.client.post(
+			f'/posts/{self.post.pk}/comments/add/',
+			{'emoji': '🎉', 'content': ''},
+			HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+		)
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(response.json()['ok'])
+		self.assertEqual(FamilyPostComment.objects.filter(post=self.post).count(), 1)
+
+	def test_form_submission_still_redirects(self):
+		response = self.client.post(f'/posts/{self.post.pk}/comments/add/', {'emoji': '🙂', 'content': '좋아요'})
+
+		self.assertRedirects(response, f'/posts/{self.post.pk}/')
+		self.assertEqual(FamilyPostComment.objects.filter(post=self.post).count(), 2)
+
+
+class PostCounterTests(TestCase):
+	def setUp(self):
+		self.author = User.objects.create_user(username='writer', password='test-pass-1234')
+		self.post = FamilyPost.objects.create(title='기사', content='본문', main_image='family_photos/a.jpg', author=self.author)
+
+	def _counters(self):
+		return FamilyPost.objects.values_list('comment_count', 'image_count', 'video_count').get(pk=self.post.pk)
+
+	def test_child_rows_keep_counters_in_step(self):
+		comment = FamilyPostComment.objects.create(post=self.post, author=self.author, content='댓글')
+		FamilyPostComment.objects.create(post=self.post, author=self.author, content='댓글 2')
+		FamilyPostImage.objects.create(post=self.post, image='family_posts/multi/a.jpg')
+		FamilyPostVideo.objects.create(post=self.post, video='family_posts/videos/a.mp4')
+		self.assertEqual(self._counters(), (2, 1, 1))
+
+		comment.delete()
+		self.post.images.all().delete()
+		self.assertEqual(self._counters(), (1, 0, 1))
+
+	def test_post_edit_does_not_write_counters(self):
+		FamilyPostComment.objects.create(post=self.post, author=self.author, content='댓글')
+		self.client.force_login(self.author)
+
+		with mock.patch.object(FamilyPost, 'save', autospec=True, side_effect=FamilyPost.save) as save:
+			response = self.client.post(f'/posts/{self.post.pk}/edit/', {'title': '새 제목', 'content': '본문', 'tags': ''})
+
+		self.assertRedirects(response, f'/posts/{self.post.pk}/')
+		self.assertEqual(save.call_args.kwargs['update_fields'], views.POST_EDIT_FIELDS)
+		self.assertEqual(self._counters(), (1, 0, 0))
+		self.assertEqual(FamilyPost.objects.get(pk=self.post.pk).title, '새 제목')
+
+	def test_repair_command_recounts_from_child_tables(self):
+		FamilyPostComment.objects.bulk_create(
+			FamilyPostComment(post=self.post, author=self.author, content=f'댓글 {index}') for index in range(3)
+		)
+		FamilyPost.objects.filter(pk=self.post.pk).update(video_count=5)
+
+		call_command('repair_post_counters', stdout=StringIO())
+
+		self.assertEqual(self._counters(), (3, 0, 0))
+
+
+class ExplainHotQueriesTests(TestCase):
+	def test_refuses_databases_without_mariadb_explain(self):
+		with self.assertRaises(CommandError):
+			call_command('explain_hot_queries', posts=10, stdout=StringIO())
+
+	def test_hot_queries_run_on_seeded_data(self):
+		command = explain_hot_queries.Command()
+		seed = command._seed(60, 30)
+
+		for label, run, _ in command._hot_queries(seed):
+			with self.subTest(label=label), CaptureQueriesContext(connection) as queries:
+				run()
+				self.assertTrue(any(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+
+class ImagePipelineTests(TestCase):
+	def _jpeg(self, size, orientation=1):
+		image = Image.new('RGB', size, (200, 40, 40))
+		# 왼쪽 위 구석만 색을 달리해서 방향을 확인한다.
+		image.paste((20, 20, 220), (0, 0, size[0] // 4, size[1] // 4))
+		exif = image.getexif()
+		exif[image_pipeline.EXIF_ORIENTATION_TAG] = orientation
+		buffer = BytesIO()
+		image.save(buffer, format='JPEG', quality=90, exif=exif.tobytes())
+		buffer.seek(0)
+		return buffer
+
+	def test_single_transpose_matches_exif_then_rotation(self):
+		probe = Image.frombytes('L', (4, 3), bytes(range(12)))
+		for orientation in range(1, 9):
+			exif = probe.getexif()
+			exif[image_pipeline.EXIF_ORIENTATION_TAG] = orientation
+			probe.info['exif'] = exif.tobytes()
+			for rotation in (0, 90, 180, 270):
+				with self.subTest(orientation=orientation, rotation=rotation):
+					expected = ImageOps.exif_transpose(probe.copy()).rotate(-rotation, expand=True)
+					transpose = image_pipeline.combined_transpose(orientation, rotation)
+					actual = probe if transpose is None else probe.transpose(transpose)
+					self.assertEqual((actual.size, actual.tobytes()), (expected.size, expected.tobytes()))
+
+	def test_large_jpeg_is_decoded_near_target_size(self):
+		image_bytes, stats = image_pipeline.optimize_image(self._jpeg((4000, 3000)), max_size=(480, 480))
+
+		# JPEG 는 1/8 단위로만 줄여 읽을 수 있으므로 목표(480)의 두 배 이상인 1/4 크기로 읽힌다.
+		decode = next(stage for stage in stats.stages if stage['stage'] == 'decode')
+		self.assertEqual(decode['size'], (1000, 750))
+		self.assertEqual(stats.peak_buffer_bytes, 1000 * 750 * 3)
+		self.assertEqual(Image.open(BytesIO(image_bytes)).size, (480, 360))
+
+	def test_orientation_and_rotation_are_applied_after_downscale(self):
+		# orientation 6 은 시계 방향 90도 회전이 필요하고, 사용자가 90도를 더 돌리면 180도가 된다.
+		image_bytes, stats = image_pipeline.optimize_image(self._jpeg((1600, 1200), orientation=6), rotation_degrees=90)
+
+		result = Image.open(BytesIO(image_bytes)).convert('RGB')
+		self.assertEqual(result.size, (1280, 960))
+		red, green, blue = result.getpixel((result.width - 5, result.height - 5))
+		self.assertGreater(blue, red)
+		self.assertEqual([stage['stage'] for stage in stats.stages][-2:], ['orient', 'encode'])
+
+
+class ParallelImageOptimizationTests(TestCase):
+	def _upload(self, name, size):
+		buffer = BytesIO()
+		Image.new('RGB', size, (120, 160, 200)).save(buffer, format='JPEG')
+		return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+	@override_settings(IMAGE_OPTIMIZE_THREADS=3)
+	def test_results_keep_upload_order_and_rotations(self):
+		uploads = [self._upload(f'{index}.jpg', (400 + index * 100, 300)) for index in range(5)]
+
+		optimized = views._optimize_uploaded_images(uploads, [0, 90, 0, 270, 0])
+
+		sizes = [Image.open(item).size for item in optimized]
+		self.assertEqual(sizes, [(400, 300), (300, 500), (600, 300), (300, 700), (800, 300)])
+
+	def test_failing_file_keeps_original_without_affecting_others(self):
+		uploads = [self._upload('a.jpg', (400, 300)), self._upload('b.jpg', (400, 300))]
+		real_optimize = views._optimize_uploaded_image
+
+		def flaky_optimize(uploaded_file, **kwargs):
+			if uploaded_file.name == 'a.jpg':
+				raise MemoryError('too large')
+			return real_optimize(uploaded_file, **kwargs)
+
+		with mock.patch.object(views, '_optimize_uploaded_image', side_effect=flaky_optimize):
+			optimized = views._optimize_uploaded_images(uploads, [0, 0])
+
+		self.assertIs(optimized[0], uploads[0])
+		self.assertIsInstance(optimized[1], ContentFile)
+
+
+class ImageRotationTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.author = User.objects.create_user(username='rotator', password='test-pass-1234')
+
+	def _jpeg_bytes(self, size=(400, 200)):
+		image = Image.new('RGB', size, (200, 40, 40))
+		image.paste((20, 20, 220), (0, 0, size[0] // 4, size[1] // 4))
+		buffer = BytesIO()
+		image.save(buffer, format='JPEG', quality=90)
+		return buffer.getvalue()
+
+	def _scan_data(self, data):
+		return data[data.index(b'\xff\xda'):]
+
+	def test_jpeg_rotation_rewrites_only_the_orientation_tag(self):
+		original = self._jpeg_bytes()
+
+		rotated = image_rotation.rotate_image_bytes(original, 90)
+		twice = image_rotation.rotate_image_bytes(rotated, 90)
+
+		self.assertEqual(self._scan_data(rotated), self._scan_data(original))
+		self.assertEqual(Image.open(BytesIO(rotated)).getexif()[image_pipeline.EXIF_ORIENTATION_TAG], 6)
+		self.assertEqual(Image.open(BytesIO(twice)).getexif()[image_pipeline.EXIF_ORIENTATION_TAG], 3)
+		shown = ImageOps.exif_transpose(Image.open(BytesIO(rotated)))
+		self.assertEqual(shown.size, (200, 400))
+		# 시계 방향으로 돌리면 왼쪽 위 파란 구석이 오른쪽 위로 간다.
+		red, green, blue = shown.getpixel((shown.width - 5, 5))
+		self.assertGreater(blue, red)
+
+	def test_png_is_transposed_without_loss(self):
+		image = Image.new('RGB', (3, 2))
+		image.putdata([(index, index, index) for index in range(6)])
+		buffer = BytesIO()
+		image.save(buffer, format='PNG')
+
+		rotated = Image.open(BytesIO(image_rotation.rotate_image_bytes(buffer.getvalue(), 270)))
+
+		self.assertEqual(rotated.format, 'PNG')
+		self.assertEqual(rotated.tobytes(), image.transpose(Image.Transpose.ROTATE_90).tobytes())
+
+	def test_stored_image_moves_to_new_name_and_drops_old_renditions(self):
+		old_name = default_storage.save('family_photos/turn.jpg', ContentFile(self._jpeg_bytes()))
+		post = FamilyPost.objects.create(title='사진', content='본문', main_image=old_name, author=self.author)
+		image_service.generate_renditions(old_name)
+		self.assertTrue(ImageRendition.objects.filter(source_name=old_name).exists())
+
+		with mock.patch('posts.signals.schedule_renditions') as schedule_renditions:
+			self.assertTrue(image_rotation.rotate_stored_image('posts.FamilyPost', post.pk, 'main_image', 90))
+
+		post.refresh_from_db()
+		self.assertNotEqual(post.main_image.name, old_name)
+		self.assertIn('_rot', post.main_image.name)
+		self.assertFalse(default_storage.exists(old_name))
+		self.assertFalse(ImageRendition.objects.filter(source_name=old_name).exists())
+		self.assertEqual(schedule_renditions.call_args.args[0].name, post.main_image.name)
+		with Image.open(post.main_image.path) as stored:
+			self.assertEqual(stored.getexif()[image_pipeline.EXIF_ORIENTATION_TAG], 6)
+
+	def test_file_still_used_by_a_member_photo_is_kept(self):
+		old_name = default_storage.save('family_photos/shared.jpg', ContentFile(self._jpeg_bytes()))
+		post = FamilyPost.objects.create(title='사진', content='본문', main_image=old_name, author=self.author)
+		FamilyMemberPhoto.objects.create(user=self.author, image=old_name)
+
+		with mock.patch('posts.signals.schedule_renditions'):
+			self.assertTrue(image_rotation.rotate_stored_image('posts.FamilyPost', post.pk, 'main_image', 90))
+
+		self.assertTrue(default_storage.exists(old_name))
+
+	def test_edit_post_schedules_rotation_instead_of_reencoding(self):
+		post = FamilyPost.objects.create(title='사진', content='본문', main_image='family_photos/a.jpg', author=self.author)
+		extra = FamilyPostImage.objects.create(post=post, image='family_posts/b.jpg')
+		self.client.force_login(self.author)
+
+		with mock.patch.object(views, 'schedule_image_rotation') as schedule_rotation:
+			response = self.client.post(f'/posts/{post.pk}/edit/', {
+				'title': '사진',
+				'content': '본문',
+				'main_image_rotation': '90',
+				'existing_image_rotations': f'{{"{extra.pk}": 270}}',
+			})
+
+		self.assertRedirects(response, f'/posts/{post.pk}/')
+		calls = {(call.args[0].pk, call.args[1], call.args[2]) for call in schedule_rotation.call_args_list}
+		self.assertEqual(calls, {(post.pk, 'main_image', 90), (extra.pk, 'image', 270)})
+		post.refresh_from_db()
+		self.assertEqual(post.main_image.name, 'family_photos/a.jpg')
+
+
+class ChunkedUploadTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(
+			MEDIA_ROOT=self.media_root,
+			MEDIA_WORK_DIR=os.path.join(self.media_root, '.work'),
+			UPLOAD_CHUNK_BYTES=4096,
+		)
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.user = User.objects.create_user(username='uploader', password='test-pass-1234')
+		self.client.force_login(self.user)
+
+		buffer = BytesIO()
+		# 여러 조각으로 나뉘도록 압축되지 않는 잡음 사진을 쓴다.
+		Image.frombytes('RGB', (300, 200), os.urandom(300 * 200 * 3)).save(buffer, format='PNG')
+		self.data = buffer.getvalue()
+
+	def _create(self, **extra):
+		response = self.client.post(
+			'/uploads/',
+			{'file_name': 'photo.png', 'size': len(self.data), 'content_type': 'image/png', **extra},
+			content_type='application/json',
+		)
+		self.assertEqual(response.status_code, 201)
+		return response.json()
+
+	def _put(self, session, start, end, **headers):
+		return self.client.put(
+			session['upload_url'],
+			self.data[start:end],
+			content_type='application/octet-stream',
+			headers={'Content-Range': f'bytes {start}-{end - 1}/{len(self.data)}', **headers},
+		)
+
+	def _upload_all(self, session):
+		for start in range(0, len(self.data), session['chunk_size']):
+			response = self._put(session, start, min(start + session['chunk_size'], len(self.data)))
+			self.assertEqual(response.status_code, 200)
+		return self.client.post(session['finalize_url'])
+
+	def test_chunks_resume_from_server_offset(self):
+		session = self._create()
+
+		self.assertEqual(self._put(session, 0, 4096).json()['offset'], 4096)
+		# 같은 조각을 다시 보내면 서버가 받은 위치를 알려준다.
+		retry = self._put(session, 0, 4096)
+		self.assertEqual(retry.status_code, 409)
+		self.assertEqual(retry.json()['offset'], 4096)
+		self.assertEqual(self.client.get(session['upload_url']).json()['offset'], 4096)
+
+		self.assertEqual(self.client.post(session['finalize_url']).status_code, 409)
+		for start in range(4096, len(self.data), 4096):
+			self._put(session, start, min(start + 4096, len(self.data)))
+		finalized = self.client.post(session['finalize_url'])
+		self.assertEqual(finalized.status_code, 201)
+		staged = StagedMedia.objects.get(pk=finalized.json()['id'])
+		self.assertEqual(staging_service.staged_path(staged.file_name).read_bytes(), self.data)
+		self.assertFalse(UploadSession.objects.exists())
+
+	def test_repeated_finalize_returns_the_staged_file(self):
+		session = self._create()
+		first = self._upload_all(session)
+		self.assertEqual(first.status_code, 201)
+
+		# 첫 응답을 받지 못한 클라이언트가 다시 보낸 요청
+		retry = self.client.post(session['finalize_url'])
+
+		self.assertEqual(retry.status_code, 200)
+		self.assertEqual(retry.json()['id'], first.json()['id'])
+		self.assertEqual(StagedMedia.objects.count(), 1)
+
+		self.client.force_login(User.objects.create_user(username='other', password='test-pass-1234'))
+		self.assertEqual(self.client.post(session['finalize_url']).status_code, 404)
+
+	def test_corrupt_chunk_is_cut_off(self):
+		session = self._create()
+
+		response = self._put(session, 0, 4096, **{'X-Chunk-SHA256': '0' * 64})
+
+		self.assertEqual(response.status_code, 422)
+		self.assertEqual(response.json()['offset'], 0)
+		self.assertEqual(UploadSession.objects.get().received_bytes, 0)
+		self.assertEqual(os.path.getsize(upload_service.spool_path(UploadSession.objects.get())), 0)
+
+	def test_whole_file_checksum_mismatch_restarts_upload(self):
+		session = self._create(sha256='f' * 64)
+
+		response = self._upload_all(session)
+
+		self.assertEqual(response.status_code, 422)
+		self.assertEqual(UploadSession.objects.get().received_bytes, 0)
+
+	def test_other_users_sessions_are_hidden(self):
+		session = self._create()
+		other = User.objects.create_user(username='other', password='test-pass-1234')
+
+		self.assertEqual(self.client.get(session['upload_url']).status_code, 200)
+		self.client.force_login(other)
+		self.assertEqual(self.client.get(session['upload_url']).status_code, 404)
+		self.assertEqual(self._put(session, 0, 4096).status_code, 404)
+
+
+class StagedMediaTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		media_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_WORK_DIR=os.path.join(self.media_root, '.work'))
+		media_override.enable()
+		self.addCleanup(media_override.disable)
+		self.user = User.objects.create_user(username='stager', password='test-pass-1234')
+		self.client.force_login(self.user)
+
+	def _stage(self, file_name, content_type, data):
+		session = upload_service.create_upload_session(self.user, file_name, len(data), content_type)
+		upload_service.spool_path(session).write_bytes(data)
+		UploadSession.objects.filter(pk=session.pk).update(received_bytes=len(data), status=UploadSession.STATUS_COMPLETE)
+		session.refresh_from_db()
+		return staging_service.stage_upload(session)
+
+	def _jpeg_bytes(self, size=(2000, 1000)):
+		buffer = BytesIO()
+		Image.new('RGB', size, (90, 140, 200)).save(buffer, format='JPEG')
+		return buffer.getvalue()
+
+	def _submit(self, staged_ids, **extra):
+		return self.client.post(
+			'/upload-photo/',
+			{'caption': '미리 올린 사진', 'staged_ids': [str(staged_id) for staged_id in staged_ids], **extra},
+			HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+		)
+
+	def test_photo_is_optimized_before_submit_and_attached_with_rotation(self):
+		_skip_related_refresh(self)
+		main = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+		extra = self._stage('extra.jpg', 'image/jpeg', self._jpeg_bytes((800, 600)))
+		self.assertTrue(staging_service.process_staged_media(main.pk))
+		self.assertTrue(staging_service.process_staged_media(extra.pk))
+		self.assertEqual(self.client.get(f'/staged/{main.pk}/').json()['status'], StagedMedia.STATUS_READY)
+
+		with mock.patch.object(views, '_optimize_uploaded_images', wraps=views._optimize_uploaded_images) as optimize:
+			with mock.patch('posts.signals.schedule_renditions'), self.captureOnCommitCallbacks(execute=True):
+				response = self._submit([main.pk, extra.pk], main_image_index='0', image_rotations='[90, 0]')
+
+		self.assertTrue(response.json()['ok'])
+		self.assertEqual(optimize.call_args.args[0], [])
+		post = FamilyPost.objects.get()
+		with Image.open(post.main_image.path) as image:
+			self.assertEqual(image.size, (1280, 640))
+			self.assertEqual(image.getexif()[image_pipeline.EXIF_ORIENTATION_TAG], 6)
+		self.assertEqual(post.images.count(), 1)
+		self.assertFalse(StagedMedia.objects.exists())
+		self.assertEqual(os.listdir(staging_service.staging_dir()), [])
+
+	def test_staged_ids_cannot_be_mixed_with_attached_photos(self):
+		staged = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+		self.assertTrue(staging_service.process_staged_media(staged.pk))
+		attached = SimpleUploadedFile('direct.jpg', self._jpeg_bytes((800, 600)), content_type='image/jpeg')
+
+		response = self._submit([staged.pk], images=[attached], main_image_index='1')
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(FamilyPost.objects.exists())
+		self.assertTrue(StagedMedia.objects.filter(pk=staged.pk).exists())
+
+	def test_submit_waits_for_processing(self):
+		staged = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+
+		response = self._submit([staged.pk], main_image_index='0')
+
+		self.assertEqual(response.status_code, 409)
+		self.assertFalse(FamilyPost.objects.exists())
+		self.assertTrue(StagedMedia.objects.filter(pk=staged.pk).exists())
+
+	def test_processing_lost_by_a_restarted_worker_is_requeued(self):
+		staged = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+
+		with mock.patch.object(staging_service, 'schedule_staged_processing') as schedule:
+			self.client.get(f'/staged/{staged.pk}/')
+			schedule.assert_not_called()
+
+			StagedMedia.objects.filter(pk=staged.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+			self.assertEqual(self._submit([staged.pk], main_image_index='0').status_code, 409)
+			self.client.get(f'/staged/{staged.pk}/')
+
+		# 다시 예약하면서 수정 시각이 바뀌므로 한 번만 예약된다.
+		self.assertEqual(schedule.call_count, 1)
+
+	def test_staged_photos_do_not_share_the_request_optimize_pool(self):
+		with mock.patch.object(staging_service, 'submit_after_commit') as submit:
+			self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+
+		self.assertEqual(submit.call_args.args[0], 'staged-image')
+
+	def test_command_processes_stalled_staged_media(self):
+		staged = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+		fresh = self._stage('extra.jpg', 'image/jpeg', self._jpeg_bytes())
+		StagedMedia.objects.filter(pk=staged.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+		call_command('process_stalled_staged_media', stdout=StringIO())
+
+		self.assertEqual(StagedMedia.objects.get(pk=staged.pk).status, StagedMedia.STATUS_READY)
+		self.assertEqual(StagedMedia.objects.get(pk=fresh.pk).status, StagedMedia.STATUS_PROCESSING)
+
+	def test_other_users_staged_media_cannot_be_attached(self):
+		staged = self._stage('main.jpg', 'image/jpeg', self._jpeg_bytes())
+		staging_service.process_staged_media(staged.pk)
+		other = User.objects.create_user(username='other', password='test-pass-1234')
+
+		with self.assertRaises(staging_service.StagedMediaError):
+			staging_service.load_staged_media(other, [staged.pk])
+
+	def test_video_gets_poster_while_staged_and_skips_transcode_on_submit(self):
+		with mock.patch('posts.video_service.resolve_ffmpeg_executable', return_value=None):
+			staged = self._stage('clip.mp4', 'video/mp4', b'x' * 2048)
+			self.assertTrue(staging_service.process_staged_media(staged.pk))
+
+		with mock.patch.object(views, 'schedule_video_transcode') as schedule_transcode:
+			response = self._submit([staged.pk])
+
+		self.assertTrue(response.json()['ok'])
+		schedule_transcode.assert_not_called()
+		video = FamilyPostVideo.objects.get()
+		self.assertEqual(video.status, FamilyPostVideo.STATUS_READY)
+		self.assertTrue(video.video.name.endswith('clip.mp4'))
+		self.assertIn('clip_thumb', FamilyPost.objects.get().main_image.name)
+
+	def test_video_goes_from_chunked_upload_to_post_in_one_commit(self):
+		_skip_related_refresh(self)
+		data = b'x' * 2048
+		session = self.client.post(
+			'/uploads/',
+			{'file_name': 'clip.mp4', 'size': len(data), 'content_type': 'video/mp4'},
+			content_type='application/json',
+		).json()
+		self.client.put(
+			session['upload_url'],
+			data,
+			content_type='application/octet-stream',
+			headers={'Content-Range': f'bytes 0-{len(data) - 1}/{len(data)}'},
+		)
+		staged_id = self.client.post(session['finalize_url']).json()['id']
+		with mock.patch('posts.video_service.resolve_ffmpeg_executable', return_value=None):
+			self.assertTrue(staging_service.process_staged_media(staged_id))
+		self.assertEqual(self.client.get(f'/staged/{staged_id}/').json()['status'], StagedMedia.STATUS_READY)
+
+		with mock.patch('posts.signals.schedule_renditions'), self.captureOnCommitCallbacks(execute=True) as callbacks:
+			response = self._submit([staged_id])
+			# 커밋 전까지는 미리 올린 행을 지우지 않는다.
+			self.assertTrue(StagedMedia.objects.filter(pk=staged_id).exists())
+
+		self.assertTrue(response.json()['ok'])
+		self.assertTrue(callbacks)
+		video = FamilyPostVideo.objects.get()
+		self.assertEqual(video.status, FamilyPostVideo.STATUS_READY)
+		with video.video.open('rb') as video_file:
+			self.assertEqual(video_file.read(), data)
+		self.assertFalse(StagedMedia.objects.exists())
+		self.assertEqual(os.listdir(staging_service.staging_dir()), [])
+
+	def test_failed_attach_keeps_the_staged_video_for_a_retry(self):
+		with mock.patch('posts.video_service.resolve_ffmpeg_executable', return_value=None):
+			staged = self._stage('clip.mp4', 'video/mp4', b'x' * 2048)
+			self.assertTrue(staging_service.process_staged_media(staged.pk))
+
+		with mock.patch.object(views, 'staged_video_file', side_effect=OSError('disk full')), self.assertRaises(OSError):
+			self._submit([staged.pk])
+
+		self.assertFalse(FamilyPost.objects.exists())
+		self.assertFalse(FamilyPostVideo.objects.exists())
+		self.assertTrue(StagedMedia.objects.filter(pk=staged.pk).exists())
@@ -0,0 +1,206 @@
+"""Resumable chunked uploads: create a session, PUT byte ranges, finalize.
+
+Each session appends its chunks to one spool file under ``MEDIA_WORK_DIR/uploads``. A chunk
+must start exactly where the previous one ended, so a client that lost its connection asks
+for the current offset and continues from there. Finished spool files are handed over to
+:mod:`posts.staging_service` for processing.
+"""
+from datetime import timedelta
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+from .video_service import media_work_dir
+
+
+logger = logging.getLogger('posts.upload')
+
+MAX_UPLOAD_FILE_BYTES = 200 * 1024 * 1024
+DEFAULT_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+_STREAM_BLOCK_BYTES = 64 * 1024
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadSessionError(Exception):
+    """Rejected upload request; ``status`` is the HTTP status the view should answer with."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.offset = offset
+
+
+def upload_chunk_bytes():
+    return getattr(settings, 'UPLOAD_CHUNK_BYTES', DEFAULT_UPLOAD_CHUNK_BYTES)
+
+
+def upload_spool_dir():
+    spool_dir = media_work_dir() / 'uploads'
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    return spool_dir
+
+
+def spool_path(session):
+    return upload_spool_dir() / f'{session.pk}.part'
+
+
+def parse_content_range(header):
+    """Return ``(start, end, total)`` from ``bytes start-end/total``; ``end`` is inclusive."""
+    match = _CONTENT_RANGE.match((header or '').strip())
+    if not match:
+        raise UploadSessionError('Content-Range 헤더가 올바르지 않습니다.')
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise UploadSessionError('Content-Range 범위가 올바르지 않습니다.')
+    return start, end, total
+
+
+def create_upload_session(user, file_name, total_size, content_type, sha256=''):
+    content_type = (content_type or '').strip().lower()
+    if not content_type.startswith(('image/', 'video/')):
+        raise UploadSessionError('사진 또는 동영상 파일만 올릴 수 있습니다.')
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadSessionError('파일 크기가 올바르지 않습니다.')
+    if total_size <= 0:
+        raise UploadSessionError('빈 파일은 올릴 수 없습니다.')
+    if total_size > MAX_UPLOAD_FILE_BYTES:
+        raise UploadSessionError('200메가 이상의 파일은 업로드 불가합니다.', status=413)
+    sha256 = (sha256 or '').strip().lower()
+    if sha256 and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        raise UploadSessionError('SHA-256 값이 올바르지 않습니다.')
+
+    session = UploadSession.objects.create(
+        user=user,
+        file_name=Path(file_name or 'upload').name[:255],
+        content_type=content_type[:100],
+        total_size=total_size,
+        sha256=sha256,
+    )
+    spool_path(session).touch()
+    return session
+
+
+def append_upload_chunk(session_id, user, stream, content_range, chunk_sha256=''):
+    """Write one ``Content-Range`` chunk read from ``stream`` and return ``(session, chunk_sha256)``.
+
+    The session row stays locked while the chunk is written, so two retries of the same range
+    cannot both append. A chunk that is short or fails its checksum is cut off again.
+    """
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+    if length > upload_chunk_bytes():
+        raise UploadSessionError('조각이 너무 큽니다.', status=413)
+
+    with transaction.atomic():
+        session = _locked_session(session_id, user)
+        if session.is_complete:
+            raise UploadSessionError('이미 끝난 업로드입니다.', status=409, offset=session.received_bytes)
+        if total != session.total_size or end >= session.total_size:
+            raise UploadSessionError('파일 크기가 처음과 다릅니다.')
+        if start != session.received_bytes:
+            # 응답의 offset 부터 다시 보내면 된다.
+            raise UploadSessionError('이어 올릴 위치가 맞지 않습니다.', status=409, offset=session.received_bytes)
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(spool_path(session), 'r+b') as spool_file:
+            spool_file.seek(start)
+            # 예전에 중간까지만 쓰인 조각이 남아 있을 수 있다.
+            spool_file.truncate(start)
+            while written < length:
+                block = stream.read(min(_STREAM_BLOCK_BYTES, length - written))
+                if not block:
+                    break
+                spool_file.write(block)
+                digest.update(block)
+                written += len(block)
+
+            expected = (chunk_sha256 or '').strip().lower()
+            if written != length or (expected and expected != digest.hexdigest()):
+                spool_file.truncate(start)
+                raise UploadSessionError('조각이 손상되었습니다. 같은 위치부터 다시 보내주세요.', status=422, offset=start)
+
+        session.received_bytes = start + length
+        session.save(update_fields=['received_bytes', 'updated_at'])
+    return session, digest.hexdigest()
+
+
+def finalize_upload_session(session_id, user):
+    with transaction.atomic():
+        session = _locked_session(session_id, user)
+        if session.is_complete:
+            return session
+        if session.received_bytes != session.total_size:
+            raise UploadSessionError('아직 받지 못한 부분이 있습니다.', status=409, offset=session.received_bytes)
+
+        verified = not session.sha256 or _file_sha256(spool_path(session)) == session.sha256
+        if verified:
+            session.status = UploadSession.STATUS_COMPLETE
+            session.save(update_fields=['status', 'updated_at'])
+        else:
+            # 어느 조각이 틀렸는지 알 수 없으므로 처음부터 다시 받는다.
+            with open(spool_path(session), 'r+b') as spool_file:
+                spool_file.truncate(0)
+            session.received_bytes = 0
+            session.save(update_fields=['received_bytes', 'updated_at'])
+    if not verified:
+        raise UploadSessionError('파일 검증에 실패했습니다. 처음부터 다시 올려주세요.', status=422, offset=0)
+    logger.info(f'[UPLOAD] 분할 업로드 완료 {session.file_name} ({session.total_size} bytes)')
+    return session
+
+
+def discard_upload_sessions(sessions):
+    """Delete the rows and any spool file the storage did not move away."""
+    session_ids = []
+    for session in sessions:
+        _remove_file(spool_path(session))
+        session_ids.append(session.pk)
+    if session_ids:
+        UploadSession.objects.filter(pk__in=session_ids).delete()
+
+
+def purge_stale_upload_sessions(max_age=None):
+    """Remove sessions untouched for ``max_age`` and spool files without a session. Returns the row count."""
+    if max_age is None:
+        max_age = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_MAX_AGE_HOURS', 24))
+    stale = list(UploadSession.objects.filter(updated_at__lt=timezone.now() - max_age))
+    discard_upload_sessions(stale)
+
+    known = {f'{session_id}.part' for session_id in UploadSession.objects.values_list('pk', flat=True)}
+    for leftover in upload_spool_dir().glob('*.part'):
+        if leftover.name not in known:
+            _remove_file(leftover)
+    return len(stale)
+
+
+def _locked_session(session_id, user):
+    try:
+        return UploadSession.objects.select_for_update().get(pk=session_id, user=user)
+    except UploadSession.DoesNotExist:
+        raise UploadSessionError('업로드를 찾을 수 없습니다.', status=404)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source_file:
+        for block in iter(lambda: source_file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
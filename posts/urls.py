@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import add_comment, add_family_member, approve_member, check_username, delete_member, delete_post, edit_member, edit_post, family_login, family_logout, family_signup, home, member_management, news_search, newspaper_detail, newspaper_hall, pending_approvals, photo_gallery, post_detail, upload_photo
+from .views import add_comment, add_family_member, approve_member, check_username, create_upload, delete_member, delete_post, edit_member, edit_post, family_login, family_logout, family_signup, finalize_upload, home, member_management, news_search, newspaper_detail, newspaper_hall, pending_approvals, photo_gallery, post_comments, post_detail, staged_media_status, tag_autocomplete, upload_photo, upload_session
 
 
 urlpatterns = [
@@ -9,7 +9,9 @@ urlpatterns = [
     path('newspapers/', newspaper_hall, name='newspaper_hall'),
     path('newspapers/<int:newspaper_id>/', newspaper_detail, name='newspaper_detail'),
     path('search/', news_search, name='news_search'),
+    path('tags/autocomplete/', tag_autocomplete, name='tag_autocomplete'),
     path('posts/<int:pk>/', post_detail, name='post_detail'),
+    path('posts/<int:pk>/comments/', post_comments, name='post_comments'),
     path('posts/<int:pk>/comments/add/', add_comment, name='add_comment'),
     path('posts/<int:pk>/edit/', edit_post, name='edit_post'),
     path('posts/<int:pk>/delete/', delete_post, name='delete_post'),
@@ -18,6 +20,10 @@ urlpatterns = [
     path('signup/check-username/', check_username, name='check_username'),
     path('logout/', family_logout, name='family_logout'),
     path('upload-photo/', upload_photo, name='upload_photo'),
+    path('uploads/', create_upload, name='create_upload'),
+    path('uploads/<uuid:session_id>/', upload_session, name='upload_session'),
+    path('uploads/<uuid:session_id>/finalize/', finalize_upload, name='finalize_upload'),
+    path('staged/<uuid:staged_id>/', staged_media_status, name='staged_media_status'),
     path('add-family-member/', add_family_member, name='add_family_member'),
     path('members/', member_management, name='member_management'),
     path('members/<int:user_id>/edit/', edit_member, name='edit_member'),
@@ -0,0 +1,588 @@
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import close_old_connections
+from PIL import Image
+
+from .background import submit_after_commit
+from .models import FamilyPostVideo
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger('posts.upload')
+
+MAX_VIDEO_SIZE_BYTES = 200 * 1024 * 1024
+FFMPEG_EXECUTABLE = None
+FFPROBE_EXECUTABLE = None
+BROWSER_SAFE_PIX_FMTS = {'yuv420p', 'yuvj420p'}
+MAX_VIDEO_WIDTH = 1280
+# 이보다 비트레이트가 높으면 크기 제한 안이라도 재인코딩해서 NAS 스트리밍 부담을 줄인다.
+REMUX_MAX_BIT_RATE = 8_000_000
+TARGET_VIDEO_KBPS = 2500
+MIN_VIDEO_KBPS = 300
+AUDIO_KBPS = 128
+BROWSER_PLAYABLE_VIDEO_SUFFIXES = {'.mp4', '.m4v', '.webm'}
+
+_local_ffmpeg_semaphore = None
+
+
+def resolve_ffmpeg_executable():
+    global FFMPEG_EXECUTABLE
+    if FFMPEG_EXECUTABLE:
+        return FFMPEG_EXECUTABLE
+
+    which_path = shutil.which('ffmpeg')
+    if which_path:
+        FFMPEG_EXECUTABLE = which_path
+        return FFMPEG_EXECUTABLE
+
+    local_app_data = os.environ.get('LOCALAPPDATA')
+    if local_app_data:
+        packages_dir = Path(local_app_data) / 'Microsoft' / 'WinGet' / 'Packages'
+        if packages_dir.exists():
+            candidates = list(packages_dir.rglob('ffmpeg.exe'))
+            if candidates:
+                FFMPEG_EXECUTABLE = str(candidates[0])
+                return FFMPEG_EXECUTABLE
+
+    return None
+
+
+def resolve_ffprobe_executable():
+    global FFPROBE_EXECUTABLE
+    if FFPROBE_EXECUTABLE:
+        return FFPROBE_EXECUTABLE
+
+    ffmpeg_executable = resolve_ffmpeg_executable()
+    if ffmpeg_executable:
+        ffmpeg_path = Path(ffmpeg_executable)
+        sibling = ffmpeg_path.with_name(ffmpeg_path.name.replace('ffmpeg', 'ffprobe'))
+        if sibling.exists():
+            FFPROBE_EXECUTABLE = str(sibling)
+            return FFPROBE_EXECUTABLE
+
+    FFPROBE_EXECUTABLE = shutil.which('ffprobe')
+    return FFPROBE_EXECUTABLE
+
+
+def _as_number(value, cast=float):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _stream_rotation(stream):
+    rotation = _as_number((stream.get('tags') or {}).get('rotate'), int)
+    if rotation is None:
+        for side_data in stream.get('side_data_list') or []:
+            rotation = _as_number(side_data.get('rotation'), int)
+            if rotation is not None:
+                break
+    return (rotation or 0) % 360
+
+
+def probe_video(input_path):
+    """Return codec/size facts about ``input_path`` via ffprobe, or ``None``."""
+    ffprobe_executable = resolve_ffprobe_executable()
+    if not ffprobe_executable:
+        return None
+
+    command = [
+        ffprobe_executable,
+        '-v',
+        'error',
+        '-print_format',
+        'json',
+        '-show_format',
+        '-show_streams',
+        input_path,
+    ]
+    try:
+        completed = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+        data = json.loads(completed.stdout or b'{}')
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+    streams = data.get('streams') or []
+    video_stream = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+    if not video_stream:
+        return None
+    audio_stream = next((stream for stream in streams if stream.get('codec_type') == 'audio'), None)
+    format_info = data.get('format') or {}
+
+    width = _as_number(video_stream.get('width'), int) or 0
+    height = _as_number(video_stream.get('height'), int) or 0
+    if _stream_rotation(video_stream) in (90, 270):
+        width, height = height, width
+
+    return {
+        'video_codec': video_stream.get('codec_name') or '',
+        'pix_fmt': video_stream.get('pix_fmt') or '',
+        'audio_codec': audio_stream.get('codec_name') if audio_stream else None,
+        'width': width,
+        'height': height,
+        'duration': _as_number(format_info.get('duration')) or _as_number(video_stream.get('duration')),
+        'bit_rate': _as_number(format_info.get('bit_rate'), int),
+    }
+
+
+def choose_transcode_plan(probe, original_size, target_max_bytes=MAX_VIDEO_SIZE_BYTES):
+    """Pick the cheapest ffmpeg arguments that make ``probe`` browser- and size-compliant.
+
+    Returns a dict with ``mode`` (``remux``, ``audio``, ``bitrate`` or ``ladder``),
+    the ffmpeg output ``args`` and a short ``reason`` for the log.
+    """
+    if not probe:
+        return {'mode': 'ladder', 'args': [], 'reason': 'ffprobe 정보 없음'}
+
+    faststart = ['-movflags', '+faststart']
+    stream_map = ['-map', '0:v:0', '-map', '0:a:0?']
+    video_ok = (
+        probe['video_codec'] == 'h264'
+        and probe['pix_fmt'] in BROWSER_SAFE_PIX_FMTS
+        and 0 < probe['width'] <= MAX_VIDEO_WIDTH
+        and (probe['bit_rate'] or 0) <= REMUX_MAX_BIT_RATE
+    )
+    audio_ok = probe['audio_codec'] in (None, 'aac')
+    size_ok = original_size <= target_max_bytes
+
+    if video_ok and size_ok and audio_ok:
+        return {'mode': 'remux', 'args': stream_map + ['-c', 'copy'] + faststart, 'reason': 'H.264/AAC 규격 충족'}
+
+    if video_ok and size_ok:
+        return {
+            'mode': 'audio',
+            'args': stream_map + ['-c:v', 'copy', '-c:a', 'aac', '-b:a', f'{AUDIO_KBPS}k'] + faststart,
+            'reason': f"오디오만 변환 ({probe['audio_codec']})",
+        }
+
+    duration = probe['duration']
+    if not duration:
+        return {'mode': 'ladder', 'args': [], 'reason': '재생 시간 정보 없음'}
+
+    budget_kbps = int(target_max_bytes * 8 * 0.9 / duration / 1000) - AUDIO_KBPS
+    video_kbps = min(TARGET_VIDEO_KBPS, budget_kbps)
+    if video_kbps < MIN_VIDEO_KBPS:
+        return {'mode': 'ladder', 'args': [], 'reason': f'용량 예산 부족 ({budget_kbps}kbps)'}
+
+    return {
+        'mode': 'bitrate',
+        'args': [
+            '-vf',
+            f'scale=min({MAX_VIDEO_WIDTH},iw):-2',
+            '-c:v',
+            'libx264',
+            '-preset',
+            'medium',
+            '-b:v',
+            f'{video_kbps}k',
+            '-maxrate',
+            f'{int(video_kbps * 1.5)}k',
+            '-bufsize',
+            f'{video_kbps * 2}k',
+            '-pix_fmt',
+            'yuv420p',
+            '-c:a',
+            'aac',
+            '-b:a',
+            f'{AUDIO_KBPS}k',
+        ] + faststart,
+        'reason': f"{probe['video_codec']} {probe['width']}px → {video_kbps}kbps",
+    }
+
+
+def _run_planned_transcode(ffmpeg_executable, input_path, plan):
+    output_temp = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4', dir=media_work_dir())
+    output_path = output_temp.name
+    output_temp.close()
+    command = [ffmpeg_executable, '-y', '-i', input_path] + plan['args'] + [output_path]
+    try:
+        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError:
+        os.remove(output_path)
+        raise
+    return output_path
+
+
+def media_work_dir():
+    """Scratch directory on the same filesystem as MEDIA_ROOT so finished files can be renamed in."""
+    work_dir = Path(getattr(settings, 'MEDIA_WORK_DIR', '') or Path(settings.MEDIA_ROOT) / '.work')
+    work_dir.mkdir(parents=True, exist_ok=True)
+    return work_dir
+
+
+class TemporaryPathFile(File):
+    """A finished temp file handed to storage without reading it into memory.
+
+    FileSystemStorage moves anything exposing ``temporary_file_path()``: an atomic
+    rename when the temp file shares MEDIA_ROOT's filesystem, a chunked copy otherwise.
+    """
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self._temporary_path = path
+
+    def temporary_file_path(self):
+        return self._temporary_path
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self._temporary_path):
+            try:
+                os.remove(self._temporary_path)
+            except OSError:
+                pass
+
+
+def is_browser_playable(file_name):
+    return Path(file_name or '').suffix.lower() in BROWSER_PLAYABLE_VIDEO_SUFFIXES
+
+
+def _ffmpeg_max_concurrency():
+    return max(1, int(getattr(settings, 'FFMPEG_MAX_CONCURRENCY', 1)))
+
+
+@contextmanager
+def ffmpeg_slot():
+    """Hold one of ``FFMPEG_MAX_CONCURRENCY`` ffmpeg slots shared by every gunicorn worker.
+
+    Slots are ``flock``-ed files, so the limit holds across processes and is released
+    by the kernel if a worker dies. Without ``fcntl`` (Windows dev) it falls back to a
+    per-process semaphore.
+    """
+    global _local_ffmpeg_semaphore
+    max_slots = _ffmpeg_max_concurrency()
+
+    if fcntl is None:
+        if _local_ffmpeg_semaphore is None:
+            _local_ffmpeg_semaphore = threading.BoundedSemaphore(max_slots)
+        with _local_ffmpeg_semaphore:
+            yield
+        return
+
+    lock_dir = Path(getattr(settings, 'FFMPEG_LOCK_DIR', '') or Path(tempfile.gettempdir()) / 'family_news_ffmpeg')
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    while True:
+        for slot in range(max_slots):
+            lock_file = open(lock_dir / f'slot-{slot}.lock', 'a+')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+            return
+        time.sleep(0.5)
+
+
+def transcode_video_file(input_path, original_name, target_max_bytes=MAX_VIDEO_SIZE_BYTES):
+    """Compress a stored video. Returns ``(TemporaryPathFile_or_None, error_or_None)``.
+
+    ``(None, None)`` means the original should be kept as-is. The caller owns the
+    returned file and must save or ``discard()`` it.
+    """
+    result_path = None
+    planned_output_path = None
+    first_output_path = None
+    second_output_path = None
+    original_size = os.path.getsize(input_path)
+    start_time = datetime.now()
+    logger.info(f'[COMPRESS_VIDEO] 시작: {original_name}, 크기={original_size}bytes')
+    try:
+        ffmpeg_executable = resolve_ffmpeg_executable()
+        if not ffmpeg_executable:
+            if original_size <= target_max_bytes:
+                return None, None
+            return None, '동영상 압축 도구(FFmpeg)를 찾을 수 없습니다. 서버에 FFmpeg를 설치해주세요.'
+
+        probe = probe_video(input_path)
+        plan = choose_transcode_plan(probe, original_size, target_max_bytes)
+        probe_duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"[COMPRESS_VIDEO] 결정={plan['mode']} ({plan['reason']}), probe={probe}, 분석={probe_duration}초")
+
+        if plan['mode'] != 'ladder':
+            try:
+                planned_output_path = _run_planned_transcode(ffmpeg_executable, input_path, plan)
+            except subprocess.CalledProcessError:
+                logger.warning(f"[COMPRESS_VIDEO] {plan['mode']} 실패, CRF 단계 압축으로 전환")
+            else:
+                planned_size = os.path.getsize(planned_output_path)
+                planned_duration = (datetime.now() - start_time).total_seconds()
+                logger.info(
+                    f"[COMPRESS_VIDEO] {plan['mode']} 완료: {planned_size}bytes, 소요시간={planned_duration}초"
+                )
+                if planned_size <= target_max_bytes:
+                    result_path = planned_output_path
+                    return TemporaryPathFile(result_path, f"{Path(original_name).stem}.mp4"), None
+                logger.warning(f"[COMPRESS_VIDEO] {plan['mode']} 결과가 제한 초과, CRF 단계 압축으로 전환")
+
+        first_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4', dir=media_work_dir())
+        first_output_path = first_output.name
+        first_output.close()
+
+        base_command = [
+            ffmpeg_executable,
+            '-y',
+            '-i',
+            input_path,
+            '-vf',
+            'scale=min(1280,iw):-2',
+            '-c:v',
+            'libx264',
+            '-preset',
+            'medium',
+            '-crf',
+            '28',
+            '-c:a',
+            'aac',
+            '-b:a',
+            '128k',
+            '-movflags',
+            '+faststart',
+            first_output_path,
+        ]
+        logger.info('[COMPRESS_VIDEO] FFmpeg 첫번째 압축 시작 (1280p)')
+        subprocess.run(base_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        first_duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f'[COMPRESS_VIDEO] 첫번째 압축 완료: {first_duration}초')
+
+        candidate_path = first_output_path
+        first_size = os.path.getsize(candidate_path)
+        logger.info(f'[COMPRESS_VIDEO] 첫번째 결과: {first_size}bytes (limit={target_max_bytes})')
+        if first_size > target_max_bytes:
+            logger.warning(f'[COMPRESS_VIDEO] 첫번째 압축 초과, 두번째 압축 시작 (960p)')
+            second_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4', dir=media_work_dir())
+            second_output_path = second_output.name
+            second_output.close()
+
+            second_command = [
+                ffmpeg_executable,
+                '-y',
+                '-i',
+                input_path,
+                '-vf',
+                'scale=min(960,iw):-2',
+                '-c:v',
+                'libx264',
+                '-preset',
+                'medium',
+                '-crf',
+                '32',
+                '-c:a',
+                'aac',
+                '-b:a',
+                '96k',
+                '-movflags',
+                '+faststart',
+                second_output_path,
+            ]
+            subprocess.run(second_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            second_duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f'[COMPRESS_VIDEO] 두번째 압축 완료: {second_duration}초')
+            candidate_path = second_output_path
+
+        candidate_size = os.path.getsize(candidate_path)
+        total_duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f'[COMPRESS_VIDEO] 최종 결과: {candidate_size}bytes, 소요시간={total_duration}초')
+        if candidate_size > target_max_bytes:
+            if original_size <= target_max_bytes:
+                logger.info(f'[COMPRESS_VIDEO] 원본 파일 사용 (크기 내)')
+                return None, None
+            logger.error(f'[COMPRESS_VIDEO] 실패: 최종 크기 {candidate_size} > {target_max_bytes}')
+            return None, '동영상 압축 후에도 200MB를 초과합니다. 더 짧은 영상이나 해상도가 낮은 파일을 올려주세요.'
+
+        logger.info('[COMPRESS_VIDEO] 성공, 압축된 파일 반환')
+        result_path = candidate_path
+        return TemporaryPathFile(result_path, f"{Path(original_name).stem}.mp4"), None
+    except FileNotFoundError:
+        if original_size <= target_max_bytes:
+            return None, None
+        return None, '동영상 압축 도구(FFmpeg)를 찾을 수 없습니다. 서버에 FFmpeg를 설치해주세요.'
+    except subprocess.CalledProcessError:
+        if original_size <= target_max_bytes:
+            return None, None
+        return None, '동영상 변환 중 오류가 발생했습니다. 다른 동영상으로 다시 시도해주세요.'
+    except Exception:
+        logger.exception(f'[COMPRESS_VIDEO] 알 수 없는 오류: {original_name}')
+        return None, '동영상 처리 중 알 수 없는 오류가 발생했습니다.'
+    finally:
+        for temp_path in [planned_output_path, first_output_path, second_output_path]:
+            if temp_path and temp_path != result_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+
+def process_video_transcode(video_id):
+    """Transcode one ``processing`` video and swap in the compressed rendition."""
+    close_old_connections()
+    compressed_file = None
+    try:
+        video_item = FamilyPostVideo.objects.filter(pk=video_id, status=FamilyPostVideo.STATUS_PROCESSING).first()
+        if not video_item or not video_item.video:
+            return False
+
+        storage = video_item.video.storage
+        original_name = video_item.video.name
+        with ffmpeg_slot():
+            compressed_file, error = transcode_video_file(
+                storage.path(original_name),
+                original_name,
+                target_max_bytes=MAX_VIDEO_SIZE_BYTES,
+            )
+
+        pending_rows = FamilyPostVideo.objects.filter(pk=video_id, status=FamilyPostVideo.STATUS_PROCESSING)
+        if error:
+            logger.warning(f'[COMPRESS_VIDEO] 변환 실패, 원본 유지: video_id={video_id}, {error}')
+            pending_rows.update(status=FamilyPostVideo.STATUS_FAILED)
+            return False
+
+        if not compressed_file:
+            pending_rows.update(status=FamilyPostVideo.STATUS_READY)
+            return True
+
+        video_item.video.save(compressed_file.name, compressed_file, save=False)
+        if not pending_rows.update(video=video_item.video.name, status=FamilyPostVideo.STATUS_READY):
+            # 변환 중에 기사가 삭제된 경우 새로 만든 파일만 정리한다.
+            storage.delete(video_item.video.name)
+            return False
+
+        storage.delete(original_name)
+        return True
+    except Exception:
+        logger.exception(f'[COMPRESS_VIDEO] 백그라운드 변환 오류: video_id={video_id}')
+        FamilyPostVideo.objects.filter(pk=video_id, status=FamilyPostVideo.STATUS_PROCESSING).update(
+            status=FamilyPostVideo.STATUS_FAILED,
+        )
+        return False
+    finally:
+        if compressed_file:
+            compressed_file.discard()
+        close_old_connections()
+
+
+def schedule_video_transcode(video_id):
+    submit_after_commit(
+        'video-transcode',
+        process_video_transcode,
+        video_id,
+        max_workers=getattr(settings, 'VIDEO_TRANSCODE_THREADS', 1),
+    )
+
+
+class VideoIngest:
+    """One on-disk copy of an uploaded video shared by every ffmpeg step of a request.
+
+    Django already spools large uploads to ``temporary_file_path()``; that path is used
+    as-is and later moved into MEDIA_ROOT by the storage. Only small in-memory uploads
+    are written to a temp file, once.
+    """
+
+    def __init__(self, uploaded_file):
+        self.uploaded_file = uploaded_file
+        self._spooled_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+    @property
+    def path(self):
+        temporary_file_path = getattr(self.uploaded_file, 'temporary_file_path', None)
+        if temporary_file_path:
+            return temporary_file_path()
+
+        if not self._spooled_path:
+            suffix = Path(self.uploaded_file.name).suffix or '.mp4'
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=media_work_dir()) as input_temp:
+                for chunk in self.uploaded_file.chunks():
+                    input_temp.write(chunk)
+                self._spooled_path = input_temp.name
+        return self._spooled_path
+
+    def extract_poster(self):
+        output_image_path = None
+        try:
+            ffmpeg_executable = resolve_ffmpeg_executable()
+            if not ffmpeg_executable:
+                return _generate_video_placeholder_image(self.uploaded_file), None
+
+            output_temp = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg', dir=media_work_dir())
+            output_image_path = output_temp.name
+            output_temp.close()
+
+            # 입력 앞쪽 -ss는 키프레임 단위로 바로 이동하므로 1초 분량을 디코딩하지 않는다.
+            # 1초보다 짧은 영상은 프레임이 나오지 않으므로 처음 프레임으로 다시 시도한다.
+            for seek in ('00:00:01', '00:00:00'):
+                command = [
+                    ffmpeg_executable,
+                    '-y',
+                    '-ss',
+                    seek,
+                    '-i',
+                    self.path,
+                    '-frames:v',
+                    '1',
+                    output_image_path,
+                ]
+                subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                if os.path.getsize(output_image_path) > 0:
+                    break
+
+            with open(output_image_path, 'rb') as image_file:
+                file_name = f"{Path(self.uploaded_file.name).stem}_thumb.jpg"
+                return ContentFile(image_file.read(), name=file_name), None
+        except FileNotFoundError:
+            return _generate_video_placeholder_image(self.uploaded_file), None
+        except subprocess.CalledProcessError:
+            return None, '동영상 썸네일 생성에 실패했습니다. 다른 동영상으로 다시 시도해주세요.'
+        except Exception:
+            return None, '동영상 썸네일 생성 중 오류가 발생했습니다.'
+        finally:
+            if output_image_path and os.path.exists(output_image_path):
+                try:
+                    os.remove(output_image_path)
+                except OSError:
+                    pass
+
+    def cleanup(self):
+        if self._spooled_path and os.path.exists(self._spooled_path):
+            try:
+                os.remove(self._spooled_path)
+            except OSError:
+                pass
+        self._spooled_path = None
+
+
+def _generate_video_placeholder_image(uploaded_file):
+    image = Image.new('RGB', (1280, 720), color=(28, 36, 48))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    buffer.seek(0)
+    file_name = f"{Path(uploaded_file.name).stem}_thumb.jpg"
+    return ContentFile(buffer.read(), name=file_name)
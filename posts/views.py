@@ -3,33 +3,42 @@ from django.conf import settings
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
-from django.db import OperationalError, ProgrammingError
-from django.db.models import Q, Case, When, IntegerField, Value, Count
+from django.db import OperationalError, ProgrammingError, transaction
 from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_GET
-from django.views.decorators.http import require_POST
-from PIL import Image, ImageOps, UnidentifiedImageError
-from io import BytesIO
+from django.views.decorators.http import require_http_methods, require_POST
+from PIL import UnidentifiedImageError
 import json
 import logging
-import os
 from pathlib import Path
 import re
-import shutil
-import subprocess
-import tempfile
-from datetime import datetime
+import time
 
 logger = logging.getLogger('posts.upload')
 
+from .background import get_executor
+from .comment_service import load_comment_page
 from .forms import FamilyLoginForm, FamilyMemberCreateForm, FamilyMemberPhotoForm, FamilyMemberUpdateForm, FamilyPostCommentForm, FamilyPostEditForm
-from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo, QuarterlyNewspaper, Tag
-from .newspaper_service import sync_all_quarterly_newspapers
+from .front_page import load_front_page
+from .gallery_service import load_gallery_page
+from .image_pipeline import optimize_image
+from .image_rotation import schedule_image_rotation
+from .image_service import load_renditions
+from .models import FamilyMemberPhoto, FamilyMemberProfile, FamilyPost, FamilyPostComment, FamilyPostImage, FamilyPostVideo, QuarterlyNewspaper, RelatedPost, StagedMedia, UploadSession
+from .newspaper_jobs import schedule_quarter_regeneration
 from .notifications import send_new_post_notification, send_signup_request_notification
+from .profiles import DEFAULT_EMOJI, get_profile_resolver
+from .search_service import search_posts
+from .staging_service import StagedMediaError, discard_staged_media, find_staged_upload, load_staged_media, requeue_if_stalled, stage_upload, staged_image_file, staged_poster_file, staged_video_file
+from .tag_service import sync_post_tags
+from .tag_trie import get_tag_trie
+from .upload_service import UploadSessionError, append_upload_chunk, create_upload_session, finalize_upload_session, upload_chunk_bytes
+from .video_service import MAX_VIDEO_SIZE_BYTES, VideoIngest, is_browser_playable, schedule_video_transcode
 
 
 if getattr(settings, 'DISABLE_LOGIN_REQUIRED', False):
@@ -72,9 +81,8 @@ def _first_form_error_message(form):
 	return '입력값을 다시 확인해주세요.'
 
 
-MAX_VIDEO_SIZE_BYTES = 200 * 1024 * 1024
 MAX_IMAGE_SIZE_BYTES = 200 * 1024 * 1024
-FFMPEG_EXECUTABLE = None
+POST_EDIT_FIELDS = ['title', 'content', 'event_date', 'main_image']
 
 
 def _normalize_rotation_degrees(degrees):
@@ -124,55 +132,19 @@ def _parse_image_rotation_map(raw_rotations):
 	return rotation_map
 
 
-def _rotate_saved_image(image_field, rotation_degrees, quality=80):
-	rotation_degrees = _normalize_rotation_degrees(rotation_degrees)
-	if not rotation_degrees or not image_field:
-		return False
-
-	try:
-		image_field.open('rb')
-		image = Image.open(image_field)
-		image = ImageOps.exif_transpose(image)
-		image = image.rotate(-rotation_degrees, expand=True)
-
-		if image.mode not in ('RGB', 'L'):
-			image = image.convert('RGB')
-
-		buffer = BytesIO()
-		image.save(buffer, format='JPEG', quality=quality, optimize=True)
-		buffer.seek(0)
-
-		file_name = f"{Path(image_field.name).stem}.jpg"
-		image_field.save(file_name, ContentFile(buffer.read()), save=False)
-		return True
-	except (UnidentifiedImageError, OSError, ValueError, AttributeError):
-		return False
-	finally:
-		try:
-			image_field.close()
-		except Exception:
-			pass
-
-
 def _optimize_uploaded_image(uploaded_file, max_size=(1280, 1280), quality=80, rotation_degrees=0):
 	try:
 		uploaded_file.seek(0)
-		image = Image.open(uploaded_file)
-		image = ImageOps.exif_transpose(image)
-		rotation_degrees = _normalize_rotation_degrees(rotation_degrees)
-		if rotation_degrees:
-			image = image.rotate(-rotation_degrees, expand=True)
-		image.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-		if image.mode not in ('RGB', 'L'):
-			image = image.convert('RGB')
-
-		buffer = BytesIO()
-		image.save(buffer, format='JPEG', quality=quality, optimize=True)
-		buffer.seek(0)
+		image_bytes, stats = optimize_image(
+			uploaded_file,
+			max_size=max_size,
+			quality=quality,
+			rotation_degrees=_normalize_rotation_degrees(rotation_degrees),
+		)
+		logger.info(f'[UPLOAD] 이미지 최적화 {uploaded_file.name}: {stats.summary()}')
 
 		file_name = f"{Path(uploaded_file.name).stem}.jpg"
-		return ContentFile(buffer.read(), name=file_name)
+		return ContentFile(image_bytes, name=file_name)
 	except (UnidentifiedImageError, OSError, ValueError, AttributeError):
 		try:
 			uploaded_file.seek(0)
@@ -181,214 +153,33 @@ def _optimize_uploaded_image(uploaded_file, max_size=(1280, 1280), quality=80, r
 		return uploaded_file
 
 
-def _get_user_emoji(user):
-	if not user or not user.is_authenticated:
-		return '🙂'
-	try:
-		emoji = user.family_profile.emoji
-		return emoji or '🙂'
-	except FamilyMemberProfile.DoesNotExist:
-		return '🙂'
-
-
-def _compress_uploaded_video(uploaded_file, target_max_bytes=MAX_VIDEO_SIZE_BYTES):
-	input_temp_path = None
-	first_output_path = None
-	second_output_path = None
-	original_size = getattr(uploaded_file, 'size', 0) or 0
-	start_time = datetime.now()
-	logger.info(f'[COMPRESS_VIDEO] 시작: {uploaded_file.name}, 크기={original_size}bytes')
-	try:
-		ffmpeg_executable = _resolve_ffmpeg_executable()
-		if not ffmpeg_executable:
-			if original_size and original_size <= target_max_bytes:
-				uploaded_file.seek(0)
-				return uploaded_file, None
-			return None, '동영상 압축 도구(FFmpeg)를 찾을 수 없습니다. 서버에 FFmpeg를 설치해주세요.'
-
-		with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix or '.mp4') as input_temp:
-			for chunk in uploaded_file.chunks():
-				input_temp.write(chunk)
-			input_temp_path = input_temp.name
-
-		first_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-		first_output_path = first_output.name
-		first_output.close()
-
-		base_command = [
-			ffmpeg_executable,
-			'-y',
-			'-i',
-			input_temp_path,
-			'-vf',
-			'scale=min(1280,iw):-2',
-			'-c:v',
-			'libx264',
-			'-preset',
-			'medium',
-			'-crf',
-			'28',
-			'-c:a',
-			'aac',
-			'-b:a',
-			'128k',
-			'-movflags',
-			'+faststart',
-			first_output_path,
-		]
-		logger.info('[COMPRESS_VIDEO] FFmpeg 첫번째 압축 시작 (1280p)')
-		subprocess.run(base_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-		first_duration = (datetime.now() - start_time).total_seconds()
-		logger.info(f'[COMPRESS_VIDEO] 첫번째 압축 완료: {first_duration}초')
-
-		candidate_path = first_output_path
-		first_size = os.path.getsize(candidate_path)
-		logger.info(f'[COMPRESS_VIDEO] 첫번째 결과: {first_size}bytes (limit={target_max_bytes})')
-		if first_size > target_max_bytes:
-			logger.warning(f'[COMPRESS_VIDEO] 첫번째 압축 초과, 두번째 압축 시작 (960p)')
-			second_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-			second_output_path = second_output.name
-			second_output.close()
-
-			second_command = [
-				ffmpeg_executable,
-				'-y',
-				'-i',
-				input_temp_path,
-				'-vf',
-				'scale=min(960,iw):-2',
-				'-c:v',
-				'libx264',
-				'-preset',
-				'medium',
-				'-crf',
-				'32',
-				'-c:a',
-				'aac',
-				'-b:a',
-				'96k',
-				'-movflags',
-				'+faststart',
-				second_output_path,
-			]
-			subprocess.run(second_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-			second_duration = (datetime.now() - start_time).total_seconds()
-			logger.info(f'[COMPRESS_VIDEO] 두번째 압축 완료: {second_duration}초')
-			candidate_path = second_output_path
-
-		candidate_size = os.path.getsize(candidate_path)
-		total_duration = (datetime.now() - start_time).total_seconds()
-		logger.info(f'[COMPRESS_VIDEO] 최종 결과: {candidate_size}bytes, 소요시간={total_duration}초')
-		if candidate_size > target_max_bytes:
-			if original_size and original_size <= target_max_bytes:
-				logger.info(f'[COMPRESS_VIDEO] 원본 파일 사용 (크기 내)')
-				with open(input_temp_path, 'rb') as original_file:
-					return ContentFile(original_file.read(), name=uploaded_file.name), None
-			logger.error(f'[COMPRESS_VIDEO] 실패: 최종 크기 {candidate_size} > {target_max_bytes}')
-			return None, '동영상 압축 후에도 200MB를 초과합니다. 더 짧은 영상이나 해상도가 낮은 파일을 올려주세요.'
-
-		logger.info('[COMPRESS_VIDEO] 성공, 압축된 파일 반환')
-		with open(candidate_path, 'rb') as compressed_file:
-			file_name = f"{Path(uploaded_file.name).stem}.mp4"
-			return ContentFile(compressed_file.read(), name=file_name), None
-	except FileNotFoundError:
-		if original_size and original_size <= target_max_bytes and input_temp_path and os.path.exists(input_temp_path):
-			with open(input_temp_path, 'rb') as original_file:
-				return ContentFile(original_file.read(), name=uploaded_file.name), None
-		return None, '동영상 압축 도구(FFmpeg)를 찾을 수 없습니다. 서버에 FFmpeg를 설치해주세요.'
-	except subprocess.CalledProcessError:
-		if original_size and original_size <= target_max_bytes and input_temp_path and os.path.exists(input_temp_path):
-			with open(input_temp_path, 'rb') as original_file:
-				return ContentFile(original_file.read(), name=uploaded_file.name), None
-		return None, '동영상 변환 중 오류가 발생했습니다. 다른 동영상으로 다시 시도해주세요.'
-	except Exception:
-		return None, '동영상 처리 중 알 수 없는 오류가 발생했습니다.'
-	finally:
-		for temp_path in [input_temp_path, first_output_path, second_output_path]:
-			if temp_path and os.path.exists(temp_path):
-				try:
-					os.remove(temp_path)
-				except OSError:
-					pass
-
-
-def _extract_video_thumbnail(uploaded_file):
-	input_temp_path = None
-	output_image_path = None
-	try:
-		ffmpeg_executable = _resolve_ffmpeg_executable()
-		if not ffmpeg_executable:
-			return _generate_video_placeholder_image(uploaded_file), None
-
-		with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix or '.mp4') as input_temp:
-			for chunk in uploaded_file.chunks():
-				input_temp.write(chunk)
-			input_temp_path = input_temp.name
-
-		output_temp = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-		output_image_path = output_temp.name
-		output_temp.close()
-
-		command = [
-			ffmpeg_executable,
-			'-y',
-			'-i',
-			input_temp_path,
-			'-ss',
-			'00:00:01',
-			'-frames:v',
-			'1',
-			output_image_path,
-		]
-		subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-		with open(output_image_path, 'rb') as image_file:
-			file_name = f"{Path(uploaded_file.name).stem}_thumb.jpg"
-			return ContentFile(image_file.read(), name=file_name), None
-	except FileNotFoundError:
-		return _generate_video_placeholder_image(uploaded_file), None
-	except subprocess.CalledProcessError:
-		return None, '동영상 썸네일 생성에 실패했습니다. 다른 동영상으로 다시 시도해주세요.'
-	except Exception:
-		return None, '동영상 썸네일 생성 중 오류가 발생했습니다.'
-	finally:
-		for temp_path in [input_temp_path, output_image_path]:
-			if temp_path and os.path.exists(temp_path):
-				try:
-					os.remove(temp_path)
-				except OSError:
-					pass
-
-
-def _resolve_ffmpeg_executable():
-	global FFMPEG_EXECUTABLE
-	if FFMPEG_EXECUTABLE:
-		return FFMPEG_EXECUTABLE
-
-	which_path = shutil.which('ffmpeg')
-	if which_path:
-		FFMPEG_EXECUTABLE = which_path
-		return FFMPEG_EXECUTABLE
-
-	local_app_data = os.environ.get('LOCALAPPDATA')
-	if local_app_data:
-		packages_dir = Path(local_app_data) / 'Microsoft' / 'WinGet' / 'Packages'
-		if packages_dir.exists():
-			candidates = list(packages_dir.rglob('ffmpeg.exe'))
-			if candidates:
-				FFMPEG_EXECUTABLE = str(candidates[0])
-				return FFMPEG_EXECUTABLE
-
-	return None
-
-
-def _generate_video_placeholder_image(uploaded_file):
-	image = Image.new('RGB', (1280, 720), color=(28, 36, 48))
-	buffer = BytesIO()
-	image.save(buffer, format='JPEG', quality=85)
-	buffer.seek(0)
-	file_name = f"{Path(uploaded_file.name).stem}_thumb.jpg"
-	return ContentFile(buffer.read(), name=file_name)
+def _optimize_uploaded_images(image_files, rotations):
+	"""Optimize ``image_files`` on the shared image pool, returning results in upload order.
+
+	Pillow releases the GIL while decoding, resizing and encoding, so threads run in parallel.
+	A file that fails for any reason is kept as uploaded without affecting the others.
+	"""
+	if not image_files:
+		return []
+
+	max_workers = getattr(settings, 'IMAGE_OPTIMIZE_THREADS', 2)
+	executor = get_executor('image-optimize', max_workers=max_workers)
+	started = time.monotonic()
+	futures = [
+		executor.submit(_optimize_uploaded_image, image_file, rotation_degrees=rotations[idx])
+		for idx, image_file in enumerate(image_files)
+	]
+	optimized_images = []
+	for image_file, future in zip(image_files, futures):
+		try:
+			optimized_images.append(future.result())
+		except Exception:
+			logger.exception(f'[UPLOAD] 이미지 최적화 실패, 원본 유지: {image_file.name}')
+			image_file.seek(0)
+			optimized_images.append(image_file)
+	duration_ms = int((time.monotonic() - started) * 1000)
+	logger.info(f'[UPLOAD] 이미지 {len(image_files)}장 최적화 {duration_ms}ms (스레드 {max_workers})')
+	return optimized_images
 
 
 def _parse_tag_names(raw_text):
@@ -410,12 +201,7 @@ def _parse_tag_names(raw_text):
 
 
 def _sync_post_tags(post, raw_text):
-	tag_names = _parse_tag_names(raw_text)
-	tag_objects = []
-	for name in tag_names:
-		tag_obj, _ = Tag.objects.get_or_create(name=name)
-		tag_objects.append(tag_obj)
-	post.tags.set(tag_objects)
+	sync_post_tags(post, _parse_tag_names(raw_text))
 
 
 def _can_manage_post(user, post):
@@ -428,39 +214,31 @@ def _is_bihong(user):
 	return bool(user and user.is_authenticated and user.username == 'bihong')
 
 
+def _image_renditions_for(field_files):
+	return load_renditions(field_file.name for field_file in field_files if field_file)
+
+
 def home(request):
 	try:
-		all_posts = FamilyPost.objects.select_related('author').annotate(comment_count=Count('comments')).order_by('-pk')
-		hero_post = all_posts.first()
-		posts = all_posts.exclude(pk=hero_post.pk) if hero_post else all_posts
-		major_posts = all_posts[:6]
+		front_page = load_front_page()
 	except (OperationalError, ProgrammingError):
-		hero_post = None
-		posts = []
-		major_posts = []
+		front_page = {'hero_post': None, 'story_posts': [], 'image_renditions': {}}
 
+	hero_post = front_page['hero_post']
 	post_items = [
 		{
 			'post': post,
-			'emoji': _get_user_emoji(post.author),
+			'emoji': post['author_emoji'],
 		}
-		for post in posts
-	]
-
-	major_items = [
-		{
-			'post': post,
-			'emoji': _get_user_emoji(post.author),
-		}
-		for post in major_posts
+		for post in front_page['story_posts']
 	]
 
 	context = {
 		'hero_post': hero_post,
-		'hero_author_emoji': _get_user_emoji(hero_post.author) if hero_post else '🙂',
+		'hero_author_emoji': hero_post['author_emoji'] if hero_post else DEFAULT_EMOJI,
 		'post_items': post_items,
-		'major_items': major_items,
-		'current_user_emoji': _get_user_emoji(request.user),
+		'current_user_emoji': get_profile_resolver(request).emoji(request.user),
+		'image_renditions': front_page['image_renditions'],
 	}
 	return render(request, 'posts/index.html', context)
 
@@ -470,36 +248,21 @@ def news_search(request):
 	search_content = request.GET.get('search_content') == 'on'
 	sort = (request.GET.get('sort') or 'latest').strip()
 
-	result_qs = FamilyPost.objects.select_related('author').prefetch_related('tags').order_by('-pk')
 	if query:
-		tag_query = Q(tags__name__icontains=query)
-		content_query = Q(content__icontains=query)
-		if search_content:
-			result_qs = result_qs.filter(tag_query | content_query).distinct()
-		else:
-			result_qs = result_qs.filter(tag_query).distinct()
-
-		if sort == 'relevance':
-			result_qs = result_qs.annotate(
-				relevance_score=(
-					Case(When(tag_query, then=Value(2)), default=Value(0), output_field=IntegerField()) +
-					Case(When(content_query, then=Value(1)), default=Value(0), output_field=IntegerField())
-				)
-			).order_by('-relevance_score', '-pk')
-		else:
-			result_qs = result_qs.order_by('-pk')
+		result_qs = search_posts(query, include_content=search_content, sort=sort)
 	else:
 		result_qs = FamilyPost.objects.none()
 
-	result_qs = result_qs.annotate(comment_count=Count('comments', distinct=True))
+	result_qs = result_qs.select_related('author__family_profile').prefetch_related('tags')
 
 	paginator = Paginator(result_qs, 10)
 	page_obj = paginator.get_page(request.GET.get('page'))
+	profiles = get_profile_resolver(request).prime(post.author for post in page_obj.object_list)
 
 	result_items = [
 		{
 			'post': post,
-			'emoji': _get_user_emoji(post.author),
+			'emoji': profiles.emoji(post.author),
 			'tag_count': len(post.tags.all()),
 		}
 		for post in page_obj.object_list
@@ -514,54 +277,31 @@ def news_search(request):
 			'sort': sort,
 			'page_obj': page_obj,
 			'result_items': result_items,
+			'image_renditions': _image_renditions_for(item['post'].main_image for item in result_items),
 		},
 	)
 
 
 def photo_gallery(request):
-	main_image_items = [
-		{
-			'post': post,
-			'image_url': post.main_image.url,
-			'created_at': post.created_at,
-			'emoji': _get_user_emoji(post.author),
-		}
-		for post in FamilyPost.objects.select_related('author').order_by('-created_at')
-		if post.main_image
-	]
-
-	extra_image_items = [
-		{
-			'post': image_item.post,
-			'image_url': image_item.image.url,
-			'created_at': image_item.created_at,
-			'emoji': _get_user_emoji(image_item.post.author),
-		}
-		for image_item in FamilyPostImage.objects.select_related('post', 'post__author').order_by('-created_at')
-		if image_item.image
-	]
-
-	gallery_items = sorted(
-		main_image_items + extra_image_items,
-		key=lambda item: item['created_at'],
-		reverse=True,
-	)
-
-	paginator = Paginator(gallery_items, 24)
-	page_obj = paginator.get_page(request.GET.get('page'))
+	gallery_page = load_gallery_page(before=request.GET.get('before'), after=request.GET.get('after'))
+	gallery_items = gallery_page['items']
+	profiles = get_profile_resolver(request).prime(item['post'].author for item in gallery_items)
+	for item in gallery_items:
+		item['emoji'] = profiles.emoji(item['post'].author)
 
 	return render(
 		request,
 		'posts/photo_gallery.html',
 		{
-			'page_obj': page_obj,
-			'gallery_items': page_obj.object_list,
+			'gallery_items': gallery_items,
+			'previous_cursor': gallery_page['previous_cursor'],
+			'next_cursor': gallery_page['next_cursor'],
+			'image_renditions': _image_renditions_for(item['image'] for item in gallery_items),
 		},
 	)
 
 
 def newspaper_hall(request):
-	sync_all_quarterly_newspapers()
 	newspapers = QuarterlyNewspaper.objects.all()
 	return render(request, 'posts/newspaper_hall.html', {'newspapers': newspapers})
 
@@ -572,33 +312,32 @@ def newspaper_detail(request, newspaper_id):
 
 
 def post_detail(request, pk):
+	# 댓글은 전부 미리 읽지 않고 첫 페이지만 keyset 으로 읽으므로, 댓글 수와 상관없이 쿼리 수가 일정하다.
+	# 댓글 수는 기사에 저장된 카운터를 읽는다.
 	post = get_object_or_404(
-		FamilyPost.objects.select_related('author').prefetch_related('tags', 'images', 'videos', 'comments__author'),
+		FamilyPost.objects.select_related('author__family_profile')
+		.prefetch_related('tags', 'images', 'videos'),
 		pk=pk,
 	)
-	related_posts = FamilyPost.objects.none()
 	slider_images = []
-	comments = post.comments.select_related('author').order_by('-created_at')
+	comment_page = load_comment_page(post, before=request.GET.get('comments_before'))
 
 	if post.main_image:
-		slider_images.append(post.main_image.url)
+		slider_images.append(post.main_image)
 
 	for extra_image in post.images.all():
-		slider_images.append(extra_image.image.url)
-
-	if post.tags.exists():
-		related_posts = (
-			FamilyPost.objects.select_related('author')
-			.prefetch_related('tags')
-			.filter(tags__in=post.tags.all())
-			.exclude(pk=post.pk)
-			.distinct()[:8]
-		)
+		slider_images.append(extra_image.image)
 
+	# 연관 기사는 태그가 바뀔 때 미리 계산해 둔 순위를 그대로 읽는다.
+	related_posts = [
+		link.related
+		for link in RelatedPost.objects.filter(post=post).select_related('related__author__family_profile')[:8]
+	]
+	profiles = get_profile_resolver(request).prime([post.author] + [related.author for related in related_posts])
 	related_items = [
 		{
 			'post': related,
-			'emoji': _get_user_emoji(related.author),
+			'emoji': profiles.emoji(related.author),
 		}
 		for related in related_posts
 	]
@@ -610,29 +349,61 @@ def post_detail(request, pk):
 		'posts/detail.html',
 		{
 			'post': post,
-			'author_emoji': _get_user_emoji(post.author),
+			'author_emoji': profiles.emoji(post.author),
 			'slider_images': slider_images,
-			'post_videos': [video_item.video.url for video_item in post.videos.all()],
+			'post_videos': [
+				{
+					'url': video_item.video.url,
+					'is_processing': video_item.is_processing,
+					'is_playable': is_browser_playable(video_item.video.name),
+				}
+				for video_item in post.videos.all()
+			],
 			'related_items': related_items,
-			'comments': comments,
+			'image_renditions': _image_renditions_for(
+				slider_images + [item['post'].main_image for item in related_items]
+			),
+			'comments': comment_page['comments'],
+			'comments_next_cursor': comment_page['next_cursor'],
 			'comment_form': comment_form,
 			'can_manage_post': _can_manage_post(request.user, post),
 		},
 	)
 
 
+@require_GET
+def post_comments(request, pk):
+	post = get_object_or_404(FamilyPost.objects.only('pk'), pk=pk)
+	comment_page = load_comment_page(post, before=request.GET.get('before'))
+	return JsonResponse({
+		'html': render_to_string('posts/_comment_list_items.html', {'comments': comment_page['comments']}, request=request),
+		'next_cursor': comment_page['next_cursor'],
+	})
+
+
 @login_required
 @require_POST
 def add_comment(request, pk):
-	post = get_object_or_404(FamilyPost, pk=pk)
+	# fetch 로 등록하면 상세 페이지를 다시 그리지 않고 새 댓글 조각과 댓글 수만 돌려준다.
+	is_ajax = _is_ajax_upload_request(request)
+	post = get_object_or_404(FamilyPost.objects.only('pk'), pk=pk)
 	form = FamilyPostCommentForm(request.POST)
 	if form.is_valid():
 		new_comment = form.save(commit=False)
 		new_comment.post = post
 		new_comment.author = request.user
 		new_comment.save()
+		if is_ajax:
+			return JsonResponse({
+				'ok': True,
+				'message': '댓글이 등록되었습니다.',
+				'html': render_to_string('posts/_comment_list_items.html', {'comments': [new_comment]}, request=request),
+				'comment_count': FamilyPost.objects.filter(pk=post.pk).values_list('comment_count', flat=True).get(),
+			})
 		messages.success(request, '댓글이 등록되었습니다.')
 	else:
+		if is_ajax:
+			return _json_upload_error('댓글 내용을 입력해 주세요.')
 		messages.error(request, '댓글 내용을 입력해 주세요.')
 	return redirect('post_detail', pk=post.pk)
 
@@ -651,6 +422,13 @@ def edit_post(request, pk):
 				for image_file in request.FILES.getlist('images')
 				if getattr(image_file, 'content_type', '').startswith('image/')
 			]
+			if image_files and staged_media:
+				# 대표사진 번호와 회전값은 한 가지 목록의 순서를 기준으로 하므로 섞어서 보내면 어긋난다.
+				message = '미리 올린 파일과 직접 첨부한 사진을 함께 보낼 수 없습니다. 다시 선택해주세요.'
+				messages.error(request, message)
+				if is_ajax:
+					return _json_upload_error(message)
+				return render(request, 'posts/upload_photo.html', {'form': form})
 			uploaded_videos = request.FILES.getlist('videos')
 
 			for image_file in image_files:
@@ -658,16 +436,10 @@ def edit_post(request, pk):
 					form.add_error('images', '200메가 이상의 파일은 업로드 불가합니다.')
 					return render(request, 'posts/edit_post.html', {'form': form, 'post': post})
 
-			compressed_videos = []
 			for video_file in uploaded_videos:
 				if getattr(video_file, 'size', 0) > MAX_VIDEO_SIZE_BYTES:
 					form.add_error('videos', '200메가 이상의 파일은 업로드 불가합니다.')
 					return render(request, 'posts/edit_post.html', {'form': form, 'post': post})
-				compressed_video, compress_error = _compress_uploaded_video(video_file, target_max_bytes=MAX_VIDEO_SIZE_BYTES)
-				if compress_error:
-					form.add_error('videos', compress_error)
-					return render(request, 'posts/edit_post.html', {'form': form, 'post': post})
-				compressed_videos.append(compressed_video)
 
 			edited_post = form.save(commit=False)
 			delete_main_image = request.POST.get('delete_main_image') == 'on'
@@ -691,10 +463,7 @@ def edit_post(request, pk):
 			)
 			main_image_rotation = _normalize_rotation_degrees(request.POST.get('main_image_rotation', 0))
 			existing_image_rotation_map = _parse_image_rotation_map(request.POST.get('existing_image_rotations', ''))
-			uploaded_images = [
-				_optimize_uploaded_image(file_item, rotation_degrees=image_rotations[idx])
-				for idx, file_item in enumerate(image_files)
-			]
+			uploaded_images = _optimize_uploaded_images(image_files, image_rotations)
 			representative_uploaded_image = None
 			extra_uploaded_images = []
 			promoted_image = None
@@ -724,24 +493,25 @@ def edit_post(request, pk):
 					promoted_image = remaining_extra_images.pop(0)
 					edited_post.main_image = promoted_image.image
 					delete_extra_image_ids.add(promoted_image.pk)
-					promoted_rotation = existing_image_rotation_map.get(promoted_image.pk, 0)
-					if promoted_rotation:
-						_rotate_saved_image(edited_post.main_image, promoted_rotation)
+					main_image_rotation = existing_image_rotation_map.get(promoted_image.pk, 0)
 				else:
 					form.add_error('main_image', '대표 사진을 삭제하려면 새 사진을 올리거나 기존 추가 사진을 남겨주세요.')
 					return render(request, 'posts/edit_post.html', {'form': form, 'post': post})
-			elif main_image_rotation:
-				_rotate_saved_image(edited_post.main_image, main_image_rotation)
 
-			edited_post.save()
-			_sync_post_tags(edited_post, form.cleaned_data.get('tags'))
+			with transaction.atomic():
+				# 카운터는 신호가 F() 로 바꾸므로, 수정 화면에서 바꾸는 필드만 저장한다.
+				edited_post.save(update_fields=POST_EDIT_FIELDS)
+				_sync_post_tags(edited_post, form.cleaned_data.get('tags'))
 
+			# 저장된 사진 회전은 요청이 끝난 뒤 무손실로 처리한다.
+			if not representative_uploaded_image:
+				schedule_image_rotation(edited_post, 'main_image', main_image_rotation)
 			for existing_extra_image in edited_post.images.exclude(pk__in=delete_extra_image_ids):
-				extra_rotation = existing_image_rotation_map.get(existing_extra_image.pk, 0)
-				if not extra_rotation:
-					continue
-				if _rotate_saved_image(existing_extra_image.image, extra_rotation):
-					existing_extra_image.save(update_fields=['image'])
+				schedule_image_rotation(
+					existing_extra_image,
+					'image',
+					existing_image_rotation_map.get(existing_extra_image.pk, 0),
+				)
 
 			if delete_extra_image_ids:
 				edited_post.images.filter(pk__in=delete_extra_image_ids).delete()
@@ -752,8 +522,13 @@ def edit_post(request, pk):
 			for uploaded_image in extra_uploaded_images:
 				FamilyPostImage.objects.create(post=edited_post, image=uploaded_image)
 
-			for compressed_video in compressed_videos:
-				FamilyPostVideo.objects.create(post=edited_post, video=compressed_video)
+			for video_file in uploaded_videos:
+				new_video = FamilyPostVideo.objects.create(
+					post=edited_post,
+					video=video_file,
+					status=FamilyPostVideo.STATUS_PROCESSING,
+				)
+				schedule_video_transcode(new_video.pk)
 
 			messages.success(request, '기사가 수정되었습니다.')
 			return redirect('post_detail', pk=post.pk)
@@ -843,6 +618,14 @@ def check_username(request):
 	return JsonResponse({'available': True, 'message': '사용 가능한 아이디입니다.'})
 
 
+@require_GET
+def tag_autocomplete(request):
+	query = (request.GET.get('q') or '').strip().lstrip('#')
+	if not query:
+		return JsonResponse({'query': query, 'results': []})
+	return JsonResponse({'query': query, 'results': get_tag_trie().suggest(query)})
+
+
 @login_required
 def family_logout(request):
 	logout(request)
@@ -855,11 +638,29 @@ def upload_photo(request):
 	if request.method == 'POST':
 		form = FamilyMemberPhotoForm(request.POST, request.FILES)
 		if form.is_valid():
+			# 미리 올려서 처리해 둔 파일은 id 만 넘어온다.
+			try:
+				staged_media = load_staged_media(request.user, request.POST.getlist('staged_ids'))
+			except StagedMediaError as error:
+				messages.error(request, str(error))
+				if is_ajax:
+					return _json_upload_error(str(error), status=409)
+				return render(request, 'posts/upload_photo.html', {'form': form})
+			staged_images = [staged for staged in staged_media if staged.is_image]
+			staged_videos = [staged for staged in staged_media if not staged.is_image]
+
 			image_files = [
 				image_file
 				for image_file in request.FILES.getlist('images')
 				if getattr(image_file, 'content_type', '').startswith('image/')
 			]
+			if image_files and staged_media:
+				# 대표사진 번호와 회전값은 한 가지 목록의 순서를 기준으로 하므로 섞어서 보내면 어긋난다.
+				message = '미리 올린 파일과 직접 첨부한 사진을 함께 보낼 수 없습니다. 다시 선택해주세요.'
+				messages.error(request, message)
+				if is_ajax:
+					return _json_upload_error(message)
+				return render(request, 'posts/upload_photo.html', {'form': form})
 
 			for image_file in image_files:
 				if getattr(image_file, 'size', 0) > MAX_IMAGE_SIZE_BYTES:
@@ -871,15 +672,14 @@ def upload_photo(request):
 
 			image_rotations = _parse_image_rotation_values(
 				request.POST.get('image_rotations', ''),
-				len(image_files),
+				len(image_files) + len(staged_images),
 			)
-			uploaded_images = [
-				_optimize_uploaded_image(file_item, rotation_degrees=image_rotations[idx])
-				for idx, file_item in enumerate(image_files)
+			uploaded_images = _optimize_uploaded_images(image_files, image_rotations[:len(image_files)]) + [
+				staged_image_file(staged, rotation_degrees)
+				for staged, rotation_degrees in zip(staged_images, image_rotations[len(image_files):])
 			]
 
 			uploaded_videos = request.FILES.getlist('videos')
-			compressed_videos = []
 			for video_file in uploaded_videos:
 				if getattr(video_file, 'size', 0) > MAX_VIDEO_SIZE_BYTES:
 					message = '200메가 이상의 파일은 업로드 불가합니다.'
@@ -887,13 +687,6 @@ def upload_photo(request):
 					if is_ajax:
 						return _json_upload_error(message)
 					return render(request, 'posts/upload_photo.html', {'form': form})
-				compressed_video, compress_error = _compress_uploaded_video(video_file, target_max_bytes=MAX_VIDEO_SIZE_BYTES)
-				if compress_error:
-					messages.error(request, compress_error)
-					if is_ajax:
-						return _json_upload_error(compress_error)
-					return render(request, 'posts/upload_photo.html', {'form': form})
-				compressed_videos.append(compressed_video)
 
 			representative_image = None
 			extra_images = []
@@ -921,8 +714,11 @@ def upload_photo(request):
 					for idx, image_item in enumerate(uploaded_images)
 					if idx != main_image_index
 				]
+			elif staged_videos and not uploaded_videos:
+				representative_image = staged_poster_file(staged_videos[0])
 			elif uploaded_videos:
-				representative_image, thumbnail_error = _extract_video_thumbnail(uploaded_videos[0])
+				with VideoIngest(uploaded_videos[0]) as video_source:
+					representative_image, thumbnail_error = video_source.extract_poster()
 				if thumbnail_error:
 					messages.error(request, thumbnail_error)
 					if is_ajax:
@@ -940,38 +736,61 @@ def upload_photo(request):
 			captured_at = form.cleaned_data.get('captured_at')
 			event_date = form.cleaned_data.get('event_date')
 
-			member_photo = FamilyMemberPhoto.objects.create(
-				user=request.user,
-				image=representative_image,
-				caption=caption,
-			)
-			if captured_at:
-				FamilyMemberPhoto.objects.filter(pk=member_photo.pk).update(created_at=captured_at)
-
 			post_title = caption if caption else f'{request.user.username}님의 사진 소식'
 			post_content = article_content or caption or '가족 사진이 새로 업로드되었습니다.'
 			should_be_hero = not FamilyPost.objects.filter(is_hero=True).exists()
 
-			new_post = FamilyPost.objects.create(
-				title=post_title,
-				content=post_content,
-				main_image=representative_image,
-				event_date=event_date,
-				author=request.user,
-				is_hero=should_be_hero,
-			)
-			if captured_at:
-				FamilyPost.objects.filter(pk=new_post.pk).update(created_at=captured_at)
-			_sync_post_tags(new_post, form.cleaned_data.get('tags'))
-			for uploaded_image in extra_images:
-				extra_post_image = FamilyPostImage.objects.create(post=new_post, image=uploaded_image)
+			# 기사, 태그, 첨부 파일을 한 트랜잭션으로 저장해야 검색 색인이 커밋 뒤 한 번만 돌고,
+			# 중간에 실패해도 미리 올린 파일이 남아 다시 제출할 수 있다.
+			with transaction.atomic():
+				member_photo = FamilyMemberPhoto.objects.create(
+					user=request.user,
+					image=representative_image,
+					caption=caption,
+				)
 				if captured_at:
-					FamilyPostImage.objects.filter(pk=extra_post_image.pk).update(created_at=captured_at)
-
-			for compressed_video in compressed_videos:
-				extra_post_video = FamilyPostVideo.objects.create(post=new_post, video=compressed_video)
+					FamilyMemberPhoto.objects.filter(pk=member_photo.pk).update(created_at=captured_at)
+
+				new_post = FamilyPost.objects.create(
+					title=post_title,
+					content=post_content,
+					main_image=representative_image,
+					event_date=event_date,
+					author=request.user,
+					is_hero=should_be_hero,
+				)
 				if captured_at:
-					FamilyPostVideo.objects.filter(pk=extra_post_video.pk).update(created_at=captured_at)
+					FamilyPost.objects.filter(pk=new_post.pk).update(created_at=captured_at)
+					schedule_quarter_regeneration(captured_at)
+				_sync_post_tags(new_post, form.cleaned_data.get('tags'))
+				for uploaded_image in extra_images:
+					extra_post_image = FamilyPostImage.objects.create(post=new_post, image=uploaded_image)
+					if captured_at:
+						FamilyPostImage.objects.filter(pk=extra_post_image.pk).update(created_at=captured_at)
+
+				for video_file in uploaded_videos:
+					extra_post_video = FamilyPostVideo.objects.create(
+						post=new_post,
+						video=video_file,
+						status=FamilyPostVideo.STATUS_PROCESSING,
+					)
+					if captured_at:
+						FamilyPostVideo.objects.filter(pk=extra_post_video.pk).update(created_at=captured_at)
+					schedule_video_transcode(extra_post_video.pk)
+
+				for staged in staged_videos:
+					# 미리 변환해 둔 동영상은 파일만 옮긴다.
+					staged_video = staged_video_file(staged)
+					extra_post_video = FamilyPostVideo.objects.create(
+						post=new_post,
+						video=staged_video,
+						status=FamilyPostVideo.STATUS_FAILED if staged.error else FamilyPostVideo.STATUS_READY,
+					)
+					staged_video.close()
+					if captured_at:
+						FamilyPostVideo.objects.filter(pk=extra_post_video.pk).update(created_at=captured_at)
+
+				transaction.on_commit(lambda: discard_staged_media(staged_media))
 
 			send_new_post_notification(new_post, request=request)
 
@@ -991,6 +810,104 @@ def upload_photo(request):
 	return render(request, 'posts/upload_photo.html', {'form': form})
 
 
+def _upload_session_payload(session):
+	return {
+		'ok': True,
+		'id': str(session.pk),
+		'offset': session.received_bytes,
+		'size': session.total_size,
+		'complete': session.is_complete,
+		'chunk_size': upload_chunk_bytes(),
+		'upload_url': reverse('upload_session', args=[session.pk]),
+		'finalize_url': reverse('finalize_upload', args=[session.pk]),
+	}
+
+
+def _upload_session_error(error):
+	payload = {'ok': False, 'message': error.message}
+	if error.offset is not None:
+		payload['offset'] = error.offset
+	return JsonResponse(payload, status=error.status)
+
+
+@login_required
+@require_POST
+def create_upload(request):
+	try:
+		payload = json.loads(request.body or b'{}')
+	except ValueError:
+		payload = None
+	if not isinstance(payload, dict):
+		return _json_upload_error('요청 형식이 올바르지 않습니다.')
+
+	try:
+		session = create_upload_session(
+			request.user,
+			payload.get('file_name'),
+			payload.get('size'),
+			payload.get('content_type'),
+			payload.get('sha256', ''),
+		)
+	except UploadSessionError as error:
+		return _upload_session_error(error)
+	return JsonResponse(_upload_session_payload(session), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def upload_session(request, session_id):
+	if request.method == 'GET':
+		session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+		return JsonResponse(_upload_session_payload(session))
+
+	try:
+		session, chunk_sha256 = append_upload_chunk(
+			session_id,
+			request.user,
+			request,
+			request.headers.get('Content-Range'),
+			request.headers.get('X-Chunk-SHA256', ''),
+		)
+	except UploadSessionError as error:
+		return _upload_session_error(error)
+	return JsonResponse({**_upload_session_payload(session), 'chunk_sha256': chunk_sha256})
+
+
+def _staged_media_payload(staged):
+	return {
+		'ok': True,
+		'id': str(staged.pk),
+		'kind': staged.kind,
+		'status': staged.status,
+		'message': staged.error,
+		'status_url': reverse('staged_media_status', args=[staged.pk]),
+	}
+
+
+@login_required
+@require_POST
+def finalize_upload(request, session_id):
+	try:
+		session = finalize_upload_session(session_id, request.user)
+	except UploadSessionError as error:
+		# 201 응답을 받지 못하고 다시 보낸 요청이면 처음에 만든 대기 파일을 돌려준다.
+		staged = find_staged_upload(session_id, request.user) if error.status == 404 else None
+		if staged is None:
+			return _upload_session_error(error)
+		return JsonResponse(_staged_media_payload(staged))
+	# 다 받은 파일은 바로 백그라운드 처리에 넘긴다.
+	return JsonResponse(_staged_media_payload(stage_upload(session)), status=201)
+
+
+@login_required
+@require_GET
+def staged_media_status(request, staged_id):
+	staged = get_object_or_404(StagedMedia, pk=staged_id, user=request.user)
+	# 워커 재시작으로 처리 작업을 잃어버린 파일은 기다리는 화면이 물어볼 때 다시 예약한다.
+	requeue_if_stalled(staged)
+	return JsonResponse(_staged_media_payload(staged))
+
+
 @login_required
 def add_family_member(request):
 	if not _is_bihong(request.user):
@@ -1044,11 +961,12 @@ def member_management(request):
 	if not _is_bihong(request.user):
 		return redirect('home')
 
-	members = User.objects.exclude(username='bihong').order_by('date_joined')
+	members = User.objects.select_related('family_profile').exclude(username='bihong').order_by('date_joined')
+	profiles = get_profile_resolver(request)
 	member_items = [
 		{
 			'user': member,
-			'emoji': _get_user_emoji(member),
+			'emoji': profiles.emoji(member),
 		}
 		for member in members
 	]